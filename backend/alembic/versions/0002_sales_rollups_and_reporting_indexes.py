@@ -0,0 +1,68 @@
+"""Sales rollup tables and indexes for the admin order list and low-stock report
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# Low-stock threshold baked into ix_products_low_stock; app.models.product's
+# LOW_STOCK_THRESHOLD must match, and changing it takes a migration that
+# recreates the index
+LOW_STOCK_THRESHOLD = 10
+
+ORDER_STATUSES = ("PENDING", "CONFIRMED", "PREPARING", "SHIPPED", "DELIVERED", "CANCELLED")
+
+def upgrade() -> None:
+    op.create_table(
+        "daily_sales",
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("order_count", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.Float(), nullable=False),
+    )
+    op.create_table(
+        "daily_product_sales",
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("product_id", sa.Integer(), primary_key=True),
+        sa.Column("units", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.Float(), nullable=False),
+    )
+    op.create_table(
+        "daily_category_sales",
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("category_id", sa.Integer(), primary_key=True),
+        sa.Column("units", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.Float(), nullable=False),
+    )
+    op.create_table(
+        "daily_order_status",
+        sa.Column("day", sa.Date(), primary_key=True),
+        # The orderstatus type already exists from 0001
+        sa.Column("status", postgresql.ENUM(*ORDER_STATUSES, name="orderstatus", create_type=False), primary_key=True),
+        sa.Column("order_count", sa.Integer(), nullable=False),
+    )
+
+    op.create_index("ix_orders_created_at", "orders", ["created_at"])
+    op.create_index("ix_orders_status_created_at", "orders", ["status", "created_at"])
+    low_stock = sa.text(f"stock_quantity <= {LOW_STOCK_THRESHOLD}")
+    op.create_index(
+        "ix_products_low_stock",
+        "products",
+        ["category_id", "stock_quantity"],
+        postgresql_where=low_stock,
+        sqlite_where=low_stock,
+    )
+
+def downgrade() -> None:
+    op.drop_index("ix_products_low_stock", table_name="products")
+    op.drop_index("ix_orders_status_created_at", table_name="orders")
+    op.drop_index("ix_orders_created_at", table_name="orders")
+    for table in ("daily_order_status", "daily_category_sales", "daily_product_sales", "daily_sales"):
+        op.drop_table(table)
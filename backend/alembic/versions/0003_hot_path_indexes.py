@@ -0,0 +1,47 @@
+"""Indexes for the storefront, order history and cart query shapes
+
+carts.user_id is already covered by its unique constraint from 0001.
+tests/test_query_plans.py verifies the hot queries use these indexes.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_index("ix_products_active_category", "products", ["is_active", "category_id"])
+    op.create_index("ix_orders_user_created_at", "orders", ["user_id", "created_at"])
+    op.create_index("ix_order_items_order_id", "order_items", ["order_id"])
+
+    # Merge duplicate cart lines into the oldest one before enforcing uniqueness
+    op.execute(sa.text("""
+        UPDATE cart_items
+        SET quantity = (
+            SELECT SUM(duplicate.quantity) FROM cart_items AS duplicate
+            WHERE duplicate.cart_id = cart_items.cart_id
+              AND duplicate.product_id = cart_items.product_id
+        )
+        WHERE id IN (
+            SELECT MIN(id) FROM cart_items
+            GROUP BY cart_id, product_id
+            HAVING COUNT(*) > 1
+        )
+    """))
+    op.execute(sa.text("""
+        DELETE FROM cart_items
+        WHERE id NOT IN (SELECT MIN(id) FROM cart_items GROUP BY cart_id, product_id)
+    """))
+    op.create_index("ix_cart_items_cart_product", "cart_items", ["cart_id", "product_id"], unique=True)
+
+def downgrade() -> None:
+    op.drop_index("ix_cart_items_cart_product", table_name="cart_items")
+    op.drop_index("ix_order_items_order_id", table_name="order_items")
+    op.drop_index("ix_orders_user_created_at", table_name="orders")
+    op.drop_index("ix_products_active_category", table_name="products")
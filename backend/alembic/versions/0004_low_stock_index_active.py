@@ -0,0 +1,44 @@
+"""Lead the low-stock partial index with is_active
+
+The low-stock report filters on is_active = true, and ix_products_active_category
+matched that equality better than ix_products_low_stock did, so SQLite never
+read the partial index. With is_active first, the partial index serves the
+filter, the threshold and the report's ordering.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+# Must match app.models.product.LOW_STOCK_THRESHOLD; changing either takes a new
+# migration that recreates the index
+LOW_STOCK_THRESHOLD = 10
+
+def upgrade() -> None:
+    low_stock = sa.text(f"stock_quantity <= {LOW_STOCK_THRESHOLD}")
+    op.drop_index("ix_products_low_stock", table_name="products")
+    op.create_index(
+        "ix_products_low_stock",
+        "products",
+        ["is_active", "category_id", "stock_quantity"],
+        postgresql_where=low_stock,
+        sqlite_where=low_stock,
+    )
+
+def downgrade() -> None:
+    low_stock = sa.text(f"stock_quantity <= {LOW_STOCK_THRESHOLD}")
+    op.drop_index("ix_products_low_stock", table_name="products")
+    op.create_index(
+        "ix_products_low_stock",
+        "products",
+        ["category_id", "stock_quantity"],
+        postgresql_where=low_stock,
+        sqlite_where=low_stock,
+    )
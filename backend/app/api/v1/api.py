@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, products, cart, orders, admin, categories
+from app.api.v1.endpoints import auth, products, cart, orders, admin, categories, analytics
 
 api_router = APIRouter()
 
@@ -8,4 +8,5 @@ api_router.include_router(products.router, prefix="/products", tags=["products"]
 api_router.include_router(categories.router, prefix="/categories", tags=["categories"])
 api_router.include_router(cart.router, prefix="/cart", tags=["cart"])
 api_router.include_router(orders.router, prefix="/orders", tags=["orders"])
-api_router.include_router(admin.router, prefix="/admin", tags=["admin"]) 
\ No newline at end of file
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
+api_router.include_router(analytics.router, prefix="/admin/analytics", tags=["admin"]) 
\ No newline at end of file
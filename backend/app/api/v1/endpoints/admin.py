@@ -1,78 +1,245 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.core.database import get_db
-from app.models.user import User, UserRole
-from app.models.product import Product
-from app.models.order import Order, OrderStatus
-from app.schemas.product import ProductCreate, ProductUpdate
-from app.schemas.admin import OrderStatusUpdate
-from app.core.security import verify_token
-from fastapi.security import OAuth2PasswordBearer
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import and_, literal, or_, select
+from sqlalchemy.orm import Session, Query as OrmQuery
+from typing import Iterator, List, Optional, Tuple
+from datetime import datetime
+from app.core.database import get_db, SessionLocal
+from app.models.user import User
+from app.models.product import Product, LOW_STOCK_THRESHOLD, stock_status_for
+from app.models.category import Category
+from app.models.order import Order, OrderItem, OrderStatus
+from app.schemas.product import ProductCreate, ProductUpdate, ProductImportReport, LowStockCategory, ReplenishmentAlert
+from app.schemas.admin import (
+    OrderStatusUpdate, AdminOrderPage, BulkOrderStatusUpdate, BulkOrderStatusResponse, UserAdminUpdate,
+    AdminMetrics, ProfileSummary
+)
+from app.schemas.auth import UserResponse
+from app.core.auth import Principal, get_current_admin
+from app.utils.pagination import count_rows
+from app.utils.bulk_import import (
+    iter_csv_records, iter_ndjson_records, upsert_products, finalize_import, add_import_error
+)
+from app.core.catalog import invalidate_catalog
+from app.core.pool_metrics import pool_metrics
+from app.core.profiling import PROFILE_ARTIFACTS, list_profiles, profile_path
+from app.utils.export import iter_csv, iter_ndjson, iter_gzip
+from app.utils.stock_alerts import mark_stock_changed, recent_alerts
+from app.utils.order_status import apply_status_transition, publish_restock, UPDATED, NOT_FOUND, INVALID_TRANSITION
 from app.core.logging import get_logger
-import structlog.contextvars
 
 router = APIRouter()
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 logger = get_logger("admin")
 
-def get_current_admin(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    email = verify_token(token)
-    if not email:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials"
-        )
-    user = db.query(User).filter(User.email == email).first()
-    if not user or user.role != UserRole.ADMIN:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Admin access required"
+# Rows fetched per round trip by the server-side cursor behind exports
+EXPORT_YIELD_PER = 1000
+
+def admin_orders_query(
+    db: Session,
+    status_filter: Optional[OrderStatus] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    user_id: Optional[int] = None,
+    user_email: Optional[str] = None
+) -> Tuple[OrmQuery, bool]:
+    """Orders with their customer's email matching the dashboard filters, and whether any filter applies"""
+    query = db.query(
+        Order.id,
+        Order.order_number,
+        Order.status,
+        Order.total_amount,
+        Order.user_id,
+        User.email.label("user_email"),
+        Order.created_at
+    ).join(User, User.id == Order.user_id)
+    
+    filters = []
+    if status_filter:
+        filters.append(Order.status == status_filter)
+    if created_from:
+        filters.append(Order.created_at >= created_from)
+    if created_to:
+        filters.append(Order.created_at < created_to)
+    if user_id:
+        filters.append(Order.user_id == user_id)
+    if user_email:
+        filters.append(User.email == user_email)
+    if filters:
+        query = query.filter(*filters)
+    return query, bool(filters)
+
+def admin_orders_page(query: OrmQuery, cursor: Optional[int], limit: int) -> OrmQuery:
+    """The page of `query` after order `cursor`, newest first, with one extra row to detect a next page"""
+    if cursor is not None:
+        # Keyset pagination on (created_at, id); the cursor row's own timestamp is
+        # compared in SQL so the cursor stays a plain id on every backend. The
+        # plain upper bound lets the planner start the index range at the cursor
+        # instead of walking it from the newest order.
+        cursor_created_at = select(Order.created_at).where(Order.id == cursor).scalar_subquery()
+        query = query.filter(
+            Order.created_at <= cursor_created_at,
+            or_(
+                Order.created_at < cursor_created_at,
+                and_(Order.created_at == cursor_created_at, Order.id < cursor)
+            )
         )
-    structlog.contextvars.bind_contextvars(user_id=user.id)
-    return user
+    return query.order_by(Order.created_at.desc(), Order.id.desc()).limit(limit + 1)
 
-@router.get("/orders", response_model=List[dict])
-def get_all_orders(current_admin: User = Depends(get_current_admin), db: Session = Depends(get_db)):
-    """Get all orders for admin dashboard"""
-    orders = db.query(Order).order_by(Order.created_at.desc()).all()
-    return [
-        {
-            "id": order.id,
-            "order_number": order.order_number,
-            "status": order.status,
-            "total_amount": order.total_amount,
-            "user_email": order.user.email,
-            "created_at": order.created_at
-        }
-        for order in orders
-    ]
+@router.get("/orders", response_model=AdminOrderPage)
+def get_all_orders(
+    cursor: Optional[int] = Query(None, description="Order id the previous page ended at"),
+    limit: int = Query(50, ge=1, le=200),
+    status_filter: Optional[OrderStatus] = Query(None, alias="status"),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    user_id: Optional[int] = None,
+    user_email: Optional[str] = None,
+    current_admin: Principal = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Get a page of orders for the admin dashboard, newest first"""
+    query, filtered = admin_orders_query(db, status_filter, created_from, created_to, user_id, user_email)
+    
+    total_estimate = None
+    if cursor is None:
+        total_estimate = count_rows(db, query, "orders", filtered=filtered)
+    
+    rows = admin_orders_page(query, cursor, limit).all()
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    return {
+        "items": rows[:limit],
+        "next_cursor": next_cursor,
+        "total_estimate": total_estimate
+    }
+
+def _stream_rows(stmt) -> Iterator:
+    """Run `stmt` on its own session through a server-side cursor"""
+    db = SessionLocal()
+    try:
+        yield from db.execute(stmt.execution_options(yield_per=EXPORT_YIELD_PER))
+    finally:
+        db.close()
+
+@router.get("/orders/export")
+def export_orders(
+    dataset: str = Query("orders", pattern="^(orders|order_items)$"),
+    export_format: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    compress: bool = Query(False, alias="gzip"),
+    current_admin: Principal = Depends(get_current_admin)
+):
+    """Stream orders or order items placed in a date range as CSV or NDJSON"""
+    if dataset == "orders":
+        stmt = select(
+            Order.id,
+            Order.order_number,
+            Order.user_id,
+            User.email.label("user_email"),
+            Order.status,
+            Order.total_amount,
+            Order.shipping_address,
+            Order.shipping_city,
+            Order.shipping_state,
+            Order.shipping_zip,
+            Order.shipping_country,
+            Order.notes,
+            Order.created_at,
+            Order.updated_at
+        ).join(User, User.id == Order.user_id).order_by(Order.id)
+    else:
+        stmt = select(
+            OrderItem.id,
+            OrderItem.order_id,
+            Order.order_number,
+            OrderItem.product_id,
+            Product.name.label("product_name"),
+            OrderItem.quantity,
+            OrderItem.price_at_time,
+            Order.created_at.label("order_created_at")
+        ).join(Order, Order.id == OrderItem.order_id).outerjoin(
+            Product, Product.id == OrderItem.product_id
+        ).order_by(OrderItem.order_id, OrderItem.id)
+    if created_from:
+        stmt = stmt.where(Order.created_at >= created_from)
+    if created_to:
+        stmt = stmt.where(Order.created_at < created_to)
+    
+    columns = list(stmt.selected_columns.keys())
+    serialize = iter_csv if export_format == "csv" else iter_ndjson
+    body = serialize(columns, _stream_rows(stmt))
+    filename = f"{dataset}.{export_format}"
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    if compress:
+        body = iter_gzip(body)
+        filename += ".gz"
+        media_type = "application/gzip"
+    
+    logger.info("orders.export", dataset=dataset, format=export_format, gzip=compress)
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 @router.put("/orders/{order_id}/status")
 def update_order_status(
     order_id: int,
     status_update: OrderStatusUpdate,
-    current_admin: User = Depends(get_current_admin),
+    current_admin: Principal = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
     """Update order status"""
-    order = db.query(Order).filter(Order.id == order_id).first()
-    if not order:
+    outcomes, restocked = apply_status_transition(db, [order_id], status_update.status)
+    outcome, previous_status = outcomes[order_id]
+    if outcome == NOT_FOUND:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Order not found"
         )
-    
-    order.status = status_update.status
+    if outcome == INVALID_TRANSITION:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Cannot change order status from {previous_status.value} to {status_update.status.value}"
+        )
     db.commit()
-    db.refresh(order)
+    publish_restock(restocked)
     
     return {"message": "Order status updated successfully"}
 
+@router.post("/orders/status", response_model=BulkOrderStatusResponse)
+def bulk_update_order_status(
+    bulk_update: BulkOrderStatusUpdate,
+    current_admin: Principal = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Apply one status transition to many orders, reporting the outcome per order"""
+    order_ids = list(dict.fromkeys(bulk_update.order_ids))
+    outcomes, restocked = apply_status_transition(db, order_ids, bulk_update.status)
+    db.commit()
+    publish_restock(restocked)
+    
+    updated = sum(1 for outcome, _ in outcomes.values() if outcome == UPDATED)
+    logger.info(
+        "orders.bulk_status_updated",
+        status=bulk_update.status.value,
+        requested=len(order_ids),
+        updated=updated
+    )
+    return {
+        "status": bulk_update.status,
+        "updated": updated,
+        "results": [
+            {"order_id": order_id, "outcome": outcome, "previous_status": previous_status}
+            for order_id, (outcome, previous_status) in outcomes.items()
+        ]
+    }
+
 @router.post("/products", response_model=dict)
 def create_product(
     product_data: ProductCreate,
-    current_admin: User = Depends(get_current_admin),
+    current_admin: Principal = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
     """Create a new product"""
@@ -80,13 +247,14 @@ def create_product(
     db.add(product)
     db.commit()
     db.refresh(product)
+    invalidate_catalog("product.created")
     return {"message": "Product created successfully", "product_id": product.id}
 
 @router.put("/products/{product_id}")
 def update_product(
     product_id: int,
     product_data: ProductUpdate,
-    current_admin: User = Depends(get_current_admin),
+    current_admin: Principal = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
     """Update product information"""
@@ -97,9 +265,161 @@ def update_product(
             detail="Product not found"
         )
     
+    previous_stock = product.stock_quantity
     for field, value in product_data.dict(exclude_unset=True).items():
         setattr(product, field, value)
     
     db.commit()
+    if product.stock_quantity != previous_stock:
+        mark_stock_changed({product.id: previous_stock})
     db.refresh(product)
-    return {"message": "Product updated successfully"} 
\ No newline at end of file
+    invalidate_catalog("product.updated")
+    return {"message": "Product updated successfully"}
+
+def low_stock_query(db: Session, category_id: Optional[int] = None) -> OrmQuery:
+    """Active low and out-of-stock products with their category name, grouped by category"""
+    # The threshold is rendered into the SQL rather than bound, so even a generic
+    # plan for a prepared statement can match it to ix_products_low_stock's predicate
+    query = db.query(
+        Product.id,
+        Product.name,
+        Product.stock_quantity,
+        Product.category_id,
+        Category.name.label("category_name")
+    ).outerjoin(Category, Category.id == Product.category_id).filter(
+        Product.stock_quantity <= literal(LOW_STOCK_THRESHOLD, literal_execute=True),
+        Product.is_active == True
+    )
+    if category_id:
+        query = query.filter(Product.category_id == category_id)
+    return query.order_by(Product.category_id, Product.stock_quantity, Product.id)
+
+@router.get("/products/low-stock", response_model=List[LowStockCategory])
+def get_low_stock_products(
+    category_id: Optional[int] = None,
+    current_admin: Principal = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Get active low and out-of-stock products grouped by category"""
+    groups = {}
+    for row in low_stock_query(db, category_id):
+        group = groups.setdefault(row.category_id, {
+            "category_id": row.category_id,
+            "category_name": row.category_name,
+            "low_stock": 0,
+            "out_of_stock": 0,
+            "products": []
+        })
+        product = {"id": row.id, "name": row.name, "stock_quantity": row.stock_quantity}
+        product["stock_status"] = stock_status_for(row.stock_quantity)
+        group[product["stock_status"]] += 1
+        group["products"].append(product)
+    return list(groups.values())
+
+@router.get("/products/replenishment-alerts", response_model=List[ReplenishmentAlert])
+def get_replenishment_alerts(current_admin: Principal = Depends(get_current_admin)):
+    """Get the most recent replenishment alerts raised by the stock scanner"""
+    return list(recent_alerts)
+
+@router.post("/products/import", response_model=ProductImportReport)
+async def import_products(
+    request: Request,
+    import_format: Optional[str] = Query(None, alias="format", pattern="^(csv|ndjson)$"),
+    batch_size: int = Query(1000, ge=1, le=10000),
+    current_admin: Principal = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Bulk create/update products from a streamed CSV or NDJSON body.
+
+    The body is parsed incrementally and written in batches of `batch_size`
+    rows, each batch committed once. Catalog caches are invalidated a single
+    time after the whole upload.
+    """
+    if import_format is None:
+        content_type = request.headers.get("content-type", "")
+        import_format = "csv" if "csv" in content_type else "ndjson"
+    parse = iter_csv_records if import_format == "csv" else iter_ndjson_records
+    
+    report = ProductImportReport()
+    batch = []
+    async for row_number, raw, error in parse(request.stream()):
+        if error:
+            add_import_error(report, row_number, [error])
+            continue
+        batch.append((row_number, raw))
+        if len(batch) >= batch_size:
+            await run_in_threadpool(upsert_products, db, batch, report)
+            batch = []
+    if batch:
+        await run_in_threadpool(upsert_products, db, batch, report)
+    await run_in_threadpool(finalize_import, db)
+    
+    if report.created or report.updated or report.upserted:
+        invalidate_catalog("products.imported")
+    logger.info(
+        "products.imported",
+        format=import_format,
+        created=report.created,
+        updated=report.updated,
+        upserted=report.upserted,
+        failed=report.failed
+    )
+    return report
+
+@router.put("/users/{user_id}", response_model=UserResponse)
+def update_user(
+    user_id: int,
+    user_data: UserAdminUpdate,
+    current_admin: Principal = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Change a user's role or deactivate/reactivate them"""
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    # Cached principals are dropped by the User after_update hook in app.core.auth
+    for field, value in user_data.dict(exclude_unset=True).items():
+        setattr(user, field, value)
+    
+    db.commit()
+    db.refresh(user)
+    logger.info("user.updated_by_admin", target_user_id=user.id, role=user.role, is_active=user.is_active)
+    return user
+
+@router.get("/metrics", response_model=AdminMetrics)
+async def get_metrics(
+    reset: bool = Query(False, description="Zero the counters after reading them"),
+    current_admin: Principal = Depends(get_current_admin)
+):
+    """Connection pool usage and checkout waits for sizing the database pools"""
+    pools = []
+    for metrics in pool_metrics.values():
+        pools.append(metrics.snapshot())
+        if reset:
+            metrics.reset()
+    return AdminMetrics(pools=pools)
+
+@router.get("/profiles", response_model=List[ProfileSummary])
+def get_profiles(current_admin: Principal = Depends(get_current_admin)):
+    """Request profiles taken with the X-Profile header or ?profile=1, newest first"""
+    return list_profiles()
+
+@router.get("/profiles/{profile_id}/{artifact}")
+def download_profile(
+    profile_id: str,
+    artifact: str,
+    current_admin: Principal = Depends(get_current_admin)
+):
+    """Download a profile as `json` (request, SQL, top functions), `folded` (flame graph stacks) or `prof` (pstats)"""
+    path = profile_path(profile_id, artifact)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    return FileResponse(path, media_type=PROFILE_ARTIFACTS[artifact], filename=f"profile-{profile_id}.{artifact}")
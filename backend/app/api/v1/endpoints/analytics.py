@@ -0,0 +1,92 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import List, Optional, Tuple
+from datetime import date, timedelta
+from app.core.database import get_db
+from app.models.product import Product
+from app.models.category import Category
+from app.models.analytics import DailySales, DailyProductSales, DailyCategorySales, DailyOrderStatus
+from app.schemas.analytics import (
+    DailySalesResponse, ProductSalesResponse, CategorySalesResponse, OrderStatusCountResponse
+)
+from app.core.auth import Principal, get_current_admin
+from app.core.logging import get_logger
+
+# Every endpoint here reads the rollup tables, so cost scales with the number
+# of days in the range rather than the number of orders.
+router = APIRouter()
+logger = get_logger("analytics")
+
+DEFAULT_RANGE_DAYS = 30
+
+def _date_range(start: Optional[date], end: Optional[date]) -> Tuple[date, date]:
+    end = end or date.today()
+    start = start or end - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    return start, end
+
+@router.get("/sales", response_model=List[DailySalesResponse])
+def get_daily_sales(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    current_admin: Principal = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Get order count and revenue per day (inclusive range, cancelled orders excluded)"""
+    start, end = _date_range(start, end)
+    return db.query(DailySales).filter(
+        DailySales.day >= start, DailySales.day <= end
+    ).order_by(DailySales.day).all()
+
+@router.get("/products", response_model=List[ProductSalesResponse])
+def get_product_sales(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    limit: int = Query(20, ge=1, le=500),
+    current_admin: Principal = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Get the best-selling products by units over a date range"""
+    start, end = _date_range(start, end)
+    units = func.sum(DailyProductSales.units).label("units")
+    return db.query(
+        DailyProductSales.product_id,
+        Product.name.label("product_name"),
+        units,
+        func.sum(DailyProductSales.revenue).label("revenue")
+    ).outerjoin(Product, Product.id == DailyProductSales.product_id).filter(
+        DailyProductSales.day >= start, DailyProductSales.day <= end
+    ).group_by(DailyProductSales.product_id, Product.name).order_by(units.desc()).limit(limit).all()
+
+@router.get("/categories", response_model=List[CategorySalesResponse])
+def get_category_sales(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    current_admin: Principal = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Get units and revenue per category over a date range (category 0 is uncategorized)"""
+    start, end = _date_range(start, end)
+    units = func.sum(DailyCategorySales.units).label("units")
+    return db.query(
+        DailyCategorySales.category_id,
+        Category.name.label("category_name"),
+        units,
+        func.sum(DailyCategorySales.revenue).label("revenue")
+    ).outerjoin(Category, Category.id == DailyCategorySales.category_id).filter(
+        DailyCategorySales.day >= start, DailyCategorySales.day <= end
+    ).group_by(DailyCategorySales.category_id, Category.name).order_by(units.desc()).all()
+
+@router.get("/order-status", response_model=List[OrderStatusCountResponse])
+def get_order_status_counts(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    current_admin: Principal = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Get the current status of orders placed in a date range"""
+    start, end = _date_range(start, end)
+    order_count = func.sum(DailyOrderStatus.order_count).label("order_count")
+    return db.query(DailyOrderStatus.status, order_count).filter(
+        DailyOrderStatus.day >= start, DailyOrderStatus.day <= end
+    ).group_by(DailyOrderStatus.status).having(order_count > 0).all()
@@ -1,14 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from datetime import timedelta
-from typing import Any
+from typing import Any, Union
 import traceback
 import structlog.contextvars
 
 from app.core.database import get_db
-from app.core.security import create_access_token, get_password_hash, verify_password
+from app.core.security import create_access_token
+from app.core.password_pool import hash_password, verify_and_update_password, PasswordHasherBusy
 from app.core.config import settings
+from app.core.auth import access_token_claims
+from app.core.rate_limit import rate_limit, LOGIN_POLICY
 from app.models.user import User, UserRole
 from app.schemas.auth import UserCreate, UserLogin, Token, UserResponse
 from app.core.logging import get_logger
@@ -18,8 +22,34 @@ logger = get_logger("auth")
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Registration and login are async so bcrypt runs in the dedicated password
+# pool rather than holding a request threadpool slot; the short DB calls are
+# pushed to the threadpool explicitly.
+
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication is temporarily overloaded, please retry",
+        headers={"Retry-After": "1"},
+    )
+
+def _find_user(db: Session, email: str, username: Union[str, None] = None) -> Union[User, None]:
+    criteria = User.email == email
+    if username is not None:
+        criteria = criteria | (User.username == username)
+    user = db.query(User).filter(criteria).first()
+    # Return the connection to the pool before the caller waits on bcrypt; the
+    # detached user keeps its loaded attributes
+    db.close()
+    return user
+
+def _save(db: Session, user: User) -> None:
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+
 @router.post("/register", response_model=UserResponse)
-def register(user_data: UserCreate, db: Session = Depends(get_db)) -> Any:
+async def register(user_data: UserCreate, db: Session = Depends(get_db)) -> Any:
     """Register a new user"""
     logger.info(
         "user.register_attempt",
@@ -28,9 +58,7 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)) -> Any:
     )
     try:
         # Check if user already exists
-        existing_user = db.query(User).filter(
-            (User.email == user_data.email) | (User.username == user_data.username)
-        ).first()
+        existing_user = await run_in_threadpool(_find_user, db, user_data.email, user_data.username)
         if existing_user:
             logger.info(
                 "user.register_exists",
@@ -41,7 +69,10 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)) -> Any:
                 detail="User with this email or username already exists"
             )
         # Create new user
-        hashed_password = get_password_hash(user_data.password)
+        try:
+            hashed_password = await hash_password(user_data.password)
+        except PasswordHasherBusy:
+            raise _hasher_busy()
         db_user = User(
             email=user_data.email,
             username=user_data.username,
@@ -54,9 +85,7 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)) -> Any:
             "user.creating",
             email=db_user.email
         )
-        db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await run_in_threadpool(_save, db, db_user)
         logger.info(
             "user.created",
             user_id=db_user.id,
@@ -74,12 +103,19 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)) -> Any:
         )
         raise
 
-@router.post("/login", response_model=Token)
-def login(user_credentials: UserLogin, db: Session = Depends(get_db)) -> Any:
+@router.post("/login", response_model=Token, dependencies=[Depends(rate_limit(LOGIN_POLICY))])
+async def login(user_credentials: UserLogin, db: Session = Depends(get_db)) -> Any:
     """Login user and return access token"""
-    user = db.query(User).filter(User.email == user_credentials.email).first()
+    user = await run_in_threadpool(_find_user, db, user_credentials.email)
+    
+    valid, new_hash = False, None
+    if user:
+        try:
+            valid, new_hash = await verify_and_update_password(user_credentials.password, user.hashed_password)
+        except PasswordHasherBusy:
+            raise _hasher_busy()
     
-    if not user or not verify_password(user_credentials.password, user.hashed_password):
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -92,9 +128,15 @@ def login(user_credentials: UserLogin, db: Session = Depends(get_db)) -> Any:
             detail="Inactive user"
         )
     
+    if new_hash:
+        # Stored hash used an outdated cost; upgrade it now that we know the password
+        user.hashed_password = new_hash
+        await run_in_threadpool(_save, db, user)
+        logger.info("user.password_rehashed", user_id=user.id)
+    
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data=access_token_claims(user), expires_delta=access_token_expires
     )
     structlog.contextvars.bind_contextvars(user_id=user.id)
     return {
@@ -1,52 +1,35 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from typing import Any
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db
 from app.models.cart import Cart, CartItem
 from app.models.product import Product
-from app.models.user import User
 from app.schemas.cart import CartResponse, CartItemCreate, CartItemUpdate
-from app.core.security import verify_token
-from fastapi.security import OAuth2PasswordBearer
+from app.core.auth import Principal, get_current_user
 from app.core.logging import get_logger
-import structlog.contextvars
 
 router = APIRouter()
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 logger = get_logger("cart")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    email = verify_token(token)
-    if not email:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials"
-        )
-    user = db.query(User).filter(User.email == email).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-    structlog.contextvars.bind_contextvars(user_id=user.id)
-    return user
-
 @router.get("/", response_model=CartResponse)
-def get_cart(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_cart(current_user: Principal = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
     """Get user's cart"""
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
+    # Items are loaded up front since async sessions cannot lazy-load
+    query = select(Cart).options(selectinload(Cart.items)).where(Cart.user_id == current_user.id)
+    cart = (await db.execute(query)).scalars().first()
     if not cart:
         # Create cart if it doesn't exist
-        cart = Cart(user_id=current_user.id)
-        db.add(cart)
-        db.commit()
-        db.refresh(cart)
+        db.add(Cart(user_id=current_user.id, items=[]))
+        await db.commit()
+        cart = (await db.execute(query)).scalars().first()
     return cart
 
 @router.post("/items", response_model=CartResponse)
 def add_to_cart(
     item: CartItemCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Add item to cart"""
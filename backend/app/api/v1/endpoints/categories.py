@@ -1,24 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Request
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.core.database import get_db
+from app.core.read_routing import get_read_db
 from app.models.category import Category
 from app.schemas.category import CategoryResponse
 from app.core.logging import get_logger
+from app.utils.catalog_cache import cached_catalog_response
 
 router = APIRouter()
 logger = get_logger("categories")
 
+_category_list = TypeAdapter(List[CategoryResponse])
+
 @router.get("/", response_model=List[CategoryResponse])
-def get_categories(db: Session = Depends(get_db)):
+async def get_categories(request: Request, db: AsyncSession = Depends(get_read_db)):
     """Get all categories"""
-    categories = db.query(Category).all()
-    return categories
+    async def load_categories():
+        categories = (await db.execute(select(Category))).scalars().all()
+        categories = _category_list.validate_python(categories, from_attributes=True)
+        return lambda: _category_list.dump_json(categories)
+
+    return await cached_catalog_response(request, "categories", load_categories)
 
 @router.get("/{category_id}", response_model=CategoryResponse)
-def get_category(category_id: int, db: Session = Depends(get_db)):
+async def get_category(category_id: int, db: AsyncSession = Depends(get_read_db)):
     """Get a specific category by ID"""
-    category = db.query(Category).filter(Category.id == category_id).first()
+    category = await db.get(Category, category_id)
     if not category:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
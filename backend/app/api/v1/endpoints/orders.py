@@ -1,42 +1,36 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select, insert, update, delete, func, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from typing import List
 from app.core.database import get_db
+from app.core.read_routing import get_read_db
 from app.models.order import Order, OrderItem
 from app.models.cart import Cart, CartItem
-from app.models.user import User
-from app.schemas.order import OrderCreate, OrderResponse
-from app.core.security import verify_token
-from fastapi.security import OAuth2PasswordBearer
+from app.schemas.order import OrderCreate, OrderCheckout, OrderResponse
+from app.core.auth import Principal, get_current_user
 import uuid
 from app.models.product import Product
 from app.core.logging import get_logger
-import structlog.contextvars
+from app.utils.analytics import record_new_orders
+from app.utils.stock_alerts import mark_stock_changed
 
 router = APIRouter()
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 logger = get_logger("orders")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    email = verify_token(token)
-    if not email:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials"
-        )
-    user = db.query(User).filter(User.email == email).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-    structlog.contextvars.bind_contextvars(user_id=user.id)
-    return user
+def order_history_query(user_id: int):
+    """A user's orders, newest first, with their items"""
+    return (
+        select(Order)
+        .options(selectinload(Order.items))
+        .where(Order.user_id == user_id)
+        .order_by(Order.created_at.desc())
+    )
 
 @router.get("/", response_model=List[OrderResponse])
-def get_orders(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_orders(current_user: Principal = Depends(get_current_user), db: AsyncSession = Depends(get_read_db)):
     """Get user's order history"""
-    orders = db.query(Order).filter(Order.user_id == current_user.id).order_by(Order.created_at.desc()).all()
+    orders = (await db.execute(order_history_query(current_user.id))).scalars().all()
     # Ensure order_items is always present in the response
     return [
         {
@@ -49,7 +43,7 @@ def get_orders(current_user: User = Depends(get_current_user), db: Session = Dep
 @router.post("/", response_model=OrderResponse)
 def create_order(
     order_data: OrderCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Create a new order from API checkout"""
@@ -67,6 +61,7 @@ def create_order(
             )
         total_amount += product.price * item['quantity']
         order_items.append((product, item['quantity'], product.price))
+    previous_stock = {product.id: product.stock_quantity for product, _, _ in order_items}
     # Create order
     order_number = f"ORD-{uuid.uuid4().hex[:8].upper()}"
     order = Order(
@@ -94,6 +89,98 @@ def create_order(
         db.add(order_item)
         product.stock_quantity -= quantity
         db.add(product)
+    db.flush()
+    record_new_orders(db, [order.id])
+    db.commit()
+    mark_stock_changed(previous_stock)
+    db.refresh(order)
+    return order
+
+@router.post("/checkout", response_model=OrderResponse)
+def checkout(
+    checkout_data: OrderCheckout,
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Convert the user's server-side cart into an order in one transaction"""
+    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
+    if not cart:
+        raise HTTPException(status_code=400, detail="Cart is empty.")
+    # Collapse duplicate cart rows so every statement below sees one line per product
+    cart_lines = (
+        select(CartItem.product_id, func.sum(CartItem.quantity).label("quantity"))
+        .where(CartItem.cart_id == cart.id)
+        .group_by(CartItem.product_id)
+        .subquery()
+    )
+    # Lock the affected products and validate stock in a single round trip
+    lines = db.execute(
+        select(
+            cart_lines.c.product_id,
+            cart_lines.c.quantity,
+            Product.name,
+            Product.price,
+            Product.stock_quantity,
+            Product.is_active,
+        )
+        .join(Product, Product.id == cart_lines.c.product_id)
+        .with_for_update(of=Product)
+    ).all()
+    if not lines:
+        raise HTTPException(status_code=400, detail="Cart is empty.")
+    total_amount = 0
+    for line in lines:
+        if not line.is_active:
+            raise HTTPException(status_code=404, detail=f"Product {line.product_id} not found.")
+        if line.quantity > line.stock_quantity:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Only {line.stock_quantity} left in stock for {line.name}."
+            )
+        total_amount += line.price * line.quantity
+    order = Order(
+        user_id=current_user.id,
+        order_number=f"ORD-{uuid.uuid4().hex[:8].upper()}",
+        total_amount=total_amount,
+        shipping_address=checkout_data.shipping_address,
+        shipping_city=checkout_data.shipping_city,
+        shipping_state=checkout_data.shipping_state,
+        shipping_zip=checkout_data.shipping_zip,
+        shipping_country=checkout_data.shipping_country,
+        notes=checkout_data.notes
+    )
+    db.add(order)
+    db.flush()
+    # INSERT ... SELECT the order lines straight from the cart
+    db.execute(
+        insert(OrderItem).from_select(
+            ["order_id", "product_id", "quantity", "price_at_time"],
+            select(
+                literal(order.id),
+                cart_lines.c.product_id,
+                cart_lines.c.quantity,
+                Product.price,
+            ).join(Product, Product.id == cart_lines.c.product_id)
+        )
+    )
+    # UPDATE ... FROM to decrement stock for every line at once
+    db.execute(
+        update(Product)
+        .where(Product.id == cart_lines.c.product_id)
+        .values(stock_quantity=Product.stock_quantity - cart_lines.c.quantity)
+        .execution_options(synchronize_session=False)
+    )
+    record_new_orders(db, [order.id])
+    db.execute(
+        delete(CartItem)
+        .where(CartItem.cart_id == cart.id)
+        .execution_options(synchronize_session=False)
+    )
     db.commit()
+    mark_stock_changed({line.product_id: line.stock_quantity for line in lines})
     db.refresh(order)
-    return order 
\ No newline at end of file
+    logger.info("order.checkout", order_id=order.id, line_count=len(lines), total_amount=total_amount)
+    return {
+        **order.__dict__,
+        "order_items": [item for item in order.items]
+    }
@@ -1,32 +1,82 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional
-from app.core.database import get_db
+from app.core.read_routing import get_read_db
 from app.models.product import Product
 from app.schemas.product import ProductResponse, ProductCreate, ProductUpdate
-from app.utils.search import fuzzy_search, get_search_suggestions
+from app.utils.search import (
+    fuzzy_search, get_search_suggestions, fuzzy_search_segment, substring_search_segment, get_search_suggestions_segment
+)
 from app.core.logging import get_logger
+from app.core.rate_limit import rate_limit, SEARCH_POLICY, SUGGESTIONS_POLICY
+from app.core.metrics import search_candidates
+from app.utils.catalog_cache import cached_catalog_response
+from app.core.catalog_segment import current_segment
 
 router = APIRouter()
 logger = get_logger("products")
 
-@router.get("/", response_model=List[ProductResponse])
-def get_products(
+_product_list = TypeAdapter(List[ProductResponse])
+
+def product_list_query(category_id: Optional[int] = None):
+    """Active products with their category, optionally in one category"""
+    query = select(Product).options(joinedload(Product.category)).where(Product.is_active == True)
+    if category_id:
+        query = query.where(Product.category_id == category_id)
+    return query
+
+def product_page_query(category_id: Optional[int], skip: int, limit: int):
+    """One page of the catalog listing, in id order"""
+    return product_list_query(category_id).order_by(Product.id).offset(skip).limit(limit)
+
+@router.get(
+    "/",
+    response_model=List[ProductResponse],
+    dependencies=[Depends(rate_limit(SEARCH_POLICY, applies=lambda request: bool(request.query_params.get("search"))))]
+)
+async def get_products(
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     category_id: Optional[int] = None,
     search: Optional[str] = None,
     fuzzy_search_enabled: bool = Query(True, description="Enable fuzzy search for better typo tolerance"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get all products with optional filtering and fuzzy search"""
-    query = db.query(Product).options(joinedload(Product.category)).filter(Product.is_active == True)
+    query = product_list_query(category_id)
     
-    if category_id:
-        query = query.filter(Product.category_id == category_id)
+    # In pre-fork mode the catalog is read from the shared segment instead
+    segment = current_segment()
+    
+    if not search:
+        # Plain catalog pages are served from the precompressed response cache
+        async def load_page():
+            if segment is not None:
+                rows = segment.rows_for(category_id or None)[skip:skip + limit]
+                products = _product_list.validate_python([segment.product(row) for row in rows])
+            else:
+                page = (await db.execute(product_page_query(category_id, skip, limit))).scalars().all()
+                products = _product_list.validate_python(page, from_attributes=True)
+            return lambda: _product_list.dump_json(products)
+
+        return await cached_catalog_response(request, ("products", skip, limit, category_id), load_page)
+    
+    if segment is not None:
+        rows = segment.rows_for(category_id or None)
+        if fuzzy_search_enabled:
+            search_candidates["search"].observe(len(rows))
+            rows = await run_in_threadpool(fuzzy_search_segment, search, segment, rows, 50.0)
+        else:
+            rows = (await run_in_threadpool(substring_search_segment, search, segment, rows))[skip:skip + limit]
+        return [segment.product(row) for row in rows]
     
     # Get all products first for fuzzy search
-    all_products = query.all()
+    all_products = (await db.execute(query)).scalars().all()
     
     if search:
         if fuzzy_search_enabled:
@@ -52,8 +102,9 @@ def get_products(
                 }
                 products_dict.append(product_dict)
             
-            # Perform fuzzy search
-            fuzzy_results = fuzzy_search(search, products_dict, threshold=50.0)
+            search_candidates["search"].observe(len(products_dict))
+            # Perform fuzzy search (CPU-bound, so keep it off the event loop)
+            fuzzy_results = await run_in_threadpool(fuzzy_search, search, products_dict, 50.0)
             # Extract just the products from the results
             filtered_products = [result[0] for result in fuzzy_results]
             
@@ -62,21 +113,27 @@ def get_products(
             products = [p for p in all_products if p.id in product_ids]
         else:
             # Use traditional SQL LIKE search
-            query = query.filter(Product.name.ilike(f"%{search}%"))
-            products = query.offset(skip).limit(limit).all()
-    else:
-        products = all_products
-    
-    # Apply pagination
-    if not search or not fuzzy_search_enabled:
-        products = products[skip:skip + limit]
+            query = query.where(Product.name.ilike(f"%{search}%"))
+            products = (await db.execute(query.offset(skip).limit(limit))).scalars().all()
     
     return products
 
 @router.get("/{product_id}", response_model=ProductResponse)
-def get_product(product_id: int, db: Session = Depends(get_db)):
+async def get_product(product_id: int, db: AsyncSession = Depends(get_read_db)):
     """Get a specific product by ID"""
-    product = db.query(Product).options(joinedload(Product.category)).filter(Product.id == product_id).first()
+    segment = current_segment()
+    if segment is not None:
+        row = segment.find(product_id)
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Product not found"
+            )
+        return segment.product(row)
+    
+    product = (await db.execute(
+        select(Product).options(joinedload(Product.category)).where(Product.id == product_id)
+    )).scalars().first()
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -84,18 +141,27 @@ def get_product(product_id: int, db: Session = Depends(get_db)):
         )
     return product
 
-@router.get("/search/suggestions")
-def get_search_suggestions_endpoint(
+@router.get("/search/suggestions", dependencies=[Depends(rate_limit(SUGGESTIONS_POLICY))])
+async def get_search_suggestions_endpoint(
     query: str = Query(..., min_length=1, description="Partial search query"),
     max_suggestions: int = Query(5, ge=1, le=10, description="Maximum number of suggestions"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get search suggestions based on partial matches"""
     if len(query) < 2:
         return {"suggestions": []}
     
+    segment = current_segment()
+    if segment is not None:
+        rows = segment.rows_for()
+        search_candidates["suggestions"].observe(len(rows))
+        suggestions = await run_in_threadpool(get_search_suggestions_segment, query, segment, rows, max_suggestions)
+        return {"suggestions": suggestions}
+    
     # Get all products
-    products = db.query(Product).options(joinedload(Product.category)).filter(Product.is_active == True).all()
+    products = (await db.execute(
+        select(Product).options(joinedload(Product.category)).where(Product.is_active == True)
+    )).scalars().all()
     
     # Convert to dictionaries for search utility
     products_dict = []
@@ -119,5 +185,6 @@ def get_search_suggestions_endpoint(
         }
         products_dict.append(product_dict)
     
-    suggestions = get_search_suggestions(query, products_dict, max_suggestions)
+    search_candidates["suggestions"].observe(len(products_dict))
+    suggestions = await run_in_threadpool(get_search_suggestions, query, products_dict, max_suggestions)
     return {"suggestions": suggestions} 
\ No newline at end of file
@@ -0,0 +1,119 @@
+from dataclasses import dataclass
+from fastapi import Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+import structlog.contextvars
+
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.core.read_routing import current_user_id
+from app.core.security import decode_access_token
+from app.models.user import User, UserRole
+from app.utils.cache import TTLCache
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated caller, detached from any database session"""
+    id: int
+    email: str
+    role: UserRole
+    is_active: bool
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role == UserRole.ADMIN
+
+# Principals keyed on token subject (email). Entries are dropped once a change
+# to the user's role or active flag commits in this process and expire after
+# the TTL, which bounds how long other workers can serve a stale principal.
+principal_cache = TTLCache(settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_CACHE_TTL_SECONDS, name="principal")
+
+def access_token_claims(user: User) -> dict:
+    """Claims to sign into a user's access token"""
+    return {"sub": user.email, "uid": user.id, "role": user.role.value}
+
+def invalidate_principal(email: str) -> None:
+    principal_cache.pop(email)
+
+# Emails whose principals to drop when the session's transaction commits
+_PENDING_EVICTIONS = "principal_evictions"
+
+@event.listens_for(User, "after_update")
+def _invalidate_on_user_change(mapper, connection, target: User) -> None:
+    # Runs during flush, before commit; evicting now would let a concurrent
+    # request re-cache the old row, so only note the emails here
+    state = inspect(target)
+    for attr in ("role", "is_active", "email"):
+        history = state.attrs[attr].history
+        if history.has_changes():
+            pending = object_session(target).info.setdefault(_PENDING_EVICTIONS, set())
+            pending.add(target.email)
+            pending.update(state.attrs["email"].history.deleted or ())
+            return
+
+@event.listens_for(Session, "after_commit")
+def _evict_committed_principals(session: Session) -> None:
+    for email in session.info.pop(_PENDING_EVICTIONS, ()):
+        invalidate_principal(email)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_evictions(session: Session) -> None:
+    session.info.pop(_PENDING_EVICTIONS, None)
+
+async def _load_principal(db: AsyncSession, email: str) -> Principal:
+    principal = principal_cache.get(email)
+    if principal is not None:
+        return principal
+    user = (await db.execute(select(User).where(User.email == email))).scalars().first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+    principal = Principal(id=user.id, email=user.email, role=user.role, is_active=bool(user.is_active))
+    principal_cache.set(email, principal)
+    return principal
+
+# Async so that resolving the caller never takes a threadpool slot; the session
+# only connects on a cache miss
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> Principal:
+    claims = decode_access_token(token)
+    if not claims:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials"
+        )
+    principal = await _load_principal(db, str(claims["sub"]))
+    # Tokens issued to a since-recreated account with the same email are rejected
+    if claims.get("uid") is not None and claims["uid"] != principal.id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials"
+        )
+    # Tokens signed with a role the user no longer has are rejected, so a
+    # promotion or demotion takes effect on every token issued before it
+    if claims.get("role") is not None and claims["role"] != principal.role.value:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token role is out of date, log in again"
+        )
+    if not principal.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Inactive user"
+        )
+    structlog.contextvars.bind_contextvars(user_id=principal.id)
+    current_user_id.set(principal.id)
+    return principal
+
+async def get_current_admin(current_user: Principal = Depends(get_current_user)) -> Principal:
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return current_user
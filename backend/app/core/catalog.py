@@ -0,0 +1,31 @@
+from typing import Callable, List
+from app.core.logging import get_logger
+
+logger = get_logger("catalog")
+
+# Monotonic version of the product catalog in this process. Anything derived
+# from products/categories (response caches, search indexes) should key on it
+# or register a listener so it is rebuilt after admin writes.
+_version = 0
+_listeners: List[Callable[[int], None]] = []
+
+def catalog_version() -> int:
+    """Return the current catalog version"""
+    return _version
+
+def on_catalog_change(listener: Callable[[int], None]) -> Callable[[int], None]:
+    """Register a callback invoked with the new version after every catalog change"""
+    _listeners.append(listener)
+    return listener
+
+def invalidate_catalog(reason: str) -> int:
+    """Bump the catalog version and notify listeners"""
+    global _version
+    _version += 1
+    for listener in _listeners:
+        try:
+            listener(_version)
+        except Exception as e:
+            logger.error("catalog.listener_error", reason=reason, error=str(e), error_type=type(e).__name__)
+    logger.info("catalog.invalidated", reason=reason, version=_version)
+    return _version
@@ -0,0 +1,392 @@
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional
+
+from app.core.catalog import invalidate_catalog, on_catalog_change
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.utils.search import normalize_text
+
+logger = get_logger("catalog_segment")
+
+# Segment file layout: MAGIC, the JSON header length as a little-endian int64,
+# the JSON header, then 8-byte aligned columns and the string arena. Columns
+# are native-endian arrays since the parent and its workers share a machine.
+MAGIC = b"SGCAT001"
+POINTER = "current"
+REBUILD_STAMP = "rebuild-requested"
+
+# String columns store (start, length) pairs into the arena; length -1 is None
+STRING_COLUMNS = (
+    "name", "description", "image_url", "created_at", "updated_at", "category_name", "category_description",
+    # Normalized search text, as app.utils.search.normalize_text returns it
+    "name_search", "description_search", "category_search",
+)
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+class CatalogSegment:
+    """
+    Read-only view of a published catalog segment.
+
+    The file is memory-mapped and columns are memoryviews into the mapping, so
+    attaching copies nothing and every worker shares the same pages. Rows are
+    products in id order; strings are decoded only when a row is read.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        if bytes(view[:8]) != MAGIC:
+            raise ValueError(f"{path} is not a catalog segment")
+        (header_length,) = struct.unpack_from("<q", view, 8)
+        header = json.loads(bytes(view[16:16 + header_length]))
+        self.path = path
+        self.generation: int = header["generation"]
+        self.rows: int = header["rows"]
+        self.built_at: str = header["built_at"]
+        self._columns = {
+            name: view[offset:offset + nbytes].cast(typecode)
+            for name, (offset, typecode, nbytes) in header["columns"].items()
+        }
+        arena_offset, arena_length = header["arena"]
+        self._arena = view[arena_offset:arena_offset + arena_length]
+        self._categories = {int(category_id): span for category_id, span in header["categories"].items()}
+
+        self.ids = self._columns["id"]
+        self.category_ids = self._columns["category_id"]
+        self.active_rows = self._columns["active_rows"]
+
+    def string(self, column: str, row: int) -> Optional[str]:
+        pairs = self._columns[column]
+        start, length = pairs[2 * row], pairs[2 * row + 1]
+        if length < 0:
+            return None
+        return str(self._arena[start:start + length], "utf-8")
+
+    def find(self, product_id: int) -> Optional[int]:
+        """Row of the product with `product_id`, active or not"""
+        row = bisect.bisect_left(self.ids, product_id)
+        if row < self.rows and self.ids[row] == product_id:
+            return row
+        return None
+
+    def rows_for(self, category_id: Optional[int] = None):
+        """Rows of active products in id order, optionally for one category"""
+        if category_id is None:
+            return self.active_rows
+        start, end = self._categories.get(category_id, (0, 0))
+        return self._columns["category_rows"][start:end]
+
+    def product(self, row: int) -> dict:
+        """The row as a dict shaped like ProductResponse"""
+        category_id = self.category_ids[row]
+        category_name = self.string("category_name", row)
+        return {
+            "id": self.ids[row],
+            "name": self.string("name", row),
+            "description": self.string("description", row),
+            "price": self._columns["price"][row],
+            "stock_quantity": self._columns["stock_quantity"][row],
+            "image_url": self.string("image_url", row),
+            "category_id": category_id if category_id >= 0 else None,
+            "is_active": bool(self._columns["is_active"][row]),
+            "created_at": self.string("created_at", row),
+            "updated_at": self.string("updated_at", row),
+            "category": {
+                "id": category_id,
+                "name": category_name,
+                "description": self.string("category_description", row),
+            } if category_name is not None else None,
+        }
+
+class _SegmentBuilder:
+    """Accumulates columns and a de-duplicated string arena for one segment"""
+
+    def __init__(self):
+        self.numbers = {
+            "id": array("q"), "category_id": array("q"), "stock_quantity": array("q"),
+            "price": array("d"), "is_active": array("B"),
+        }
+        self.strings = {name: array("q") for name in STRING_COLUMNS}
+        self.arena = bytearray()
+        self._interned: Dict[str, tuple] = {}
+        self.active: List[int] = []
+        self.active_by_category: Dict[int, List[int]] = {}
+
+    def _add_string(self, column: str, value: Optional[str]) -> None:
+        if value is None:
+            self.strings[column].extend((0, -1))
+            return
+        slot = self._interned.get(value)
+        if slot is None:
+            encoded = value.encode("utf-8")
+            slot = self._interned[value] = (len(self.arena), len(encoded))
+            self.arena += encoded
+        self.strings[column].extend(slot)
+
+    def add(self, product: dict) -> None:
+        row = len(self.numbers["id"])
+        category = product["category"]
+        category_id = product["category_id"]
+        self.numbers["id"].append(product["id"])
+        self.numbers["category_id"].append(category_id if category_id is not None else -1)
+        self.numbers["stock_quantity"].append(product["stock_quantity"])
+        self.numbers["price"].append(product["price"])
+        self.numbers["is_active"].append(1 if product["is_active"] else 0)
+        for column in ("name", "description", "image_url", "created_at", "updated_at"):
+            self._add_string(column, product[column])
+        self._add_string("category_name", category["name"] if category else None)
+        self._add_string("category_description", category["description"] if category else None)
+        self._add_string("name_search", normalize_text(product["name"]))
+        self._add_string("description_search", normalize_text(product["description"]))
+        self._add_string("category_search", normalize_text(category["name"]) if category else "")
+        if product["is_active"]:
+            self.active.append(row)
+            if category_id is not None:
+                self.active_by_category.setdefault(category_id, []).append(row)
+
+    def payload(self) -> tuple:
+        """(columns, categories): every column array plus the row span of each category in category_rows"""
+        category_rows = array("q")
+        categories = {}
+        for category_id in sorted(self.active_by_category):
+            rows = self.active_by_category[category_id]
+            categories[category_id] = (len(category_rows), len(category_rows) + len(rows))
+            category_rows.extend(rows)
+        columns = {name: column for name, column in self.numbers.items()}
+        columns.update(self.strings)
+        columns["active_rows"] = array("q", self.active)
+        columns["category_rows"] = category_rows
+        return columns, categories
+
+def build_segment_file(path: str, generation: int, products) -> str:
+    """
+    Write a segment for `products` (dicts shaped like ProductResponse, in id
+    order) to `path`; returns a digest of its contents for change detection.
+    """
+    builder = _SegmentBuilder()
+    for product in products:
+        builder.add(product)
+    columns, categories = builder.payload()
+
+    digest = hashlib.blake2b(digest_size=16)
+    layout = {}
+    offset = 0
+    for name, column in columns.items():
+        layout[name] = (offset, column.typecode, len(column) * column.itemsize)
+        offset = _align(offset + len(column) * column.itemsize)
+    arena_at = offset
+    header = {
+        "generation": generation,
+        "rows": len(builder.numbers["id"]),
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "arena": None,
+        "categories": {str(category_id): span for category_id, span in categories.items()},
+        "columns": None,
+    }
+    # The header's own length decides where the data starts, so size it first
+    # with placeholder offsets of the final width
+    data_start = _align(16 + len(json.dumps({
+        **header, "arena": [10 ** 15, 10 ** 15],
+        "columns": {name: [10 ** 15, typecode, 10 ** 15] for name, (_, typecode, _) in layout.items()},
+    }).encode()))
+    header["columns"] = {name: [data_start + at, typecode, nbytes] for name, (at, typecode, nbytes) in layout.items()}
+    header["arena"] = [data_start + arena_at, len(builder.arena)]
+    encoded_header = json.dumps(header).encode()
+
+    with open(path, "wb") as file:
+        file.write(MAGIC + struct.pack("<q", len(encoded_header)) + encoded_header)
+        file.write(b"\0" * (data_start - file.tell()))
+        for name, column in columns.items():
+            data = column.tobytes()
+            digest.update(name.encode() + data)
+            file.write(data)
+            file.write(b"\0" * (_align(file.tell()) - file.tell()))
+        digest.update(builder.arena)
+        file.write(builder.arena)
+    return digest.hexdigest()
+
+def load_catalog_rows(db, batch_size: int = 1000):
+    """Every product as a ProductResponse-shaped dict, in id order, streamed in batches"""
+    from sqlalchemy.orm import joinedload
+    from app.models.product import Product
+    from app.schemas.product import ProductResponse
+
+    query = db.query(Product).options(joinedload(Product.category)).order_by(Product.id)
+    for product in query.yield_per(batch_size):
+        # Serialized exactly as the API renders it, datetimes included
+        yield ProductResponse.model_validate(product).model_dump(mode="json")
+
+class SegmentPublisher:
+    """
+    Builds catalog segments in the parent process and publishes them.
+
+    A new generation is written to its own file and made current by atomically
+    replacing the `current` symlink, so a worker sees either the old or the new
+    segment, never a partial one. The previous generation is kept until the
+    next publish for workers still attaching to it.
+    """
+
+    def __init__(self, directory: str, session_factory=None):
+        self.directory = directory
+        self.session_factory = session_factory
+        self.generation = 0
+        self._digest = None
+        self._previous = None
+        self._stop = threading.Event()
+        self._thread = None
+        os.makedirs(directory, exist_ok=True)
+        current = _read_pointer(directory)
+        if current is not None:
+            # Continue after a previous parent's generations
+            self.generation = int(current.split(".")[1])
+
+    def publish(self, reason: str) -> bool:
+        """Rebuild the segment from the database; returns False when nothing changed"""
+        if self.session_factory is None:
+            from app.core.database import SessionLocal
+            self.session_factory = SessionLocal
+        started = time.perf_counter()
+        generation = self.generation + 1
+        name = f"catalog.{generation:08d}.seg"
+        path = os.path.join(self.directory, name)
+        db = self.session_factory()
+        try:
+            digest = build_segment_file(path + ".tmp", generation, load_catalog_rows(db))
+        finally:
+            db.close()
+        if digest == self._digest:
+            os.remove(path + ".tmp")
+            return False
+        os.replace(path + ".tmp", path)
+        link = os.path.join(self.directory, POINTER + ".tmp")
+        if os.path.lexists(link):
+            os.remove(link)
+        os.symlink(name, link)
+        os.replace(link, os.path.join(self.directory, POINTER))
+
+        self._remove_old_segments(keep={name, self._previous})
+        self._previous = name
+        self.generation = generation
+        self._digest = digest
+        logger.info(
+            "catalog_segment.published",
+            generation=generation,
+            reason=reason,
+            bytes=os.path.getsize(path),
+            build_ms=round((time.perf_counter() - started) * 1000, 1),
+        )
+        return True
+
+    def _remove_old_segments(self, keep) -> None:
+        for entry in os.listdir(self.directory):
+            if entry.startswith("catalog.") and entry not in keep:
+                try:
+                    os.remove(os.path.join(self.directory, entry))
+                except FileNotFoundError:
+                    pass
+
+    def run(self) -> None:
+        """Republish on rebuild requests from workers and every CATALOG_SEGMENT_REFRESH_SECONDS"""
+        stamp = os.path.join(self.directory, REBUILD_STAMP)
+        seen = _mtime(stamp)
+        next_refresh = time.monotonic() + settings.CATALOG_SEGMENT_REFRESH_SECONDS
+        while not self._stop.wait(settings.CATALOG_SEGMENT_POLL_SECONDS):
+            requested = _mtime(stamp)
+            reason = None
+            if requested != seen:
+                seen, reason = requested, "rebuild_requested"
+            elif settings.CATALOG_SEGMENT_REFRESH_SECONDS > 0 and time.monotonic() >= next_refresh:
+                reason = "refresh"
+            if reason is None:
+                continue
+            next_refresh = time.monotonic() + settings.CATALOG_SEGMENT_REFRESH_SECONDS
+            try:
+                self.publish(reason)
+            except Exception as e:
+                logger.error("catalog_segment.publish_failed", reason=reason, error=str(e), error_type=type(e).__name__)
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self.run, name="catalog-segment-publisher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+def _read_pointer(directory: str) -> Optional[str]:
+    try:
+        return os.readlink(os.path.join(directory, POINTER))
+    except OSError:
+        return None
+
+def _mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def request_rebuild(directory: str) -> None:
+    """Ask the parent to publish a new generation, e.g. after an admin catalog write"""
+    path = os.path.join(directory, REBUILD_STAMP)
+    with open(path, "a"):
+        pass
+    os.utime(path)
+
+class SegmentReader:
+    """Worker side: attaches to the current segment and follows new generations"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._segment: Optional[CatalogSegment] = None
+        self._name = None
+        self._next_check = 0.0
+        self._attaching = False
+
+    def current(self) -> Optional[CatalogSegment]:
+        now = time.monotonic()
+        if now < self._next_check:
+            return self._segment
+        self._next_check = now + settings.CATALOG_SEGMENT_POLL_SECONDS
+        name = _read_pointer(self.directory)
+        if name is None or name == self._name:
+            return self._segment
+        try:
+            segment = CatalogSegment(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            # Replaced between reading the pointer and opening it; retry on the next call
+            self._next_check = 0.0
+            return self._segment
+        self._segment, self._name = segment, name
+        # Drop per-process caches built from the previous generation
+        self._attaching = True
+        try:
+            invalidate_catalog("catalog_segment.attached")
+        finally:
+            self._attaching = False
+        return segment
+
+_reader = SegmentReader(settings.CATALOG_SEGMENT_DIR) if settings.CATALOG_SEGMENT_DIR else None
+
+def current_segment() -> Optional[CatalogSegment]:
+    """The attached catalog segment, or None outside pre-fork mode or before the first publish"""
+    if _reader is None:
+        return None
+    return _reader.current()
+
+@on_catalog_change
+def _request_rebuild_after_write(version: int) -> None:
+    # Catalog writes in a worker reach other workers through the parent's next generation
+    if _reader is not None and not _reader._attaching:
+        request_rebuild(_reader.directory)
@@ -0,0 +1,192 @@
+import gzip
+import zlib
+from typing import Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Preferred first when the client accepts several
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+COMPRESSIBLE_TYPES = frozenset({
+    "application/json", "application/javascript", "application/xml", "application/x-ndjson", "image/svg+xml",
+})
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the best encoding the client accepts, or None for identity"""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in ENCODINGS:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+def is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return (
+        media_type.startswith("text/") or media_type in COMPRESSIBLE_TYPES
+        or media_type.endswith("+json") or media_type.endswith("+xml")
+    )
+
+def compress_body(body: bytes, encoding: str, best: bool = False) -> bytes:
+    """Compress a complete body. `best` trades CPU for size, for bodies compressed once and reused."""
+    if encoding == "br":
+        return brotli.compress(body, quality=11 if best else settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=9 if best else settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+class _StreamCompressor:
+    """Incremental compressor flushing after every chunk so streamed rows reach the client promptly"""
+
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+            self._zlib = None
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.process(chunk) + self._brotli.flush()
+        return self._zlib.compress(chunk) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, chunk: bytes) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.process(chunk) + self._brotli.finish()
+        return self._zlib.compress(chunk) + self._zlib.flush()
+
+async def _off_loop_if_large(size: int, func, *args):
+    # Compressing a few KB is cheaper than the threadpool handoff
+    if size >= settings.COMPRESSION_THREADPOOL_BYTES:
+        return await run_in_threadpool(func, *args)
+    return func(*args)
+
+class CompressionMiddleware:
+    """
+    Pure ASGI middleware compressing responses with the best encoding the
+    client accepts (brotli when installed, then gzip).
+
+    Bodies under `COMPRESSION_MIN_BYTES`, non-text content types and responses
+    that already carry a Content-Encoding (such as precompressed catalog
+    responses) are sent as they are. Streaming responses are compressed chunk
+    by chunk. Bodies or chunks of `COMPRESSION_THREADPOOL_BYTES` or more are
+    compressed in the threadpool so the event loop keeps serving requests.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                encoding = negotiate_encoding(value.decode("latin-1"))
+                break
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, compressor, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is not None:
+                if more_body:
+                    data = await _off_loop_if_large(len(body), compressor.compress, body)
+                else:
+                    data = await _off_loop_if_large(len(body), compressor.finish, body)
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            headers = start_message.get("headers", [])
+            content_type = ""
+            for name, value in headers:
+                if name == b"content-encoding" or (name == b"content-type" and not is_compressible(value.decode("latin-1"))):
+                    passthrough = True
+                    break
+                if name == b"content-type":
+                    content_type = value.decode("latin-1")
+            if passthrough or not content_type or (not more_body and len(body) < settings.COMPRESSION_MIN_BYTES):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            headers = [(name, value) for name, value in headers if name != b"content-length"]
+            headers.append((b"content-encoding", encoding.encode("latin-1")))
+            headers.append((b"vary", b"Accept-Encoding"))
+            if more_body:
+                compressor = _StreamCompressor(encoding)
+                await send({**start_message, "headers": headers})
+                data = await _off_loop_if_large(len(body), compressor.compress, body)
+                await send({"type": "http.response.body", "body": data, "more_body": True})
+                return
+
+            data = await _off_loop_if_large(len(body), compress_body, body, encoding)
+            headers.append((b"content-length", str(len(data)).encode("latin-1")))
+            await send({**start_message, "headers": headers})
+            await send({"type": "http.response.body", "body": data})
+
+        await self.app(scope, receive, send_compressed)
+
+class PrecompressedBody:
+    """
+    A response body stored alongside its compressed variants, so a cache hit
+    only picks the variant matching the request's Accept-Encoding.
+    """
+
+    __slots__ = ("variants",)
+
+    def __init__(self, variants: Dict[Optional[str], bytes]):
+        self.variants = variants
+
+    @classmethod
+    def build(cls, body: bytes) -> "PrecompressedBody":
+        """Compress `body` with every supported encoding; blocking, so call it from a thread"""
+        variants = {None: body}
+        if len(body) >= settings.COMPRESSION_MIN_BYTES:
+            for encoding in ENCODINGS:
+                variants[encoding] = compress_body(body, encoding, best=True)
+        return cls(variants)
+
+    def select(self, accept_encoding: str) -> tuple:
+        """Return (encoding, body) for the request's Accept-Encoding"""
+        encoding = negotiate_encoding(accept_encoding)
+        if encoding not in self.variants:
+            encoding = None
+        return encoding, self.variants[encoding]
@@ -1,18 +1,86 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import settings
+from app.core.pool_metrics import PoolMetrics, instrument_engine, timed_pool_class
+
+def _pool_options(url: str, pool_class, metrics: PoolMetrics, pool_size: int, max_overflow: int) -> dict:
+    """Engine keyword arguments for the pool behind `url`"""
+    options = {
+        "pool_pre_ping": settings.DATABASE_POOL_PRE_PING,
+        "pool_recycle": settings.DATABASE_POOL_RECYCLE,
+    }
+    # SQLite keeps the pool its dialect picks (which may not support sizing),
+    # so only server databases get the sized, timed queue pool
+    if make_url(url).get_backend_name() != "sqlite":
+        options.update(
+            poolclass=timed_pool_class(pool_class, metrics),
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+        )
+    return options
 
 # Create SQLAlchemy engine
+_primary_metrics = PoolMetrics("primary")
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=300,
+    **_pool_options(
+        settings.DATABASE_URL, QueuePool, _primary_metrics,
+        settings.DATABASE_POOL_SIZE, settings.DATABASE_MAX_OVERFLOW,
+    ),
 )
+instrument_engine(engine, _primary_metrics)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async drivers for the same database, used by the async read endpoints
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def async_database_url(url: str) -> str:
+    """Swap the sync driver in `url` for its asyncio counterpart"""
+    parsed = make_url(url)
+    return parsed.set(drivername=ASYNC_DRIVERS.get(parsed.get_backend_name(), parsed.drivername)).render_as_string(
+        hide_password=False
+    )
+
+_async_url = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+_async_metrics = PoolMetrics("async")
+async_engine = create_async_engine(
+    _async_url,
+    **_pool_options(
+        _async_url, AsyncAdaptedQueuePool, _async_metrics,
+        settings.ASYNC_DATABASE_POOL_SIZE, settings.ASYNC_DATABASE_MAX_OVERFLOW,
+    ),
+)
+instrument_engine(async_engine, _async_metrics)
+
+# Objects stay readable after commit since async sessions cannot lazy-load
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+# Optional read replica, only used through app.core.read_routing.get_read_db
+read_engine = None
+AsyncReadSessionLocal = None
+if settings.DATABASE_READ_URL:
+    _read_url = async_database_url(settings.DATABASE_READ_URL)
+    _read_metrics = PoolMetrics("async_read")
+    read_engine = create_async_engine(
+        _read_url,
+        **_pool_options(
+            _read_url, AsyncAdaptedQueuePool, _read_metrics,
+            settings.ASYNC_DATABASE_POOL_SIZE, settings.ASYNC_DATABASE_MAX_OVERFLOW,
+        ),
+    )
+    instrument_engine(read_engine, _read_metrics)
+    AsyncReadSessionLocal = async_sessionmaker(bind=read_engine, autoflush=False, expire_on_commit=False)
+
 # Create Base class
 Base = declarative_base()
 
@@ -22,4 +90,20 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+# Dependency to get an async database session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def dialect_insert(db):
+    """Return the dialect-specific insert() that supports ON CONFLICT upserts"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"ON CONFLICT upserts are not supported on {dialect}")
+    return insert
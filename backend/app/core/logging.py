@@ -1,29 +1,99 @@
+import atexit
+import os
+import queue
 import structlog
 import logging
 import sys
-import uuid
-
-# Processor to add a request_id to every log if present in context
-class RequestIdProcessor:
-    def __call__(self, logger, method_name, event_dict):
-        request_id = event_dict.get('request_id')
-        if not request_id:
-            # Try to get from structlog contextvars (if set by middleware)
+import threading
+
+from app.core.config import settings
+from app.core.metrics import LOG_RECORDS_DROPPED
+
+class BatchingQueueHandler(logging.Handler):
+    """
+    Hand log records to a background writer thread.
+
+    `emit` only enqueues, so logging from the event loop never renders JSON or
+    blocks on stdout. The writer drains up to `batch_size` records at a time,
+    renders them with the handler's formatter and writes each batch with a
+    single write. When the bounded queue is full the record is dropped and
+    counted in `dropped` (and `log_records_dropped_total`).
+    """
+
+    def __init__(self, stream, max_queue: int, batch_size: int):
+        super().__init__()
+        self.stream = stream
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._max_queue = max_queue
+        self._start_writer()
+
+    def _start_writer(self) -> None:
+        # Also called in forked children, where the parent's queue and writer
+        # thread are unusable
+        self._queue: "queue.Queue" = queue.Queue(self._max_queue)
+        self._writer = threading.Thread(target=self._drain, name="log-writer", daemon=True)
+        self._writer.start()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            LOG_RECORDS_DROPPED.inc()
+
+    def _drain(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            self._write([record for record in batch if record is not None])
+            if stop:
+                return
+
+    def _write(self, records) -> None:
+        lines = []
+        for record in records:
+            try:
+                lines.append(self.format(record))
+            except Exception:
+                self.handleError(record)
+        if lines:
             try:
-                import structlog.contextvars
-                request_id = structlog.contextvars.get_contextvars().get('request_id')
+                self.stream.write("\n".join(lines) + "\n")
+                self.stream.flush()
             except Exception:
-                request_id = None
-        if request_id:
-            event_dict['request_id'] = request_id
-        return event_dict
+                self.handleError(records[-1])
+
+    def close(self) -> None:
+        """Write everything queued so far, then stop the writer"""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(timeout=5)
+        super().close()
 
-# Central structlog configuration
+# Applied to records from the standard library and third-party loggers before
+# rendering, so they come out as JSON like structlog events
+_foreign_pre_chain = [
+    structlog.stdlib.add_log_level,
+    structlog.processors.TimeStamper(fmt="iso"),
+    structlog.processors.format_exc_info,
+]
+
+# Central structlog configuration. Context (request_id, user_id) and the
+# timestamp are captured when the event is logged; JSON rendering happens in
+# the writer thread through ProcessorFormatter.
 structlog.configure(
     processors=[
+        structlog.contextvars.merge_contextvars,
         structlog.processors.TimeStamper(fmt="iso"),
-        RequestIdProcessor(),
-        structlog.processors.JSONRenderer(),
+        # The exception is only current in the logging thread
+        structlog.processors.format_exc_info,
+        structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
     ],
     wrapper_class=structlog.make_filtering_bound_logger(logging.INFO),
     context_class=dict,
@@ -31,14 +101,23 @@ structlog.configure(
     cache_logger_on_first_use=True,
 )
 
+log_handler = BatchingQueueHandler(sys.stdout, settings.LOG_QUEUE_SIZE, settings.LOG_BATCH_SIZE)
+log_handler.setFormatter(structlog.stdlib.ProcessorFormatter(
+    processor=structlog.processors.JSONRenderer(),
+    foreign_pre_chain=_foreign_pre_chain,
+))
+
 logging.basicConfig(
-    format="%(message)s",
-    stream=sys.stdout,
+    handlers=[log_handler],
     level=logging.INFO
 )
 
+atexit.register(log_handler.close)
+# Forked workers (e.g. the password hashing pool) need their own writer thread
+os.register_at_fork(after_in_child=log_handler._start_writer)
+
 def get_logger(name=None):
     """Get a structlog logger, optionally with a name for context."""
     if name:
         return structlog.get_logger(name)
-    return structlog.get_logger() 
\ No newline at end of file
+    return structlog.get_logger()
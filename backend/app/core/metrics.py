@@ -0,0 +1,125 @@
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+
+# With several uvicorn workers each process writes its samples to files in
+# PROMETHEUS_MULTIPROC_DIR (which must be empty at startup) and a scrape
+# aggregates them, so any worker can answer /metrics.
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+CANDIDATE_BUCKETS = (10, 50, 100, 500, 1000, 5000, 10000, 50000)
+
+# Route label for requests that matched no route, so probes for random URLs
+# cannot create unbounded label values
+UNMATCHED_ROUTE = "unmatched"
+KNOWN_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route template, method and status", ["route", "method", "status"]
+)
+LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ["route", "method"],
+    buckets=LATENCY_BUCKETS
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "HTTP response body size by route template", ["route", "method"],
+    buckets=SIZE_BUCKETS
+)
+IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being handled", multiprocess_mode="livesum")
+SEARCH_CANDIDATES = Histogram(
+    "search_candidates", "Products scored per fuzzy search or suggestion request", ["kind"],
+    buckets=CANDIDATE_BUCKETS
+)
+CACHE_LOOKUPS = Counter("cache_lookups_total", "In-process cache lookups by result", ["cache", "result"])
+LOG_RECORDS_DROPPED = Counter("log_records_dropped_total", "Log records dropped because the log queue was full")
+LOG_INGEST_EVENTS = Counter(
+    "log_ingest_events_total", "Frontend log events by outcome (accepted, rejected, failed)", ["outcome"]
+)
+
+# Label children resolved once per kind instead of on every observation
+search_candidates = {kind: SEARCH_CANDIDATES.labels(kind) for kind in ("search", "suggestions")}
+
+class _RouteMetrics:
+    """Label children for one route and method, created on first use"""
+
+    __slots__ = ("route", "method", "latency", "size", "requests")
+
+    def __init__(self, route: str, method: str):
+        self.route = route
+        self.method = method
+        self.latency = LATENCY.labels(route, method)
+        self.size = RESPONSE_SIZE.labels(route, method)
+        self.requests = {}
+
+    def count(self, status_code: int) -> None:
+        counter = self.requests.get(status_code)
+        if counter is None:
+            counter = self.requests[status_code] = REQUESTS.labels(self.route, self.method, str(status_code))
+        counter.inc()
+
+_routes = {}
+
+def _route_metrics(route: str, method: str) -> _RouteMetrics:
+    key = (route, method)
+    metrics = _routes.get(key)
+    if metrics is None:
+        metrics = _routes[key] = _RouteMetrics(route, method)
+    return metrics
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request metrics under the matched route's
+    path template (e.g. /api/v1/products/{product_id}), which FastAPI leaves
+    in the scope after routing.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+        size = 0
+
+        async def send_with_metrics(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            IN_FLIGHT.dec()
+            route = scope.get("route")
+            method = scope["method"] if scope["method"] in KNOWN_METHODS else "OTHER"
+            metrics = _route_metrics(route.path if route is not None else UNMATCHED_ROUTE, method)
+            metrics.latency.observe(time.perf_counter() - started)
+            metrics.size.observe(size)
+            metrics.count(status_code)
+
+def render_metrics() -> tuple:
+    """Body and content type for a /metrics scrape"""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+def mark_process_dead() -> None:
+    """Drop this worker's live gauges from the multiprocess aggregate"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
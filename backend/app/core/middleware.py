@@ -0,0 +1,108 @@
+import random
+import re
+import time
+import uuid
+
+import structlog.contextvars
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.profiling import PROFILE_HEADER, PROFILE_QUERY_FLAG, is_requested, profile_request
+from app.core.query_stats import request_query_stats
+from app.core.rate_limit import RATE_LIMIT_HEADERS_SCOPE_KEY
+
+logger = get_logger("http")
+
+REQUEST_ID_HEADER = b"x-request-id"
+# Incoming request ids are reused only if they look like an id, so clients
+# cannot inject arbitrary text into every log line of the request
+_VALID_REQUEST_ID = re.compile(r"[A-Za-z0-9._:\-]{1,128}")
+
+class RequestContextMiddleware:
+    """
+    Pure ASGI middleware that binds the request id to the log context, counts
+    the request's SQL statements, and writes the sampled `http.response` line.
+
+    The request id comes from a well-formed `X-Request-ID` header, or a new
+    UUID is generated, and it is echoed back in the response header, along
+    with any rate-limit headers the route's rate_limit dependency left in the
+    scope. Requests
+    flagged with `X-Profile` or `?profile=1` are handed to
+    app.core.profiling.profile_request instead of straight to the app. Unlike
+    `@app.middleware("http")`, this runs in the request's own task and does
+    not buffer or re-wrap the response stream.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.logged_headers = frozenset(header.lower().encode("latin-1") for header in settings.LOG_HEADER_ALLOWLIST)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        request_id = None
+        profile_header = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER and request_id is None:
+                candidate = value.decode("latin-1")
+                if _VALID_REQUEST_ID.fullmatch(candidate):
+                    request_id = candidate
+            elif name == PROFILE_HEADER:
+                profile_header = value
+        profile = (profile_header is not None or PROFILE_QUERY_FLAG in scope["query_string"]) and is_requested(
+            profile_header, scope["query_string"]
+        )
+        if request_id is None:
+            request_id = str(uuid.uuid4())
+        encoded_request_id = request_id.encode("latin-1")
+        status_code = 500
+
+        structlog.contextvars.bind_contextvars(request_id=request_id)
+        with request_query_stats() as queries:
+
+            async def send_with_context(message):
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-request-id", encoded_request_id))
+                    if settings.SERVER_TIMING_ENABLED:
+                        headers.append((b"server-timing", queries.server_timing().encode("latin-1")))
+                    # Left by the rate_limit dependency, whatever kind of response the route returned
+                    headers.extend(scope.get(RATE_LIMIT_HEADERS_SCOPE_KEY, ()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                if profile:
+                    await profile_request(self.app, scope, receive, send_with_context, queries)
+                else:
+                    await self.app(scope, receive, send_with_context)
+            finally:
+                self._log_response(scope, status_code, started, queries)
+                structlog.contextvars.unbind_contextvars("request_id", "user_id")
+
+    def _log_response(self, scope, status_code: int, started: float, queries) -> None:
+        # Errors are always logged; successful requests are sampled
+        if status_code < 400 and random.random() >= settings.LOG_REQUEST_SAMPLE_RATE:
+            return
+        client = scope.get("client")
+        logger.info(
+            "http.response",
+            status_code=status_code,
+            method=scope["method"],
+            path=scope["path"],
+            query=scope["query_string"].decode("latin-1") or None,
+            headers={
+                name.decode("latin-1"): value.decode("latin-1")
+                for name, value in scope["headers"] if name in self.logged_headers
+            },
+            remote_addr=client[0] if client else None,
+            duration_ms=round((time.perf_counter() - started) * 1000, 3),
+            db_queries=queries.count,
+            db_time_ms=queries.milliseconds,
+            db_repeated_statements=len(queries.repeated)
+        )
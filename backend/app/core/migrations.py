@@ -0,0 +1,12 @@
+from pathlib import Path
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+def upgrade_database(revision: str = "head") -> None:
+    """Apply migrations up to `revision`, as `alembic upgrade` would"""
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["configure_logging"] = False
+    command.upgrade(config, revision)
@@ -0,0 +1,68 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core import security
+from app.core.logging import get_logger
+
+logger = get_logger("password_pool")
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing pool already has as much work queued as allowed"""
+
+_executor: Optional[ProcessPoolExecutor] = None
+# Hashes submitted and not yet finished; only touched from the event loop
+_in_flight = 0
+
+def _get_executor() -> Optional[ProcessPoolExecutor]:
+    global _executor
+    if settings.PASSWORD_HASH_WORKERS <= 0:
+        return None
+    if _executor is None:
+        # Created from the startup hook so workers are forked before the server
+        # has spun up request threads
+        _executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+        logger.info("password_pool.started", workers=settings.PASSWORD_HASH_WORKERS)
+    return _executor
+
+async def _run(fn, *args):
+    global _in_flight
+    limit = max(settings.PASSWORD_HASH_WORKERS, 1) + settings.PASSWORD_HASH_MAX_QUEUE
+    if _in_flight >= limit:
+        logger.warning("password_pool.saturated", in_flight=_in_flight, limit=limit)
+        raise PasswordHasherBusy()
+    _in_flight += 1
+    try:
+        executor = _get_executor()
+        if executor is None:
+            return await run_in_threadpool(fn, *args)
+        return await asyncio.wrap_future(executor.submit(fn, *args))
+    finally:
+        _in_flight -= 1
+
+async def hash_password(password: str) -> str:
+    """Hash a password off the request threadpool"""
+    return await _run(security.get_password_hash, password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password off the request threadpool, returning an upgraded hash when needed"""
+    return await _run(security.verify_and_update_password, plain_password, hashed_password)
+
+def in_flight() -> int:
+    return _in_flight
+
+async def warm_password_pool() -> None:
+    """Start the worker processes and load the hasher in them ahead of the first login"""
+    executor = _get_executor()
+    if executor is not None:
+        await asyncio.gather(*(
+            asyncio.wrap_future(executor.submit(security.load_password_hasher))
+            for _ in range(settings.PASSWORD_HASH_WORKERS)
+        ))
+
+def shutdown_password_pool() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
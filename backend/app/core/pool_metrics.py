@@ -0,0 +1,150 @@
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional, Type
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import Pool
+
+# Checkout waits kept per pool for the percentiles
+RECENT_WAITS = 2048
+
+class PoolMetrics:
+    """
+    Counters for one connection pool, fed by pool event listeners.
+
+    Checkouts happen from many threads (and the event loop for the async
+    engine), so updates take a lock. Wait times are only recorded by pools
+    built from `timed_pool_class`; SQLite keeps the dialect's own pool.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pool: Optional[Pool] = None
+        self._lock = threading.Lock()
+        self._waits: deque = deque(maxlen=RECENT_WAITS)
+        self.in_use = 0
+        self.reset()
+
+    def reset(self) -> None:
+        """Zero the counters; `in_use` tracks live checkouts and is kept"""
+        with self._lock:
+            self.checkouts = 0
+            self.connects = 0
+            self.invalidations = 0
+            self.timeouts = 0
+            self.peak_in_use = self.in_use
+            self.peak_overflow = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+            self._waits.clear()
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            self._waits.append(seconds)
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self.connects += 1
+            self.peak_overflow = max(self.peak_overflow, self._overflow())
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self.in_use = max(0, self.in_use - 1)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def _overflow(self) -> int:
+        # QueuePool counts overflow from -pool_size, so clamp to connections beyond the pool
+        overflow = getattr(self.pool, "overflow", None)
+        return max(0, overflow()) if overflow else 0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            waits = sorted(self._waits)
+            recorded = len(self._waits)
+
+            def wait_ms(fraction: float) -> Optional[float]:
+                if not waits:
+                    return None
+                return round(waits[min(len(waits) - 1, int(len(waits) * fraction))] * 1000, 3)
+
+            size = getattr(self.pool, "size", None)
+            max_overflow = getattr(self.pool, "_max_overflow", None)
+            return {
+                "name": self.name,
+                "pool_class": type(self.pool).__name__ if self.pool is not None else None,
+                "size": size() if size else None,
+                "max_overflow": max_overflow,
+                "timeout_seconds": getattr(self.pool, "_timeout", None),
+                "in_use": self.in_use,
+                "idle": self.pool.checkedin() if hasattr(self.pool, "checkedin") else None,
+                "overflow": self._overflow(),
+                "peak_in_use": self.peak_in_use,
+                "peak_overflow": self.peak_overflow,
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_samples": recorded,
+                "wait_avg_ms": round(sum(waits) / recorded * 1000, 3) if recorded else None,
+                "wait_p50_ms": wait_ms(0.5),
+                "wait_p95_ms": wait_ms(0.95),
+                "wait_p99_ms": wait_ms(0.99),
+                "wait_max_ms": round(self.wait_max * 1000, 3) if recorded else None,
+            }
+
+# Metrics for every instrumented engine, keyed by name
+pool_metrics: Dict[str, PoolMetrics] = {}
+
+def timed_pool_class(base: Type[Pool], metrics: PoolMetrics) -> Type[Pool]:
+    """
+    Subclass `base` so every checkout records how long it waited.
+
+    There is no pool event before a checkout starts, so the wait is measured
+    around `Pool.connect()`. The class carries the metrics, which keeps them
+    attached when the engine recreates its pool after `dispose()`.
+    """
+
+    class TimedPool(base):
+        def connect(self):
+            started = time.perf_counter()
+            try:
+                connection = super().connect()
+            except exc.TimeoutError:
+                metrics.record_wait(time.perf_counter() - started, timed_out=True)
+                raise
+            metrics.record_wait(time.perf_counter() - started)
+            return connection
+
+    TimedPool.__name__ = f"Timed{base.__name__}"
+    TimedPool.__qualname__ = TimedPool.__name__
+    return TimedPool
+
+def instrument_engine(engine, metrics: PoolMetrics) -> None:
+    """Attach pool listeners for `metrics` to a sync or async engine"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    metrics.pool = sync_engine.pool
+    # Listeners registered on the engine carry over to pools recreated by dispose()
+    event.listen(sync_engine, "connect", metrics._on_connect)
+    event.listen(sync_engine, "checkout", metrics._on_checkout)
+    event.listen(sync_engine, "checkin", metrics._on_checkin)
+    event.listen(sync_engine, "invalidate", metrics._on_invalidate)
+
+    @event.listens_for(sync_engine, "engine_disposed")
+    def _track_new_pool(disposed_engine):
+        metrics.pool = disposed_engine.pool
+
+    pool_metrics[metrics.name] = metrics
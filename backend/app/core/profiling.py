@@ -0,0 +1,397 @@
+"""
+On-demand profiling of single requests.
+
+An admin adds an `X-Profile: 1` header (or `?profile=1`) to a request. Once
+the admin token has been checked, a sampler thread records what is running
+for that request until it completes (from anyone else, the flag is ignored
+and the request is served as usual):
+
+- its asyncio task while the task is on the event loop
+- the anyio worker thread the task is waiting on, for sync endpoints and
+  dependencies
+- the task's await chain while it waits on anything else
+
+Work the request hands to other tasks, such as a streamed response body, is
+not followed.
+
+Samples are weighted by wall time. A sample taken while one of the request's
+SQL statements was executing gets the statement as its leaf frame.
+
+Each profile is written to PROFILE_DIR and served by /api/v1/admin/profiles:
+
+    <id>.json    the request, its timings, the slowest functions and every SQL statement in order
+    <id>.folded  collapsed stacks in microseconds, for flamegraph.pl or speedscope
+    <id>.prof    pstats, for `python -m pstats` or snakeviz
+
+Requests without the flag only pay for the header check in
+RequestContextMiddleware.
+"""
+
+import asyncio
+import bisect
+import json
+import marshal
+import os
+import queue
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger("profiling")
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY_FLAG = b"profile="
+PROFILE_ID_HEADER = b"x-profile-id"
+# Artifact extension -> media type
+PROFILE_ARTIFACTS = {"json": "application/json", "folded": "text/plain", "prof": "application/octet-stream"}
+_VALID_PROFILE_ID = re.compile(r"[0-9a-f]{32}")
+_FALSE_VALUES = ("", "0", "false", "no", "off")
+
+TOP_FUNCTIONS = 25
+MAX_SQL_FRAME_CHARS = 120
+
+Frame = Tuple[str, int, str]  # pstats function key: (filename, first line, name)
+AWAIT_FRAME: Frame = ("~", 0, "<awaiting>")
+
+_BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def is_requested(header: Optional[bytes], query_string: bytes) -> bool:
+    """Whether the X-Profile header or the `profile` query flag asks for a profile"""
+    if header is not None:
+        return header.decode("latin-1").strip().lower() not in _FALSE_VALUES
+    values = parse_qs(query_string.decode("latin-1")).get("profile")
+    return bool(values) and values[-1].strip().lower() not in _FALSE_VALUES
+
+async def authorize(scope) -> Optional[str]:
+    """The admin's email if the request carries a valid admin token, else None"""
+    # Imported here so that importing the middleware does not pull in the database
+    from app.core.auth import get_current_admin, get_current_user
+    from app.core.database import AsyncSessionLocal
+
+    token = None
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, credentials = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and credentials:
+                token = credentials
+            break
+    if token is None:
+        return None
+    try:
+        async with AsyncSessionLocal() as db:
+            admin = await get_current_admin(await get_current_user(token, db))
+    except HTTPException:
+        return None
+    return admin.email
+
+def _anyio_code():
+    """Code objects used to find the worker thread a task is waiting on, if anyio is laid out as expected"""
+    try:
+        from anyio._backends import _asyncio as backend
+        return backend.run_sync_in_worker_thread.__code__, backend.WorkerThread.run.__code__
+    except (ImportError, AttributeError):
+        return None, None
+
+def _await_chain(coro) -> list:
+    """Frames of a suspended coroutine and everything it is awaiting, outermost first"""
+    frames = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        frames.append(frame)
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return frames
+
+def _thread_stack(frame, stop_code=None, root=None) -> list:
+    """
+    Frames of a running thread, outermost first. Frames from `stop_code`
+    outwards are left out; with `root`, only `root` and the frames it called.
+    """
+    frames = []
+    while frame is not None:
+        if frame.f_code is stop_code:
+            break
+        frames.append(frame)
+        if frame is root:
+            break
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+def _key(frame) -> Frame:
+    code = frame.f_code
+    return (code.co_filename, code.co_firstlineno, code.co_name)
+
+class RequestProfile:
+    """Samples one request's task from a background thread between start() and stop()"""
+
+    def __init__(self, task: asyncio.Task, interval: float):
+        self.id = uuid.uuid4().hex
+        self.task = task
+        self.loop = task.get_loop()
+        self.loop_thread = threading.get_ident()
+        self.interval = interval
+        # (perf_counter time, seconds since the previous sample, stack)
+        self.samples: List[Tuple[float, float, Tuple[Frame, ...]]] = []
+        self.run_sync_code, self.worker_run_code = _anyio_code()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"profile-{self.id[:8]}", daemon=True)
+
+    def start(self) -> None:
+        self.created_at = datetime.now(timezone.utc)
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+        self.finished = time.perf_counter()
+
+    def _run(self) -> None:
+        previous = self.started
+        while not self._stopped.wait(self.interval):
+            now = time.perf_counter()
+            stack = self._sample()
+            if stack:
+                self.samples.append((now, now - previous, stack))
+            previous = now
+
+    def _sample(self) -> Tuple[Frame, ...]:
+        root = getattr(self.task.get_coro(), "cr_frame", None)
+        if root is None:
+            return ()
+        if asyncio.current_task(self.loop) is self.task:
+            frames = _thread_stack(sys._current_frames().get(self.loop_thread), root=root)
+            return tuple(_key(frame) for frame in frames)
+
+        chain = _await_chain(self.task.get_coro())
+        stack = [_key(frame) for frame in chain]
+        worker = None
+        for frame in chain:
+            if frame.f_code is self.run_sync_code:
+                worker = frame.f_locals.get("worker")
+        thread_frame = sys._current_frames().get(worker.ident) if worker is not None else None
+        frames = _thread_stack(thread_frame, stop_code=self.worker_run_code) if thread_frame is not None else []
+        # A worker back in queue.get has finished the call and is waiting for its next one
+        if frames and frames[0].f_code is not queue.Queue.get.__code__:
+            stack.extend(_key(frame) for frame in frames)
+        else:
+            stack.append(AWAIT_FRAME)
+        return tuple(stack)
+
+def _label(frame: Frame) -> str:
+    filename, line, name = frame
+    if filename.startswith("~"):
+        return name
+    marker = "site-packages" + os.sep
+    index = filename.rfind(marker)
+    if index >= 0:
+        filename = filename[index + len(marker):]
+    elif filename.startswith(_BACKEND_ROOT):
+        filename = os.path.relpath(filename, _BACKEND_ROOT)
+    return f"{name} ({filename}:{line})"
+
+def _with_sql(samples, statements) -> list:
+    """
+    (weight, stack) pairs, with the statement executing at the time appended
+    as a leaf frame. Only the part of a sample's interval that overlaps the
+    statement is counted as SQL: the sampler tends to wake while a driver
+    has released the GIL, so whole intervals would overstate it.
+    """
+    starts = [started for started, _, _, _ in statements]
+    annotated = []
+    for at, weight, stack in samples:
+        index = bisect.bisect_right(starts, at) - 1
+        if index >= 0:
+            started, seconds, statement, _ = statements[index]
+            if at < started + seconds:
+                text = " ".join(statement.split()).replace(";", ",")[:MAX_SQL_FRAME_CHARS]
+                in_sql = min(weight, at - started)
+                annotated.append((in_sql, stack + (("~sql", 0, f"SQL: {text}"),)))
+                weight -= in_sql
+        if weight > 0:
+            annotated.append((weight, stack))
+    return annotated
+
+def _pstats(samples) -> Dict[Frame, tuple]:
+    """Sampled wall time in the layout pstats.Stats loads: func -> (cc, nc, tt, ct, callers)"""
+    counts: Counter = Counter()
+    own: Counter = Counter()
+    total: Counter = Counter()
+    edges: Dict[Frame, Counter] = {}
+    edge_counts: Dict[Frame, Counter] = {}
+    edge_own: Dict[Frame, Counter] = {}
+    for weight, stack in samples:
+        own[stack[-1]] += weight
+        for func in set(stack):
+            counts[func] += 1
+            total[func] += weight
+        for caller, callee in set(zip(stack, stack[1:])):
+            edges.setdefault(callee, Counter())[caller] += weight
+            edge_counts.setdefault(callee, Counter())[caller] += 1
+            if callee == stack[-1]:
+                edge_own.setdefault(callee, Counter())[caller] += weight
+    return {
+        func: (
+            counts[func], counts[func], own[func], total[func],
+            {
+                caller: (edge_counts[func][caller], edge_counts[func][caller],
+                         edge_own.get(func, Counter())[caller], seconds)
+                for caller, seconds in edges.get(func, {}).items()
+            },
+        )
+        for func in counts
+    }
+
+def save_profile(profile: RequestProfile, request: dict, statements: list) -> dict:
+    """Write the profile's artifacts to PROFILE_DIR and return its JSON document"""
+    samples = _with_sql(profile.samples, statements)
+    stats = _pstats(samples)
+    folded: Counter = Counter()
+    for weight, stack in samples:
+        folded[";".join(_label(frame) for frame in stack)] += weight
+
+    document = {
+        "id": profile.id,
+        "created_at": profile.created_at.isoformat(),
+        **request,
+        "duration_ms": round((profile.finished - profile.started) * 1000, 3),
+        "samples": len(profile.samples),
+        "sample_interval_ms": round(profile.interval * 1000, 3),
+        "sampled_ms": round(sum(weight for weight, _ in samples) * 1000, 3),
+        "sql_count": len(statements),
+        "sql_ms": round(sum(seconds for _, seconds, _, _ in statements) * 1000, 3),
+        "top_functions": [
+            {
+                "function": _label(func),
+                "self_ms": round(own * 1000, 3),
+                "total_ms": round(total * 1000, 3),
+                "samples": count,
+            }
+            for func, (count, _, own, total, _) in sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:TOP_FUNCTIONS]
+        ],
+        "sql": [
+            {
+                "offset_ms": round((started - profile.started) * 1000, 3),
+                "duration_ms": round(seconds * 1000, 3),
+                "statement": statement,
+                "parameters": parameters,
+            }
+            for started, seconds, statement, parameters in statements
+        ],
+    }
+
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    base = os.path.join(settings.PROFILE_DIR, profile.id)
+    with open(f"{base}.folded", "w", encoding="utf-8") as f:
+        f.writelines(f"{stack} {max(1, round(weight * 1_000_000))}\n" for stack, weight in folded.items())
+    with open(f"{base}.prof", "wb") as f:
+        marshal.dump(stats, f)
+    # The JSON file is what marks a profile as complete, so it is written last
+    with open(f"{base}.json.tmp", "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+    os.replace(f"{base}.json.tmp", f"{base}.json")
+    _prune()
+    return document
+
+def _prune() -> None:
+    """Delete the oldest profiles beyond PROFILE_MAX_ARTIFACTS"""
+    profiles = sorted(
+        (entry for entry in os.scandir(settings.PROFILE_DIR) if entry.name.endswith(".json")),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True,
+    )
+    for entry in profiles[settings.PROFILE_MAX_ARTIFACTS:]:
+        profile_id = entry.name[:-len(".json")]
+        for extension in PROFILE_ARTIFACTS:
+            try:
+                os.remove(os.path.join(settings.PROFILE_DIR, f"{profile_id}.{extension}"))
+            except FileNotFoundError:
+                pass
+
+def list_profiles() -> List[dict]:
+    """Stored profile documents without their SQL and function lists, newest first"""
+    if not os.path.isdir(settings.PROFILE_DIR):
+        return []
+    profiles = []
+    for entry in os.scandir(settings.PROFILE_DIR):
+        if not entry.name.endswith(".json"):
+            continue
+        try:
+            with open(entry.path, encoding="utf-8") as f:
+                document = json.load(f)
+        except (OSError, ValueError):
+            continue  # Pruned or replaced by another worker meanwhile
+        document.pop("sql", None)
+        document.pop("top_functions", None)
+        profiles.append(document)
+    profiles.sort(key=lambda document: document["created_at"], reverse=True)
+    return profiles
+
+def profile_path(profile_id: str, artifact: str) -> Optional[str]:
+    """Path of a stored artifact, or None for unknown ids and artifacts"""
+    if artifact not in PROFILE_ARTIFACTS or not _VALID_PROFILE_ID.fullmatch(profile_id):
+        return None
+    path = os.path.join(settings.PROFILE_DIR, f"{profile_id}.{artifact}")
+    return path if os.path.isfile(path) else None
+
+async def profile_request(app, scope, receive, send, queries) -> None:
+    """
+    Run the request under a RequestProfile once the caller passes the admin
+    check, annotating it with the statements recorded in `queries`. The
+    profile id is returned in the X-Profile-Id response header. Requests from
+    anyone but an admin are passed to the app unprofiled; the route's own
+    auth decides how they are answered.
+    """
+    admin_email = await authorize(scope)
+    if admin_email is None:
+        await app(scope, receive, send)
+        return
+
+    profile = RequestProfile(asyncio.current_task(), settings.PROFILE_SAMPLE_INTERVAL_MS / 1000)
+    status_code = 500
+
+    async def send_with_profile_id(message):
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+            headers = list(message.get("headers", []))
+            headers.append((PROFILE_ID_HEADER, profile.id.encode("latin-1")))
+            message = {**message, "headers": headers}
+        await send(message)
+
+    queries.trace = []
+    profile.start()
+    try:
+        await app(scope, receive, send_with_profile_id)
+    finally:
+        profile.stop()
+        request = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "query": scope["query_string"].decode("latin-1") or None,
+            "status_code": status_code,
+            "admin_email": admin_email,
+        }
+        document = await run_in_threadpool(save_profile, profile, request, queries.trace)
+        logger.info(
+            "profile.saved",
+            profile_id=profile.id,
+            path=scope["path"],
+            duration_ms=document["duration_ms"],
+            samples=document["samples"],
+            sql_count=document["sql_count"]
+        )
@@ -0,0 +1,92 @@
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger("query_stats")
+
+# Longest parameter repr written to the slow-query log
+MAX_LOGGED_PARAMETERS = 500
+
+class QueryStats:
+    """
+    Statements executed on behalf of one request.
+
+    The same object is shared by the request's event-loop task and the
+    threadpool threads it hands work to; updates are plain increments.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Counter = Counter()
+        self.repeated: List[str] = []  # Statements that crossed N_PLUS_ONE_THRESHOLD
+        # Set to a list by profiled requests to keep (started, seconds, statement, parameters)
+        # for every statement, see app.core.profiling
+        self.trace: Optional[list] = None
+
+    @property
+    def milliseconds(self) -> float:
+        return round(self.seconds * 1000, 3)
+
+    def record(self, statement: str, seconds: float) -> int:
+        self.count += 1
+        self.seconds += seconds
+        self.statements[statement] += 1
+        return self.statements[statement]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.milliseconds};desc="{self.count} queries"'
+
+_request_stats: ContextVar[Optional[QueryStats]] = ContextVar("request_query_stats", default=None)
+
+@contextmanager
+def request_query_stats() -> Iterator[QueryStats]:
+    """Attribute statements run while handling the current request to a fresh QueryStats"""
+    stats = QueryStats()
+    token = _request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_stats.reset(token)
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started_at"].pop()
+
+    stats = _request_stats.get()
+    if stats is not None:
+        repeats = stats.record(statement, elapsed)
+        if repeats == settings.N_PLUS_ONE_THRESHOLD:
+            stats.repeated.append(statement)
+            logger.warning("db.n_plus_one", statement=statement, repeats=repeats)
+        if stats.trace is not None:
+            stats.trace.append(
+                (time.perf_counter() - elapsed, elapsed, statement, repr(parameters)[:MAX_LOGGED_PARAMETERS])
+            )
+
+    if elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        logger.warning(
+            "db.slow_query",
+            statement=statement,
+            parameters=repr(parameters)[:MAX_LOGGED_PARAMETERS],
+            duration_ms=round(elapsed * 1000, 3),
+        )
+
+@event.listens_for(Engine, "handle_error")
+def _discard_timer(exception_context):
+    # after_cursor_execute does not run for failed statements
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started_at"):
+        connection.info["query_started_at"].pop()
@@ -0,0 +1,174 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+from fastapi import HTTPException, Request, status
+
+from app.core.config import settings
+from app.core.security import decode_access_token
+from app.core.logging import get_logger
+
+logger = get_logger("rate_limit")
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    """Token bucket refilled at `rate` tokens per second, holding at most `burst`"""
+    name: str
+    rate: float
+    burst: int
+
+SEARCH_POLICY = RateLimitPolicy("search", rate=2.0, burst=30)
+SUGGESTIONS_POLICY = RateLimitPolicy("suggestions", rate=5.0, burst=50)
+LOGIN_POLICY = RateLimitPolicy("login", rate=0.2, burst=10)
+LOG_INGEST_POLICY = RateLimitPolicy("logs", rate=10.0, burst=100)
+
+# Scope key the dependency leaves response headers under; RequestContextMiddleware
+# adds them to whatever response the route returns, including a prebuilt Response
+RATE_LIMIT_HEADERS_SCOPE_KEY = "rate_limit_headers"
+
+class MemoryBucketStore:
+    """Per-process buckets in an LRU-bounded dict; each take is O(number of keys)"""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def take(self, keys: List[str], policy: RateLimitPolicy) -> Tuple[bool, float, str]:
+        """
+        Spend a token from every bucket in `keys` if all of them have one, and
+        from none otherwise. Returns whether the request is allowed, the tokens
+        left in the most restrictive bucket and that bucket's key.
+        """
+        now = time.monotonic()
+        with self._lock:
+            levels = []
+            for key in keys:
+                tokens, updated_at = self._buckets.get(key, (policy.burst, now))
+                levels.append(min(policy.burst, tokens + (now - updated_at) * policy.rate))
+            allowed = all(tokens >= 1 for tokens in levels)
+            if allowed:
+                levels = [tokens - 1 for tokens in levels]
+            for key, tokens in zip(keys, levels):
+                self._buckets[key] = (tokens, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        tokens, key = min(zip(levels, keys))
+        return allowed, tokens, key
+
+# Refill every bucket, then take from all of them or none, in one atomic step
+# using the Redis server clock, so nodes with skewed clocks still share
+# consistent buckets. Returns the most restrictive bucket's tokens and index.
+_TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local levels = {}
+local allowed = 1
+for i, key in ipairs(KEYS) do
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    levels[i] = math.min(burst, tokens + math.max(0, now - ts) * rate)
+    if levels[i] < 1 then
+        allowed = 0
+    end
+end
+local lowest = 1
+for i, key in ipairs(KEYS) do
+    levels[i] = levels[i] - allowed
+    if levels[i] < levels[lowest] then
+        lowest = i
+    end
+    redis.call('HSET', key, 'tokens', tostring(levels[i]), 'ts', tostring(now))
+    redis.call('PEXPIRE', key, math.ceil(burst / rate * 1000))
+end
+return {allowed, tostring(levels[lowest]), lowest}
+"""
+
+class RedisBucketStore:
+    """Buckets shared by every node through REDIS_URL; one script call per take"""
+
+    def __init__(self, url: str):
+        import redis.asyncio
+        self._client = redis.asyncio.Redis.from_url(url)
+        self._take = self._client.register_script(_TAKE_SCRIPT)
+
+    async def take(self, keys: List[str], policy: RateLimitPolicy) -> Tuple[bool, float, str]:
+        """Same contract as MemoryBucketStore.take"""
+        allowed, tokens, lowest = await self._take(
+            keys=[f"ratelimit:{key}" for key in keys], args=[policy.rate, policy.burst]
+        )
+        return bool(allowed), float(tokens), keys[int(lowest) - 1]
+
+_store = None
+
+def get_bucket_store():
+    global _store
+    if _store is None:
+        if settings.RATE_LIMIT_BACKEND == "redis":
+            _store = RedisBucketStore(settings.REDIS_URL)
+        else:
+            _store = MemoryBucketStore(settings.RATE_LIMIT_MAX_KEYS)
+    return _store
+
+def _client_keys(request: Request) -> List[str]:
+    """
+    Buckets a request draws from: its client IP, plus the token subject when
+    authenticated, so rotating tokens does not escape the per-IP limit
+    """
+    keys = [f"ip:{request.client.host if request.client else 'unknown'}"]
+    authorization = request.headers.get("authorization")
+    if authorization and authorization.lower().startswith("bearer "):
+        claims = decode_access_token(authorization[7:])
+        if claims:
+            keys.append(f"user:{claims['sub']}")
+    return keys
+
+def _headers(policy: RateLimitPolicy, allowed: bool, tokens: float) -> Dict[str, str]:
+    headers = {
+        "RateLimit-Limit": str(policy.burst),
+        "RateLimit-Remaining": str(int(tokens)),
+        "RateLimit-Reset": str(math.ceil((policy.burst - tokens) / policy.rate)),
+    }
+    if not allowed:
+        headers["Retry-After"] = str(math.ceil((1 - tokens) / policy.rate))
+    return headers
+
+def rate_limit(policy: RateLimitPolicy, applies: Optional[Callable[[Request], bool]] = None):
+    """
+    Build a route dependency enforcing `policy` per client IP and, when
+    authenticated, per user as well.
+
+    `applies` can restrict the limit to some requests, e.g. only those with a
+    search term. The store is failed open: an unreachable Redis never blocks
+    traffic.
+    """
+    async def dependency(request: Request) -> None:
+        if not settings.RATE_LIMIT_ENABLED or (applies and not applies(request)):
+            return
+        store = get_bucket_store()
+        # Both buckets are checked before either is spent, so a request the
+        # user bucket refuses does not use up the client IP's tokens
+        bucket_keys = [f"{policy.name}:{client_key}" for client_key in _client_keys(request)]
+        try:
+            allowed, tokens, key = await store.take(bucket_keys, policy)
+        except Exception as e:
+            logger.error("rate_limit.store_error", policy=policy.name, error=str(e), error_type=type(e).__name__)
+            return
+        headers = _headers(policy, allowed, tokens)
+        if not allowed:
+            logger.warning("rate_limit.exceeded", policy=policy.name, key=key)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers=headers
+            )
+        request.scope[RATE_LIMIT_HEADERS_SCOPE_KEY] = [
+            (name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()
+        ]
+    return dependency
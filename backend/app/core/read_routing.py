@@ -0,0 +1,61 @@
+from contextvars import ContextVar
+from typing import Optional
+from fastapi import Depends
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import AsyncReadSessionLocal, AsyncSessionLocal
+from app.core.security import decode_access_token
+from app.utils.cache import TTLCache
+
+# Users who wrote within READ_YOUR_WRITES_SECONDS, so their reads skip the
+# replica until it has caught up. Kept per process: with several workers a
+# read served by another worker can still lag behind the user's own write.
+recent_writers = TTLCache(100000, settings.READ_YOUR_WRITES_SECONDS)
+
+# Set by get_current_user so commits can be attributed to the caller
+current_user_id: ContextVar[Optional[int]] = ContextVar("current_user_id", default=None)
+
+_optional_token = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
+
+def mark_user_write(user_id: int) -> None:
+    recent_writers.set(user_id, True)
+
+@event.listens_for(Session, "after_flush")
+def _note_pending_write(session, flush_context) -> None:
+    session.info["has_writes"] = True
+
+@event.listens_for(Session, "do_orm_execute")
+def _note_statement_write(orm_execute_state) -> None:
+    # Set-based INSERT/UPDATE/DELETE statements bypass the flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["has_writes"] = True
+
+@event.listens_for(Session, "after_commit")
+def _stick_writer_to_primary(session) -> None:
+    if session.info.pop("has_writes", False):
+        user_id = current_user_id.get()
+        if user_id is not None:
+            mark_user_write(user_id)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_write(session) -> None:
+    session.info.pop("has_writes", None)
+
+async def get_read_db(token: Optional[str] = Depends(_optional_token)):
+    """
+    Session for read-only endpoints: the replica when one is configured,
+    otherwise (or shortly after the caller's own writes) the primary.
+
+    The token is only decoded for its user id, so an invalid token reads from
+    the replica and authentication is left to the endpoint.
+    """
+    session_factory = AsyncReadSessionLocal or AsyncSessionLocal
+    if AsyncReadSessionLocal is not None and token:
+        claims = decode_access_token(token)
+        if claims and claims.get("uid") is not None and recent_writers.get(claims["uid"]):
+            session_factory = AsyncSessionLocal
+    async with session_factory() as db:
+        yield db
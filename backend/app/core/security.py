@@ -1,13 +1,32 @@
 from datetime import datetime, timedelta
-from typing import Any, Union
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from functools import lru_cache
+from typing import Optional, Tuple, Union
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# jose (with the cryptography backend) and passlib/bcrypt are imported on first
+# use rather than with the app, which keeps worker start and --reload fast
+
+@lru_cache(maxsize=None)
+def _pwd_context():
+    from passlib.context import CryptContext
+
+    # Hashes below the configured cost are reported by verify_and_update so they
+    # can be upgraded on the next successful login
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+        bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    )
+
+def load_password_hasher() -> None:
+    """Import and configure the password hasher ahead of the first login"""
+    _pwd_context()
 
 def create_access_token(data: dict, expires_delta: Union[timedelta, None] = None) -> str:
     """Create JWT access token"""
+    from jose import jwt
+
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -17,21 +36,26 @@ def create_access_token(data: dict, expires_delta: Union[timedelta, None] = None
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str) -> Union[str, None]:
-    """Verify JWT token and return user email"""
+def decode_access_token(token: str) -> Union[dict, None]:
+    """Verify JWT token and return its claims"""
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: Any = payload.get("sub")
-        if email is None:
-            return None
-        return str(email)
     except JWTError:
         return None
+    if payload.get("sub") is None:
+        return None
+    return payload
 
 def get_password_hash(password: str) -> str:
     """Hash password using bcrypt"""
-    return pwd_context.hash(password)
+    return _pwd_context().hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify password against hash"""
-    return pwd_context.verify(plain_password, hashed_password) 
\ No newline at end of file
+    return _pwd_context().verify(plain_password, hashed_password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify password and return a replacement hash if the stored one is outdated"""
+    return _pwd_context().verify_and_update(plain_password, hashed_password)
@@ -1,86 +1,108 @@
-import logging
-import sys
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-import uvicorn
-from fastapi import Request, APIRouter
+from fastapi import Request, APIRouter, Depends
 import structlog.contextvars
-import uuid
+from datetime import datetime, timezone
 
 from app.core.config import settings
 from app.api.v1.api import api_router
-from app.core.database import engine
-from app.models import Base
 from app.core.logging import get_logger
+from app.core.password_pool import warm_password_pool, shutdown_password_pool
+from app.core.rate_limit import rate_limit, LOG_INGEST_POLICY
+# Imported with the app rather than on first use: the middleware stack is built
+# when this module is imported (app = create_app() below), so these modules and
+# profiling, which the request middleware imports, load here regardless, and
+# the routers already import stock_alerts and metrics.
+# prometheus_client, pulled in by metrics, is the only one that costs more than
+# a millisecond. check_import_time.py and tests/test_import_time.py hold the total
+# to the budget.
+from app.core.middleware import RequestContextMiddleware
+from app.core.compression import CompressionMiddleware
+from app.core.metrics import MetricsMiddleware, render_metrics, mark_process_dead
+from app.utils.stock_alerts import run_stock_scanner
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
-app = FastAPI(
-    title="SaveGo Wholesale API",
-    description="A modern wholesale grocery API with inventory management and order processing",
-    version="1.0.0",
-    docs_url="/docs",
-    redoc_url="/redoc"
-)
-
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[
-        "http://localhost:3000",  # Local frontend
-        # Add more origins here if needed, e.g. "http://127.0.0.1:3000", "http://frontend:3000"
-    ],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Trusted host middleware - allow localhost
-app.add_middleware(
-    TrustedHostMiddleware,
-    allowed_hosts=["localhost", "127.0.0.1", "localhost:8000", "127.0.0.1:8000"]
-)
-
-# Include API routes
-app.include_router(api_router, prefix="/api/v1")
-
-# Add request/response logging middleware
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    logger.info(
-        "http.request",
-        method=request.method,
-        url=str(request.url),
-        headers=dict(request.headers),
-        remote_addr=request.client.host if request.client else None
-    )
-    response = await call_next(request)
-    logger.info(
-        "http.response",
-        status_code=response.status_code,
-        method=request.method,
-        url=str(request.url)
-    )
-    return response
+logger = get_logger("main")
+
+# Example: log startup
+# logger.info("savego.startup", event="Backend started")
+
+# Endpoints served outside the versioned API
+router = APIRouter()
 
-@app.middleware("http")
-async def add_request_id_to_log_context(request: Request, call_next):
-    request_id = str(uuid.uuid4())
-    structlog.contextvars.bind_contextvars(request_id=request_id)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background work once the worker is up and stop it in reverse on shutdown"""
+    app.state.stock_scanner = asyncio.create_task(
+        run_stock_scanner(settings.STOCK_SCAN_INTERVAL_SECONDS)
+    )
+    await warm_password_pool()
+    # Only this worker-side drain and the ingestion route need it
+    from app.utils.log_ingest import LogBuffer, RotatingFileSink, run_log_drain
+    app.state.log_buffer = LogBuffer(settings.LOG_INGEST_BUFFER_EVENTS)
+    app.state.log_drain = asyncio.create_task(run_log_drain(
+        app.state.log_buffer,
+        RotatingFileSink(settings.LOG_INGEST_DIR, settings.LOG_INGEST_MAX_FILE_BYTES, settings.LOG_INGEST_BACKUP_COUNT),
+        settings.LOG_INGEST_FLUSH_INTERVAL_SECONDS,
+    ))
     try:
-        response = await call_next(request)
+        yield
     finally:
-        structlog.contextvars.unbind_contextvars("request_id", "user_id")
-    return response
+        app.state.stock_scanner.cancel()
+        shutdown_password_pool()
+        # Flush buffered events before the worker exits
+        app.state.log_buffer.close()
+        await app.state.log_drain
+        mark_process_dead()
 
-logger = get_logger("main")
+def create_app() -> FastAPI:
+    """Build the application. Nothing here touches the database or starts tasks; that happens in `lifespan`."""
+    app = FastAPI(
+        title="SaveGo Wholesale API",
+        description="A modern wholesale grocery API with inventory management and order processing",
+        version="1.0.0",
+        docs_url="/docs",
+        redoc_url="/redoc",
+        lifespan=lifespan
+    )
 
-# Example: log startup
-# logger.info("savego.startup", event="Backend started")
+    # CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=[
+            "http://localhost:3000",  # Local frontend
+            # Add more origins here if needed, e.g. "http://127.0.0.1:3000", "http://frontend:3000"
+        ],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
 
-@app.get("/")
+    # Trusted host middleware - allow localhost
+    app.add_middleware(
+        TrustedHostMiddleware,
+        allowed_hosts=["localhost", "127.0.0.1", "localhost:8000", "127.0.0.1:8000"]
+    )
+
+    # Include API routes
+    app.include_router(api_router, prefix="/api/v1")
+    app.include_router(router)
+
+    # gzip/brotli for responses over COMPRESSION_MIN_BYTES; inside the metrics
+    # middleware so response sizes are recorded as sent
+    app.add_middleware(CompressionMiddleware)
+
+    # Per-route request metrics, scraped from /metrics
+    app.add_middleware(MetricsMiddleware)
+
+    # Request id, request logging and timing; added last so it wraps everything else
+    app.add_middleware(RequestContextMiddleware)
+
+    return app
+
+@router.get("/")
 async def root():
     return {
         "message": "Welcome to SaveGo Wholesale API",
@@ -88,19 +110,67 @@ async def root():
         "docs": "/docs"
     }
 
-@app.get("/health")
+@router.get("/health")
 async def health_check():
     return {"status": "healthy"}
 
-# Logs API endpoint for frontend log ingestion
-@app.post("/api/v1/logs")
+# Prometheus scrape endpoint; sync so multiprocess file reads stay off the event loop
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, headers={"Content-Type": content_type})
+
+NDJSON_CONTENT_TYPES = {"application/x-ndjson", "application/ndjson"}
+
+# Logs API endpoint for frontend log ingestion. Accepts one JSON object, or
+# an NDJSON batch with Content-Type application/x-ndjson; events are buffered
+# and written to the log sink by a background task.
+@router.post("/api/v1/logs", dependencies=[Depends(rate_limit(LOG_INGEST_POLICY))])
 async def ingest_logs(request: Request):
-    data = await request.json()
-    logger.info("frontend.log", **data)
-    # TODO: Forward to DynamoDB/Splunk here
-    return {"status": "ok"}
+    from app.utils.log_ingest import InvalidLogBatch, parse_ndjson_events, parse_json_event
+
+    declared_length = request.headers.get("content-length")
+    if declared_length and declared_length.isdigit() and int(declared_length) > settings.LOG_INGEST_MAX_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Log batches are limited to {settings.LOG_INGEST_MAX_BYTES} bytes"
+        )
+    body = bytearray()
+    async for chunk in request.stream():
+        body.extend(chunk)
+        if len(body) > settings.LOG_INGEST_MAX_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Log batches are limited to {settings.LOG_INGEST_MAX_BYTES} bytes"
+            )
+    
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    try:
+        if content_type in NDJSON_CONTENT_TYPES:
+            events = parse_ndjson_events(bytes(body), settings.LOG_INGEST_MAX_EVENTS)
+        else:
+            events = parse_json_event(bytes(body))
+    except InvalidLogBatch as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    received_at = datetime.now(timezone.utc).isoformat()
+    request_id = structlog.contextvars.get_contextvars().get("request_id")
+    for event in events:
+        event.setdefault("received_at", received_at)
+        event.setdefault("ingest_request_id", request_id)
+    if not request.app.state.log_buffer.offer(events):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Log buffer is full, retry later",
+            headers={"Retry-After": str(max(1, round(settings.LOG_INGEST_FLUSH_INTERVAL_SECONDS)))}
+        )
+    return {"status": "ok", "accepted": len(events)}
+
+app = create_app()
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
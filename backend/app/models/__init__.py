@@ -3,6 +3,7 @@ from .product import Product
 from .cart import Cart, CartItem
 from .order import Order, OrderItem
 from .category import Category
+from .analytics import DailySales, DailyProductSales, DailyCategorySales, DailyOrderStatus
 from ..core.database import Base
 
 __all__ = [
@@ -14,5 +15,9 @@ __all__ = [
     "Order",
     "OrderItem",
     "Category",
+    "DailySales",
+    "DailyProductSales",
+    "DailyCategorySales",
+    "DailyOrderStatus",
     "Base"
 ] 
\ No newline at end of file
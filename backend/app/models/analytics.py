@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, Float, Date, Enum
+from app.core.database import Base
+from app.models.order import OrderStatus
+
+# Rollup tables maintained incrementally by app.utils.analytics as orders are
+# created and change status. Sales figures exclude cancelled orders; status
+# counts include every order, bucketed by the day it was placed.
+
+class DailySales(Base):
+    __tablename__ = "daily_sales"
+    
+    day = Column(Date, primary_key=True)
+    order_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+
+class DailyProductSales(Base):
+    __tablename__ = "daily_product_sales"
+    
+    day = Column(Date, primary_key=True)
+    product_id = Column(Integer, primary_key=True)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+
+class DailyCategorySales(Base):
+    __tablename__ = "daily_category_sales"
+    
+    day = Column(Date, primary_key=True)
+    category_id = Column(Integer, primary_key=True)  # 0 for uncategorized products
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+
+class DailyOrderStatus(Base):
+    __tablename__ = "daily_order_status"
+    
+    day = Column(Date, primary_key=True)
+    status = Column(Enum(OrderStatus), primary_key=True)
+    order_count = Column(Integer, nullable=False, default=0)
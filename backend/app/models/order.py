@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
@@ -12,8 +12,32 @@ class OrderStatus(str, enum.Enum):
     DELIVERED = "delivered"
     CANCELLED = "cancelled"
 
+    def can_transition_to(self, new_status: "OrderStatus") -> bool:
+        return new_status in ORDER_STATUS_TRANSITIONS[self]
+
+    @classmethod
+    def sources_for(cls, new_status: "OrderStatus") -> list:
+        """Statuses from which `new_status` may be entered"""
+        return [status for status, targets in ORDER_STATUS_TRANSITIONS.items() if new_status in targets]
+
+# Order lifecycle state machine: status -> statuses it may move to
+ORDER_STATUS_TRANSITIONS = {
+    OrderStatus.PENDING: {OrderStatus.CONFIRMED, OrderStatus.CANCELLED},
+    OrderStatus.CONFIRMED: {OrderStatus.PREPARING, OrderStatus.CANCELLED},
+    OrderStatus.PREPARING: {OrderStatus.SHIPPED, OrderStatus.CANCELLED},
+    OrderStatus.SHIPPED: {OrderStatus.DELIVERED},
+    OrderStatus.DELIVERED: set(),
+    OrderStatus.CANCELLED: set(),
+}
+
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Admin order list filters on status and pages by created_at
+        Index("ix_orders_status_created_at", "status", "created_at"),
+        # Order history lists one user's orders newest first
+        Index("ix_orders_user_created_at", "user_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -26,7 +50,7 @@ class Order(Base):
     shipping_zip = Column(String, nullable=False)
     shipping_country = Column(String, nullable=False)
     notes = Column(String)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
@@ -37,7 +61,7 @@ class OrderItem(Base):
     __tablename__ = "order_items"
     
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"))
+    order_id = Column(Integer, ForeignKey("orders.id"), index=True)
     product_id = Column(Integer, ForeignKey("products.id"))
     quantity = Column(Integer, nullable=False)
     price_at_time = Column(Float, nullable=False)  # Price when order was placed
@@ -1,10 +1,28 @@
-from sqlalchemy import Column, Integer, String, Text, Float, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Float, Boolean, DateTime, ForeignKey, Index, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
+# Products at or below this stock count are low stock. It is the predicate of
+# the partial index ix_products_low_stock, so it is a constant rather than a
+# setting: changing it takes a migration that recreates the index.
+LOW_STOCK_THRESHOLD = 10
+
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Storefront listing filters on is_active and optionally category_id
+        Index("ix_products_active_category", "is_active", "category_id"),
+        # Partial index covering only low/out-of-stock rows for the admin low-stock report
+        Index(
+            "ix_products_low_stock",
+            "is_active",
+            "category_id",
+            "stock_quantity",
+            postgresql_where=text(f"stock_quantity <= {LOW_STOCK_THRESHOLD}"),
+            sqlite_where=text(f"stock_quantity <= {LOW_STOCK_THRESHOLD}"),
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True, nullable=False)
@@ -28,9 +46,12 @@ class Product(Base):
     
     @property
     def stock_status(self):
-        if self.stock_quantity == 0:
-            return "out_of_stock"
-        elif self.stock_quantity <= 10:
-            return "low_stock"
-        else:
-            return "in_stock" 
\ No newline at end of file
+        return stock_status_for(self.stock_quantity)
+
+def stock_status_for(stock_quantity: int) -> str:
+    if stock_quantity <= 0:
+        return "out_of_stock"
+    elif stock_quantity <= LOW_STOCK_THRESHOLD:
+        return "low_stock"
+    else:
+        return "in_stock" 
\ No newline at end of file
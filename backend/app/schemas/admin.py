@@ -1,5 +1,82 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
 from app.models.order import OrderStatus
+from app.models.user import UserRole
 
 class OrderStatusUpdate(BaseModel):
-    status: OrderStatus 
\ No newline at end of file
+    status: OrderStatus
+
+class BulkOrderStatusUpdate(BaseModel):
+    order_ids: List[int] = Field(..., min_length=1, max_length=1000)
+    status: OrderStatus
+
+class BulkOrderStatusResult(BaseModel):
+    order_id: int
+    outcome: str  # updated, unchanged, not_found or invalid_transition
+    previous_status: Optional[OrderStatus] = None
+
+class BulkOrderStatusResponse(BaseModel):
+    status: OrderStatus
+    updated: int
+    results: List[BulkOrderStatusResult]
+
+class AdminOrderSummary(BaseModel):
+    id: int
+    order_number: str
+    status: OrderStatus
+    total_amount: float
+    user_id: int
+    user_email: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class AdminOrderPage(BaseModel):
+    items: List[AdminOrderSummary]
+    next_cursor: Optional[int] = None  # Pass back as `cursor` to fetch the next page
+    total_estimate: Optional[int] = None  # Only computed for the first page
+
+class UserAdminUpdate(BaseModel):
+    role: Optional[UserRole] = None
+    is_active: Optional[bool] = None
+
+class PoolStats(BaseModel):
+    name: str
+    pool_class: Optional[str] = None
+    size: Optional[int] = None
+    max_overflow: Optional[int] = None
+    timeout_seconds: Optional[float] = None
+    in_use: int
+    idle: Optional[int] = None
+    overflow: int
+    peak_in_use: int
+    peak_overflow: int
+    checkouts: int
+    connects: int
+    invalidations: int
+    timeouts: int
+    wait_samples: int  # Checkouts with a measured wait; SQLite pools do not record waits
+    wait_avg_ms: Optional[float] = None
+    wait_p50_ms: Optional[float] = None
+    wait_p95_ms: Optional[float] = None
+    wait_p99_ms: Optional[float] = None
+    wait_max_ms: Optional[float] = None
+
+class AdminMetrics(BaseModel):
+    pools: List[PoolStats]
+
+class ProfileSummary(BaseModel):
+    id: str
+    created_at: datetime
+    method: str
+    path: str
+    query: Optional[str] = None
+    status_code: int
+    admin_email: str
+    duration_ms: float
+    samples: int
+    sampled_ms: float  # Wall time covered by samples; the rest fell between samples
+    sql_count: int
+    sql_ms: float
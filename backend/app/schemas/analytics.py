@@ -0,0 +1,37 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import date
+from app.models.order import OrderStatus
+
+class DailySalesResponse(BaseModel):
+    day: date
+    order_count: int
+    revenue: float
+
+    class Config:
+        from_attributes = True
+
+class ProductSalesResponse(BaseModel):
+    product_id: int
+    product_name: Optional[str] = None
+    units: int
+    revenue: float
+
+    class Config:
+        from_attributes = True
+
+class CategorySalesResponse(BaseModel):
+    category_id: int
+    category_name: Optional[str] = None
+    units: int
+    revenue: float
+
+    class Config:
+        from_attributes = True
+
+class OrderStatusCountResponse(BaseModel):
+    status: OrderStatus
+    order_count: int
+
+    class Config:
+        from_attributes = True
@@ -14,6 +14,9 @@ class OrderBase(BaseModel):
 class OrderCreate(OrderBase):
     items: List[dict]  # Each dict should have product_id and quantity
 
+class OrderCheckout(OrderBase):
+    pass  # Items are taken from the caller's server-side cart
+
 class OrderItemResponse(BaseModel):
     id: int
     product_id: int
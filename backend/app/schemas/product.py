@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class CategoryBase(BaseModel):
@@ -38,4 +38,38 @@ class ProductResponse(ProductBase):
     category: Optional[CategoryBase] = None
     
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+class ProductImportError(BaseModel):
+    row: int
+    errors: List[str]
+
+class ProductImportReport(BaseModel):
+    created: int = 0
+    updated: int = 0
+    upserted: int = 0  # Rows with an id and a full payload; inserted, or their columns updated
+    failed: int = 0
+    errors: List[ProductImportError] = []
+    errors_truncated: bool = False
+
+class LowStockProduct(BaseModel):
+    id: int
+    name: str
+    stock_quantity: int
+    stock_status: str
+
+class LowStockCategory(BaseModel):
+    category_id: Optional[int] = None
+    category_name: Optional[str] = None
+    low_stock: int
+    out_of_stock: int
+    products: List[LowStockProduct]
+
+class ReplenishmentAlert(BaseModel):
+    product_id: int
+    product_name: str
+    category_id: Optional[int] = None
+    stock_quantity: int
+    stock_status: str
+    previous_status: str
+    detected_at: datetime
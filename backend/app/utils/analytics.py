@@ -0,0 +1,106 @@
+from contextlib import contextmanager
+from typing import Iterator, List
+from sqlalchemy import select, delete, func, literal
+from sqlalchemy.orm import Session
+from app.core.database import dialect_insert
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.product import Product
+from app.models.analytics import DailySales, DailyProductSales, DailyCategorySales, DailyOrderStatus
+
+def _order_day():
+    return func.date(Order.created_at)
+
+def _increment(db: Session, model, keys: List[str], values: List[str], source) -> None:
+    """INSERT ... SELECT `source` into `model`, adding to existing rows on key conflict"""
+    table = model.__table__
+    stmt = dialect_insert(db)(table).from_select(keys + values, source)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c[key] for key in keys],
+        set_={value: table.c[value] + stmt.excluded[value] for value in values}
+    )
+    db.execute(stmt)
+
+def record_sales(db: Session, order_filter, sign: int = 1) -> None:
+    """Add (sign=1) or remove (sign=-1) the matching non-cancelled orders from the sales rollups"""
+    sign = literal(sign)
+    criteria = [order_filter, Order.status != OrderStatus.CANCELLED]
+    day = _order_day()
+    _increment(
+        db, DailySales, ["day"], ["order_count", "revenue"],
+        select(day, func.count(Order.id) * sign, func.sum(Order.total_amount) * sign)
+        .where(*criteria)
+        .group_by(day)
+    )
+    _increment(
+        db, DailyProductSales, ["day", "product_id"], ["units", "revenue"],
+        select(
+            day,
+            OrderItem.product_id,
+            func.sum(OrderItem.quantity) * sign,
+            func.sum(OrderItem.quantity * OrderItem.price_at_time) * sign
+        )
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(*criteria)
+        .group_by(day, OrderItem.product_id)
+    )
+    category_id = func.coalesce(Product.category_id, 0)
+    _increment(
+        db, DailyCategorySales, ["day", "category_id"], ["units", "revenue"],
+        select(
+            day,
+            category_id,
+            func.sum(OrderItem.quantity) * sign,
+            func.sum(OrderItem.quantity * OrderItem.price_at_time) * sign
+        )
+        .join(Order, Order.id == OrderItem.order_id)
+        .join(Product, Product.id == OrderItem.product_id)
+        .where(*criteria)
+        .group_by(day, category_id)
+    )
+
+def record_status(db: Session, order_filter, sign: int = 1) -> None:
+    """Add (sign=1) or remove (sign=-1) the matching orders from the status rollup under their current status"""
+    day = _order_day()
+    _increment(
+        db, DailyOrderStatus, ["day", "status"], ["order_count"],
+        select(day, Order.status, func.count(Order.id) * literal(sign))
+        .where(order_filter)
+        .group_by(day, Order.status)
+    )
+
+def record_new_orders(db: Session, order_ids: List[int]) -> None:
+    """Roll freshly created orders (and their flushed items) into every rollup"""
+    order_filter = Order.id.in_(order_ids)
+    record_sales(db, order_filter)
+    record_status(db, order_filter)
+
+@contextmanager
+def track_status_change(db: Session, order_ids: List[int], new_status: OrderStatus) -> Iterator[None]:
+    """
+    Keep rollups in step with a status update performed inside the block.
+
+    Status counts move from the old to the new status; sales are removed when
+    orders become cancelled and restored when they leave the cancelled state.
+    """
+    order_filter = Order.id.in_(order_ids)
+    record_status(db, order_filter, sign=-1)
+    if new_status == OrderStatus.CANCELLED:
+        record_sales(db, order_filter, sign=-1)
+        reinstated: List[int] = []
+    else:
+        reinstated = list(db.scalars(
+            select(Order.id).where(order_filter, Order.status == OrderStatus.CANCELLED)
+        ))
+    yield
+    db.flush()
+    record_status(db, order_filter)
+    if reinstated:
+        record_sales(db, Order.id.in_(reinstated))
+
+def rebuild_rollups(db: Session) -> None:
+    """Recompute every rollup from the raw orders tables"""
+    for model in (DailySales, DailyProductSales, DailyCategorySales, DailyOrderStatus):
+        db.execute(delete(model))
+    every_order = Order.id.isnot(None)
+    record_sales(db, every_order)
+    record_status(db, every_order)
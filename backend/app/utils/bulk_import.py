@@ -0,0 +1,201 @@
+import codecs
+import csv
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy import select, insert, update, func, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from app.core.database import dialect_insert
+from app.utils.stock_alerts import mark_stock_changed
+from app.models.product import Product
+from app.models.category import Category
+from app.schemas.product import ProductCreate, ProductUpdate, ProductImportError, ProductImportReport
+
+# Cap on the per-row error list so a completely malformed upload cannot grow
+# the response without bound; `failed` still counts every rejected row.
+MAX_REPORTED_ERRORS = 1000
+
+# (row number, parsed fields, parse error)
+ImportRecord = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream incrementally and yield one line at a time"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+async def iter_ndjson_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[ImportRecord]:
+    """Yield one record per non-blank NDJSON line"""
+    row_number = 0
+    async for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield row_number, None, f"invalid JSON: {e}"
+            continue
+        if not isinstance(data, dict):
+            yield row_number, None, "expected a JSON object"
+            continue
+        yield row_number, data, None
+
+async def iter_csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[ImportRecord]:
+    """Yield one record per CSV row, using the first row as the header"""
+    header: Optional[List[str]] = None
+    row_number = 0
+    record_lines: List[str] = []
+    quote_count = 0
+    async for line in iter_lines(chunks):
+        # A record continues onto the next line while a quoted field is open
+        record_lines.append(line)
+        quote_count += line.count('"')
+        if quote_count % 2:
+            continue
+        record = "\n".join(record_lines)
+        record_lines = []
+        quote_count = 0
+        if not record.strip():
+            continue
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row_number += 1
+        if len(values) != len(header):
+            yield row_number, None, f"expected {len(header)} columns, got {len(values)}"
+            continue
+        # Empty cells mean "not provided" rather than an empty string
+        yield row_number, {name: value for name, value in zip(header, values) if value != ""}, None
+    if record_lines:
+        yield row_number + 1, None, "unterminated quoted field"
+
+def add_import_error(report: ProductImportReport, row_number: int, errors: List[str]) -> None:
+    report.failed += 1
+    if len(report.errors) < MAX_REPORTED_ERRORS:
+        report.errors.append(ProductImportError(row=row_number, errors=errors))
+    else:
+        report.errors_truncated = True
+
+def _validation_messages(error: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors()]
+
+def _prepare_row(raw: Dict[str, Any]) -> Tuple[str, Dict[str, Any], frozenset]:
+    """
+    Classify and validate a row.
+
+    Rows without an id are new products (ProductCreate). Rows with an id and
+    a full ProductCreate payload are upserted on that id; rows with an id
+    and only some fields are partial ProductUpdate changes to an existing
+    product.
+
+    Also returns the columns the row itself sets. Defaults (including
+    is_active) only fill in new rows, so an upsert that hits an existing
+    product leaves every other column as it was.
+    """
+    raw = dict(raw)
+    raw_id = raw.pop("id", None)
+    changes = ProductUpdate(**raw).dict(exclude_unset=True)
+    if raw_id is None:
+        return "insert", {"is_active": True, **ProductCreate(**raw).dict(), **changes}, frozenset(changes)
+    try:
+        product_id = int(raw_id)
+    except (TypeError, ValueError):
+        raise ValueError("id: must be an integer")
+    try:
+        values = {"is_active": True, **ProductCreate(**raw).dict(), **changes}
+        return "upsert", {"id": product_id, **values}, frozenset(changes)
+    except ValidationError:
+        return "update", {"id": product_id, **changes}, frozenset(changes)
+
+def _group_by_keys(rows: List[Dict[str, Any]]) -> Dict[frozenset, List[Dict[str, Any]]]:
+    groups: Dict[frozenset, List[Dict[str, Any]]] = {}
+    for row in rows:
+        groups.setdefault(frozenset(row), []).append(row)
+    return groups
+
+def upsert_products(db: Session, batch: List[Tuple[int, Dict[str, Any]]], report: ProductImportReport) -> None:
+    """Validate and write one batch of rows, committing once for the whole batch"""
+    prepared: List[Tuple[int, str, Dict[str, Any], frozenset]] = []
+    for row_number, raw in batch:
+        try:
+            kind, values, columns = _prepare_row(raw)
+        except ValidationError as e:
+            add_import_error(report, row_number, _validation_messages(e))
+            continue
+        except ValueError as e:
+            add_import_error(report, row_number, [str(e)])
+            continue
+        prepared.append((row_number, kind, values, columns))
+    if not prepared:
+        return
+
+    # Resolve foreign keys and update targets with one query each per batch
+    category_ids = {values["category_id"] for _, _, values, _ in prepared if values.get("category_id") is not None}
+    known_categories = set(db.scalars(select(Category.id).where(Category.id.in_(category_ids)))) if category_ids else set()
+    update_ids = {values["id"] for _, kind, values, _ in prepared if kind == "update"}
+    known_products = set(db.scalars(select(Product.id).where(Product.id.in_(update_ids)))) if update_ids else set()
+
+    inserts, upserts, updates = [], [], []
+    for row_number, kind, values, columns in prepared:
+        if values.get("category_id") is not None and values["category_id"] not in known_categories:
+            add_import_error(report, row_number, [f"category_id: category {values['category_id']} not found"])
+        elif kind == "update" and values["id"] not in known_products:
+            add_import_error(report, row_number, [f"id: product {values['id']} not found and row is incomplete for create"])
+        else:
+            {"insert": inserts, "upsert": upserts, "update": updates}[kind].append((row_number, values, columns))
+
+    try:
+        if inserts:
+            db.execute(insert(Product.__table__), [values for _, values, _ in inserts])
+        if upserts:
+            insert_with_conflict = dialect_insert(db)
+            # Every upsert row carries the full insert values; rows are grouped
+            # by the columns they set so the conflict update touches only those
+            by_columns: Dict[frozenset, List[Dict[str, Any]]] = {}
+            for _, values, columns in upserts:
+                by_columns.setdefault(columns, []).append(values)
+            for columns, rows in by_columns.items():
+                stmt = insert_with_conflict(Product.__table__)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[Product.__table__.c.id],
+                    set_={
+                        **{key: stmt.excluded[key] for key in columns},
+                        "updated_at": func.now(),
+                    }
+                )
+                db.execute(stmt, rows)
+        if updates:
+            for rows in _group_by_keys([values for _, values, _ in updates]).values():
+                db.execute(update(Product), rows)
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        for row_number, _, _ in inserts + upserts + updates:
+            add_import_error(report, row_number, [f"batch failed: {type(e).__name__}"])
+        return
+    mark_stock_changed({
+        values["id"]: None for _, values, columns in upserts + updates if "stock_quantity" in columns
+    })
+    report.created += len(inserts)
+    report.updated += len(updates)
+    report.upserted += len(upserts)
+
+def finalize_import(db: Session) -> None:
+    """Move the PostgreSQL id sequence past ids supplied explicitly by upserts"""
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    db.execute(text(
+        "SELECT setval(pg_get_serial_sequence('products', 'id'), "
+        "COALESCE((SELECT MAX(id) FROM products), 1))"
+    ))
+    db.commit()
@@ -0,0 +1,61 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from app.core.metrics import CACHE_LOOKUPS
+
+class TTLCache:
+    """
+    Small thread-safe LRU cache whose entries also expire after `ttl_seconds`.
+
+    Endpoints run in the sync threadpool, so every operation takes a lock; all
+    operations are O(1). Named caches also export their hits and misses as
+    `cache_lookups_total`.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, name: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._hit_counter = CACHE_LOOKUPS.labels(name, "hit") if name else None
+        self._miss_counter = CACHE_LOOKUPS.labels(name, "miss") if name else None
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                hit = False
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                hit = True
+        if self._hit_counter is not None:
+            (self._hit_counter if hit else self._miss_counter).inc()
+        return entry[1] if hit else None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,44 @@
+from typing import Awaitable, Callable, Hashable
+
+from fastapi import Request, Response
+from starlette.concurrency import run_in_threadpool
+
+from app.core.catalog import catalog_version, on_catalog_change
+from app.core.compression import PrecompressedBody
+from app.core.config import settings
+from app.utils.cache import TTLCache
+
+# Serialized, precompressed catalog responses (product pages, category list).
+# Keys include the catalog version, so admin edits take effect immediately;
+# the short TTL bounds how long stock counts changed by orders stay stale.
+catalog_responses = TTLCache(settings.CATALOG_CACHE_MAX_ENTRIES, settings.CATALOG_CACHE_TTL_SECONDS, name="catalog_response")
+
+@on_catalog_change
+def _drop_stale_responses(version: int) -> None:
+    catalog_responses.clear()
+
+def _respond(request: Request, cached: PrecompressedBody) -> Response:
+    encoding, body = cached.select(request.headers.get("accept-encoding", ""))
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type="application/json", headers=headers)
+
+async def cached_catalog_response(
+    request: Request, key: Hashable, load: Callable[[], Awaitable[Callable[[], bytes]]]
+) -> Response:
+    """
+    Serve the catalog response cached under `key`, building it on a miss.
+
+    `load` runs the queries and returns a function rendering the JSON body;
+    rendering and compression run in the threadpool.
+    """
+    versioned_key = (catalog_version(), key)
+    cached = catalog_responses.get(versioned_key)
+    if cached is None:
+        render = await load()
+        cached = await run_in_threadpool(lambda: PrecompressedBody.build(render()))
+        # Stored under the version read before loading, so a response built
+        # across an invalidation is never served for the new version
+        catalog_responses.set(versioned_key, cached)
+    return _respond(request, cached)
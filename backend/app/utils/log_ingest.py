@@ -0,0 +1,166 @@
+import asyncio
+from abc import ABC, abstractmethod
+import glob
+import gzip
+import json
+import os
+import shutil
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, List
+from starlette.concurrency import run_in_threadpool
+from app.core.logging import get_logger
+from app.core.metrics import LOG_INGEST_EVENTS
+
+logger = get_logger("log_ingest")
+
+# Events handed to the sink per write
+SINK_BATCH_SIZE = 1000
+
+class LogSink(ABC):
+    """Destination for ingested frontend events; called from a worker thread"""
+
+    @abstractmethod
+    def write_batch(self, events: List[dict]) -> None:
+        ...
+
+    def close(self) -> None:
+        pass
+
+class RotatingFileSink(LogSink):
+    """
+    Append events as NDJSON to a per-process file in `directory`. Once the file
+    reaches `max_bytes` it is gzipped to a timestamped archive and a new file
+    is started; only the newest `backup_count` archives are kept.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, backup_count: int, prefix: str = "frontend"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        # One file per worker process so concurrent workers never interleave lines
+        self.prefix = f"{prefix}.{os.getpid()}"
+        self.path = os.path.join(directory, f"{self.prefix}.ndjson")
+        self._file = None
+
+    def _open(self):
+        if self._file is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        return self._file
+
+    def write_batch(self, events: List[dict]) -> None:
+        file = self._open()
+        file.write("".join(json.dumps(event, default=str) + "\n" for event in events))
+        file.flush()
+        if file.tell() >= self.max_bytes:
+            self.rotate()
+
+    def rotate(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        archive = os.path.join(self.directory, f"{self.prefix}.{stamp}.ndjson.gz")
+        with open(self.path, "rb") as source, gzip.open(archive, "wb") as target:
+            shutil.copyfileobj(source, target)
+        os.remove(self.path)
+        archives = sorted(glob.glob(os.path.join(self.directory, f"{self.prefix}.*.ndjson.gz")))
+        for old_archive in archives[:-self.backup_count] if self.backup_count else archives:
+            os.remove(old_archive)
+
+    def close(self) -> None:
+        self.rotate()
+
+class LogBuffer:
+    """
+    Bounded in-memory queue of events between the ingest endpoint and the
+    drain task. Only touched from the event loop, so it needs no lock.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._events: Deque[dict] = deque()
+        self._ready = asyncio.Event()
+        self.closed = False
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def offer(self, events: List[dict]) -> bool:
+        """Queue all of `events`, or none of them if they do not fit"""
+        if self.closed or len(self._events) + len(events) > self.capacity:
+            LOG_INGEST_EVENTS.labels("rejected").inc(len(events))
+            return False
+        self._events.extend(events)
+        LOG_INGEST_EVENTS.labels("accepted").inc(len(events))
+        if len(self._events) >= SINK_BATCH_SIZE:
+            self._ready.set()
+        return True
+
+    def take(self, limit: int) -> List[dict]:
+        count = min(limit, len(self._events))
+        return [self._events.popleft() for _ in range(count)]
+
+    def close(self) -> None:
+        """Stop accepting events and wake the drain task to flush what is left"""
+        self.closed = True
+        self._ready.set()
+
+    async def wait(self, timeout: float) -> None:
+        """Wait until a full batch is queued or `timeout` passes"""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._ready.clear()
+
+class InvalidLogBatch(ValueError):
+    pass
+
+def parse_ndjson_events(body: bytes, max_events: int) -> List[dict]:
+    """Parse one JSON object per line, skipping blank lines"""
+    events = []
+    for number, line in enumerate(body.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            event = json.loads(line)
+        except ValueError as e:
+            raise InvalidLogBatch(f"Line {number} is not valid JSON: {e}")
+        if not isinstance(event, dict):
+            raise InvalidLogBatch(f"Line {number} is not a JSON object")
+        events.append(event)
+        if len(events) > max_events:
+            raise InvalidLogBatch(f"Batches are limited to {max_events} events")
+    return events
+
+def parse_json_event(body: bytes) -> List[dict]:
+    """Parse a single JSON object, the original one-event-per-request format"""
+    try:
+        event = json.loads(body)
+    except ValueError as e:
+        raise InvalidLogBatch(f"Body is not valid JSON: {e}")
+    if not isinstance(event, dict):
+        raise InvalidLogBatch("Body is not a JSON object")
+    return [event]
+
+def _write_safely(sink: LogSink, events: List[dict]) -> None:
+    try:
+        sink.write_batch(events)
+    except Exception as e:
+        LOG_INGEST_EVENTS.labels("failed").inc(len(events))
+        logger.error("log_ingest.sink_error", error=str(e), error_type=type(e).__name__, events=len(events))
+
+async def run_log_drain(buffer: LogBuffer, sink: LogSink, interval_seconds: float) -> None:
+    """
+    Background loop moving buffered events to `sink` in batches. Returns once
+    the buffer is closed and everything in it has been written.
+    """
+    while not buffer.closed:
+        await buffer.wait(interval_seconds)
+        while len(buffer):
+            await run_in_threadpool(_write_safely, sink, buffer.take(SINK_BATCH_SIZE))
+    await run_in_threadpool(sink.close)
@@ -0,0 +1,87 @@
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select, update, func
+from sqlalchemy.orm import Session
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.product import Product
+from app.core.catalog import invalidate_catalog
+from app.utils.analytics import track_status_change
+from app.utils.stock_alerts import mark_stock_changed
+
+# Per-order outcomes reported by apply_status_transition
+UPDATED = "updated"
+UNCHANGED = "unchanged"
+NOT_FOUND = "not_found"
+INVALID_TRANSITION = "invalid_transition"
+
+def restock_orders(db: Session, order_ids: List[int]) -> Dict[int, int]:
+    """
+    Return the items of the given orders to stock with a single UPDATE ... FROM.
+    Returns {product_id: stock before the restock} for mark_stock_changed.
+    """
+    previous_stock = dict(db.execute(
+        select(Product.id, Product.stock_quantity)
+        .where(Product.id.in_(select(OrderItem.product_id).where(OrderItem.order_id.in_(order_ids))))
+    ).all())
+    lines = (
+        select(OrderItem.product_id, func.sum(OrderItem.quantity).label("quantity"))
+        .where(OrderItem.order_id.in_(order_ids))
+        .group_by(OrderItem.product_id)
+        .subquery()
+    )
+    db.execute(
+        update(Product)
+        .where(Product.id == lines.c.product_id)
+        .values(stock_quantity=Product.stock_quantity + lines.c.quantity)
+        .execution_options(synchronize_session=False)
+    )
+    return previous_stock
+
+def apply_status_transition(
+    db: Session, order_ids: List[int], new_status: OrderStatus
+) -> Tuple[Dict[int, Tuple[str, Optional[OrderStatus]]], Dict[int, int]]:
+    """
+    Move the given orders to `new_status` where the state machine allows it.
+
+    Current statuses are read (and locked) in one query, legal orders are
+    updated with one set-based UPDATE, and cancellations restock their items
+    in the same transaction. Returns {order_id: (outcome, previous_status)}
+    and the restocked products' previous stock. The caller commits, then
+    passes any restocked products to publish_restock.
+    """
+    current = dict(db.execute(
+        select(Order.id, Order.status).where(Order.id.in_(order_ids)).with_for_update()
+    ).all())
+    outcomes: Dict[int, Tuple[str, Optional[OrderStatus]]] = {}
+    eligible = []
+    for order_id in order_ids:
+        previous = current.get(order_id)
+        if previous is None:
+            outcomes[order_id] = (NOT_FOUND, None)
+        elif previous == new_status:
+            outcomes[order_id] = (UNCHANGED, previous)
+        elif not previous.can_transition_to(new_status):
+            outcomes[order_id] = (INVALID_TRANSITION, previous)
+        else:
+            outcomes[order_id] = (UPDATED, previous)
+            eligible.append(order_id)
+    restocked: Dict[int, int] = {}
+    if not eligible:
+        return outcomes, restocked
+    
+    with track_status_change(db, eligible, new_status):
+        if new_status == OrderStatus.CANCELLED:
+            restocked = restock_orders(db, eligible)
+        db.execute(
+            update(Order)
+            .where(Order.id.in_(eligible), Order.status.in_(OrderStatus.sources_for(new_status)))
+            .values(status=new_status)
+            .execution_options(synchronize_session=False)
+        )
+    return outcomes, restocked
+
+def publish_restock(restocked: Dict[int, int]) -> None:
+    """After commit: queue restocked products for the stock scanner and refresh cached catalog pages"""
+    if not restocked:
+        return
+    mark_stock_changed(restocked)
+    invalidate_catalog("orders.restocked")
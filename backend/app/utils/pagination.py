@@ -0,0 +1,33 @@
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session, Query
+
+def estimate_table_rows(db: Session, table_name: str) -> Optional[int]:
+    """
+    Return the planner's row estimate for a whole table.
+
+    Reads `pg_class.reltuples` on PostgreSQL, which is maintained by
+    ANALYZE/autovacuum and costs a single catalog lookup instead of a full
+    scan. Returns None on other backends or when the table has never been
+    analyzed.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    estimate = db.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table_name)"),
+        {"table_name": table_name}
+    ).scalar()
+    if estimate is None or estimate < 0:
+        return None
+    return int(estimate)
+
+def count_rows(db: Session, query: Query, table_name: str, filtered: bool) -> int:
+    """
+    Count the rows matched by `query`, using the cheap table estimate when
+    the query is unfiltered and the backend provides one.
+    """
+    if not filtered:
+        estimate = estimate_table_rows(db, table_name)
+        if estimate is not None:
+            return estimate
+    return query.order_by(None).count()
@@ -1,4 +1,3 @@
-from fuzzywuzzy import fuzz
 from typing import List, Tuple
 import re
 
@@ -18,12 +17,16 @@ def calculate_similarity_score(query: str, target: str) -> float:
         return 0.0
     
     # Normalize both strings
-    query_norm = normalize_text(query)
-    target_norm = normalize_text(target)
-    
+    return score_normalized(normalize_text(query), normalize_text(target))
+
+def score_normalized(query_norm: str, target_norm: str) -> float:
+    """calculate_similarity_score for strings already passed through normalize_text"""
     if not query_norm or not target_norm:
         return 0.0
     
+    # Imported on first search instead of at app start
+    from fuzzywuzzy import fuzz
+    
     # Use multiple fuzzy matching algorithms for better results
     ratio = fuzz.ratio(query_norm, target_norm)
     partial_ratio = fuzz.partial_ratio(query_norm, target_norm)
@@ -121,4 +124,51 @@ def get_search_suggestions(query: str, products: List[dict], max_suggestions: in
                         suggestions.add(word)
     
     # Return top suggestions
-    return list(suggestions)[:max_suggestions] 
\ No newline at end of file
+    return list(suggestions)[:max_suggestions]
+
+def fuzzy_search_segment(query: str, segment, rows, threshold: float = 60.0) -> List[int]:
+    """
+    fuzzy_search over catalog segment rows, scoring the normalized text stored
+    in the segment instead of normalizing every product per query.
+    
+    Returns the matching rows in the order given.
+    """
+    query_norm = normalize_text(query)
+    if not query_norm:
+        return []
+    
+    matches = []
+    for row in rows:
+        max_score = max(
+            score_normalized(query_norm, segment.string("name_search", row)),
+            score_normalized(query_norm, segment.string("description_search", row)),
+            score_normalized(query_norm, segment.string("category_search", row)),
+        )
+        if max_score >= threshold:
+            matches.append(row)
+    return matches
+
+def substring_search_segment(query: str, segment, rows) -> List[int]:
+    """Rows whose product name contains `query`, ignoring case, like the ILIKE search"""
+    query_lower = query.lower()
+    return [row for row in rows if query_lower in segment.string("name", row).lower()]
+
+def get_search_suggestions_segment(query: str, segment, rows, max_suggestions: int = 5) -> List[str]:
+    """get_search_suggestions over catalog segment rows"""
+    if not query:
+        return []
+    
+    suggestions = set()
+    query_lower = query.lower()
+    
+    for row in rows:
+        for text in (segment.string("name", row), segment.string("category_name", row)):
+            if not text:
+                continue
+            text = text.lower()
+            if query_lower in text:
+                for word in text.split():
+                    if query_lower in word and len(word) > len(query):
+                        suggestions.add(word)
+    
+    return list(suggestions)[:max_suggestions]
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+from app.core.database import SessionLocal
+from app.models.product import Product, stock_status_for
+from app.core.logging import get_logger
+
+logger = get_logger("stock_alerts")
+
+# Products whose stock changed since the last scan, mapped to the quantity
+# they had before the first change in this window (None when unknown).
+_pending: Dict[int, Optional[int]] = {}
+_pending_lock = threading.Lock()
+# Last stock status the scanner observed per product
+_last_status: Dict[int, str] = {}
+recent_alerts: Deque[dict] = deque(maxlen=200)
+
+def mark_stock_changed(previous_quantities: Dict[int, Optional[int]]) -> None:
+    """Queue products for the next scan; call after committing a stock change"""
+    with _pending_lock:
+        for product_id, quantity in previous_quantities.items():
+            if _pending.get(product_id) is None:
+                _pending[product_id] = quantity
+
+def scan_pending_stock() -> List[dict]:
+    """
+    Evaluate only the products queued since the last scan and emit an alert
+    for each one that crossed into low or out of stock.
+    """
+    global _pending
+    with _pending_lock:
+        pending, _pending = _pending, {}
+    if not pending:
+        return []
+    
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            select(Product.id, Product.name, Product.category_id, Product.stock_quantity)
+            .where(Product.id.in_(list(pending)), Product.is_active == True)
+        ).all()
+    finally:
+        db.close()
+    
+    alerts = []
+    for row in rows:
+        status = stock_status_for(row.stock_quantity)
+        previous_quantity = pending[row.id]
+        if previous_quantity is not None:
+            previous_status = stock_status_for(previous_quantity)
+        else:
+            previous_status = _last_status.get(row.id, status)
+        _last_status[row.id] = status
+        if status == previous_status or status == "in_stock":
+            continue
+        alert = {
+            "product_id": row.id,
+            "product_name": row.name,
+            "category_id": row.category_id,
+            "stock_quantity": row.stock_quantity,
+            "stock_status": status,
+            "previous_status": previous_status,
+            "detected_at": datetime.now(timezone.utc),
+        }
+        recent_alerts.appendleft(alert)
+        alerts.append(alert)
+        logger.warning("stock.replenishment_alert", **{**alert, "detected_at": alert["detected_at"].isoformat()})
+    return alerts
+
+async def run_stock_scanner(interval_seconds: float) -> None:
+    """Background loop that scans queued stock changes every `interval_seconds`"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await run_in_threadpool(scan_pending_stock)
+        except Exception as e:
+            logger.error("stock.scan_error", error=str(e), error_type=type(e).__name__)
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Rebuild the sales analytics rollup tables from existing orders
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.database import SessionLocal
+from app.core.migrations import upgrade_database
+from app.utils.analytics import rebuild_rollups
+from app.core.logging import get_logger
+
+logger = get_logger("backfill_analytics")
+
+def backfill():
+    db = SessionLocal()
+    try:
+        rebuild_rollups(db)
+        db.commit()
+        logger.info("analytics.backfilled")
+    except Exception as e:
+        logger.error("analytics.backfill_error", error=str(e))
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    # Create the rollup tables if they don't exist
+    upgrade_database()
+    backfill()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Load test the async read endpoints at increasing concurrency levels.
+
+Sync endpoints share the anyio threadpool (40 threads by default), so no more
+than 40 of them can be in progress at once however many connections the
+database allows. The read endpoints run on the async session stack instead;
+this drives them well past that limit and reports throughput, latency
+percentiles and, for the in-process app, the peak number of requests the app
+was handling at the same time:
+
+    python benchmarks/async_concurrency.py --levels 10 40 80 160
+    python benchmarks/async_concurrency.py --base-url http://localhost:8000
+
+Point DATABASE_URL at PostgreSQL to exercise asyncpg; by default the app runs
+in-process against a throwaway SQLite database through aiosqlite.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+class InFlightCounter:
+    """ASGI wrapper recording the most requests in progress at once."""
+
+    def __init__(self, app):
+        self.app = app
+        self.current = 0
+        self.peak = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        self.current += 1
+        self.peak = max(self.peak, self.current)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.current -= 1
+
+def seed(products):
+    from app.core.database import SessionLocal
+    from app.core.migrations import upgrade_database
+    from app.models import Category, Product
+
+    upgrade_database()
+    db = SessionLocal()
+    try:
+        if db.query(Product).count() >= products:
+            return
+        category = Category(name="Benchmark", description="Load test products")
+        db.add(category)
+        db.flush()
+        db.add_all(
+            Product(name=f"Product {i}", description="benchmark", price=1 + i % 50,
+                    stock_quantity=100, category_id=category.id)
+            for i in range(products)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+async def run(args):
+    import httpx
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    counter = None
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=60,
+                                   limits=httpx.Limits(max_connections=max(args.levels)))
+    else:
+        from app.main import app
+        seed(args.products)
+        counter = InFlightCounter(app)
+        client = httpx.AsyncClient(app=counter, base_url="http://localhost", timeout=60)
+
+    async with client:
+        email = "async-bench@example.com"
+        await client.post("/api/v1/auth/register", json={
+            "email": email, "username": "async-bench", "password": "bench-password"
+        })
+        response = await client.post("/api/v1/auth/login", json={"email": email, "password": "bench-password"})
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        paths = ["/api/v1/products/?limit=20", "/api/v1/categories/",
+                 "/api/v1/orders/", "/api/v1/cart/"]
+
+        print(f"{'level':>6} {'requests':>9} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'peak':>6}")
+        for level in args.levels:
+            latencies = []
+            errors = 0
+            if counter is not None:
+                counter.peak = 0
+
+            async def worker(offset):
+                nonlocal errors
+                for i in range(args.requests_per_client):
+                    started = time.perf_counter()
+                    response = await client.get(paths[(offset + i) % len(paths)], headers=headers)
+                    latencies.append(time.perf_counter() - started)
+                    if response.status_code != 200:
+                        errors += 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(n) for n in range(level)))
+            elapsed = time.perf_counter() - started
+            peak = counter.peak if counter is not None else "-"
+            print(f"{level:>6} {len(latencies):>9} {len(latencies) / elapsed:>8.1f} "
+                  f"{statistics.median(latencies) * 1000:>8.1f} "
+                  f"{percentile(latencies, 0.99) * 1000:>8.1f} {errors:>7} {peak:>6}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", type=int, nargs="+", default=[10, 40, 80, 160],
+                        help="Concurrent clients for each round")
+    parser.add_argument("--requests-per-client", type=int, default=20)
+    parser.add_argument("--products", type=int, default=500, help="Catalog size to seed in-process")
+    parser.add_argument("--base-url", help="Load test a running server instead of the in-process app")
+    args = parser.parse_args()
+
+    if not args.base_url:
+        # Settings are read at import time, so configure before importing the app
+        os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+        os.environ.setdefault("BCRYPT_ROUNDS", "4")
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+"""
+Load test the API with scripted user journeys and report per-endpoint SLOs.
+
+Virtual users log in once, then run journeys drawn from a weighted mix until
+the duration is up, with no think time:
+
+    browse    category list, a page of one category's products, product details
+    search    product search and suggestions for a misspelled product name
+    cart      add 50 lines to the cart, then view it
+    checkout  view the cart and check it out, refilling it first when empty
+    history   order history
+    admin     list orders in one status and move a few to the next status
+
+Before the run the admin account tops up the stock of the products journeys
+buy from, and of anything already in the users' carts, so hot SKUs do not sell
+out mid-run; run it against development data only.
+
+Requests are grouped by route template (GET /api/v1/products/{product_id}) and
+reported with throughput, p50/p95/p99 latency, errors by status code, and the
+DB query count and time per request from the Server-Timing header.
+
+    python benchmarks/load_test.py --users 20 --duration 30 --save baseline.json
+    python benchmarks/load_test.py --users 20 --duration 30 --compare baseline.json
+    python benchmarks/load_test.py --compare baseline.json current.json
+    DATABASE_URL=postgresql://... python benchmarks/load_test.py --size medium
+    python benchmarks/load_test.py --base-url http://localhost:8000
+
+By default the app runs in-process against a throwaway SQLite database seeded
+with seed_data.py's small preset. With DATABASE_URL set, the existing data is
+used unless --size asks for a reseed. A server under test needs seeded data,
+SERVER_TIMING_ENABLED=true for query counts, and RATE_LIMIT_ENABLED=false.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+JOURNEYS = ["browse", "search", "cart", "checkout", "history", "admin"]
+DEFAULT_MIX = "browse=30,search=20,cart=10,checkout=10,history=20,admin=10"
+CART_LINES = 50
+CHECKOUT_REFILL_LINES = 5
+ADMIN_UPDATES = 3  # Orders moved per admin journey
+CATALOG_PAGES = 10  # Product pages of 100 fetched at startup to pick from
+HOT_SKU_SKEW = 3.0  # Same popularity skew as seed_data.py: low product ids are picked most
+RESTOCK_QUANTITY = 100000  # Stock the picked products are topped up to before the run
+NEXT_STATUS = {"pending": "confirmed", "confirmed": "preparing", "preparing": "shipped", "shipped": "delivered"}
+SHIPPING = {
+    "shipping_address": "1 Load Test Way",
+    "shipping_city": "San Francisco",
+    "shipping_state": "CA",
+    "shipping_zip": "94105",
+    "shipping_country": "USA",
+}
+SERVER_TIMING = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+# Regression thresholds for --compare
+LATENCY_TOLERANCE = 0.25  # p95/p99 this much slower...
+MIN_LATENCY_DELTA_MS = 2.0  # ...and by at least this much, so sub-millisecond noise is ignored
+THROUGHPUT_TOLERANCE = 0.15
+ERROR_RATE_DELTA = 0.01
+QUERIES_DELTA = 0.5  # Mean statements per request
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def misspell(rng: random.Random, word: str) -> str:
+    """`word` with one dropped, swapped, doubled or replaced letter"""
+    if len(word) < 4:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    kind = rng.randrange(4)
+    if kind == 0:
+        return word[:i] + word[i + 1:]
+    if kind == 1:
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    if kind == 2:
+        return word[:i] + word[i] + word[i:]
+    return word[:i] + rng.choice("aeiou") + word[i + 1:]
+
+class Stats:
+    """Samples for one endpoint or journey"""
+
+    def __init__(self):
+        self.latencies = []
+        self.statuses = Counter()
+        self.errors = 0
+        self.queries = []
+        self.db_ms = []
+
+    def summary(self, seconds: float) -> dict:
+        ms = [latency * 1000 for latency in self.latencies]
+        count = len(ms)
+        return {
+            "requests": count,
+            "throughput_rps": round(count / seconds, 2),
+            "errors": self.errors,
+            "error_rate": round(self.errors / count, 4) if count else 0.0,
+            "statuses": dict(sorted(self.statuses.items())),
+            "p50_ms": round(percentile(ms, 0.50), 2) if ms else None,
+            "p95_ms": round(percentile(ms, 0.95), 2) if ms else None,
+            "p99_ms": round(percentile(ms, 0.99), 2) if ms else None,
+            "max_ms": round(max(ms), 2) if ms else None,
+            "queries_mean": round(sum(self.queries) / len(self.queries), 2) if self.queries else None,
+            "queries_max": max(self.queries) if self.queries else None,
+            "db_ms_mean": round(sum(self.db_ms) / len(self.db_ms), 2) if self.db_ms else None,
+        }
+
+class Recorder:
+    """Collects samples once the warm-up is over"""
+
+    def __init__(self):
+        self.recording = False
+        self.endpoints = defaultdict(Stats)
+        self.journeys = defaultdict(Stats)
+        self.total = Stats()
+
+    def request(self, name: str, seconds: float, status, ok: bool, server_timing: str) -> None:
+        if not self.recording:
+            return
+        for stats in (self.endpoints[name], self.total):
+            stats.latencies.append(seconds)
+            stats.statuses[str(status)] += 1
+            stats.errors += not ok
+            match = SERVER_TIMING.search(server_timing or "")
+            if match:
+                stats.db_ms.append(float(match.group(1)))
+                stats.queries.append(int(match.group(2)))
+
+    def journey(self, name: str, seconds: float, ok: bool) -> None:
+        if not self.recording:
+            return
+        stats = self.journeys[name]
+        stats.latencies.append(seconds)
+        stats.statuses["ok" if ok else "failed"] += 1
+        stats.errors += not ok
+
+    def report(self, seconds: float, meta: dict) -> dict:
+        return {
+            "meta": meta,
+            "summary": self.total.summary(seconds),
+            "endpoints": {name: stats.summary(seconds) for name, stats in sorted(self.endpoints.items())},
+            "journeys": {name: stats.summary(seconds) for name, stats in sorted(self.journeys.items())},
+        }
+
+class Catalog:
+    """Categories and products fetched once at startup for journeys to pick from"""
+
+    def __init__(self, categories: list, products: list):
+        self.categories = categories
+        self.products = products
+
+    def pick(self, rng: random.Random, count: int) -> list:
+        """`count` distinct products, skewed towards hot SKUs"""
+        count = min(count, len(self.products))
+        picked = {}
+        while len(picked) < count:
+            product = self.products[min(len(self.products) - 1, int(len(self.products) * rng.random() ** HOT_SKU_SKEW))]
+            picked[product["id"]] = product
+        return list(picked.values())
+
+class VirtualUser:
+    def __init__(self, client, recorder: Recorder, catalog: Catalog, rng: random.Random, headers: dict, admin_headers: dict):
+        self.client = client
+        self.recorder = recorder
+        self.catalog = catalog
+        self.rng = rng
+        self.headers = headers
+        self.admin_headers = admin_headers
+        self.ok = True
+
+    async def call(self, method: str, template: str, expected=(200,), admin=False, params=None, json=None,
+                   variant=None, **path):
+        """
+        Send one request, recorded under `template` plus `variant` for requests
+        to the same route that do very different work; returns the response,
+        or None when the status is not in `expected`.
+        """
+        import httpx
+
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(
+                method, template.format(**path), params=params, json=json,
+                headers=self.admin_headers if admin else self.headers,
+            )
+            status = response.status_code
+        except httpx.HTTPError as exc:
+            response, status = None, type(exc).__name__
+        ok = status in expected
+        self.recorder.request(
+            f"{method} {template}" + (f" [{variant}]" if variant else ""), time.perf_counter() - started, status, ok,
+            response.headers.get("server-timing") if response is not None else None,
+        )
+        self.ok = self.ok and ok
+        return response if ok else None
+
+    async def browse(self):
+        await self.call("GET", "/api/v1/categories/")
+        category_id = self.rng.choice(self.catalog.categories)
+        await self.call("GET", "/api/v1/categories/{category_id}", category_id=category_id)
+        page = await self.call("GET", "/api/v1/products/", params={
+            "category_id": category_id, "limit": 20, "skip": 20 * self.rng.randrange(3),
+        })
+        products = page.json() if page is not None else []
+        for product in self.rng.sample(products, min(2, len(products))):
+            await self.call("GET", "/api/v1/products/{product_id}", product_id=product["id"])
+
+    async def search(self):
+        name = self.catalog.pick(self.rng, 1)[0]["name"]
+        words = [word for word in name.split() if len(word) >= 4] or name.split()
+        query = misspell(self.rng, self.rng.choice(words))
+        await self.call("GET", "/api/v1/products/", params={"search": query, "limit": 20}, variant="search")
+        await self.call("GET", "/api/v1/products/search/suggestions", params={"query": query[:4]})
+
+    async def add_lines(self, count: int):
+        for product in self.catalog.pick(self.rng, count):
+            await self.call("POST", "/api/v1/cart/items", json={"product_id": product["id"], "quantity": 1})
+
+    async def cart(self):
+        await self.add_lines(CART_LINES)
+        await self.call("GET", "/api/v1/cart/")
+
+    async def checkout(self):
+        cart = await self.call("GET", "/api/v1/cart/")
+        if cart is not None and not cart.json()["items"]:
+            await self.add_lines(CHECKOUT_REFILL_LINES)
+        await self.call("POST", "/api/v1/orders/checkout", json=SHIPPING)
+
+    async def history(self):
+        await self.call("GET", "/api/v1/orders/")
+
+    async def admin(self):
+        current = self.rng.choice(list(NEXT_STATUS))
+        page = await self.call("GET", "/api/v1/admin/orders", admin=True, params={"status": current, "limit": 20})
+        orders = page.json()["items"] if page is not None else []
+        for order in self.rng.sample(orders, min(ADMIN_UPDATES, len(orders))):
+            # Another admin user may have moved the order first
+            await self.call(
+                "PUT", "/api/v1/admin/orders/{order_id}/status", expected=(200, 409), admin=True,
+                json={"status": NEXT_STATUS[current]}, order_id=order["id"],
+            )
+
+    async def run(self, mix: dict, deadline: float):
+        names, weights = list(mix), list(mix.values())
+        while time.monotonic() < deadline:
+            journey = self.rng.choices(names, weights)[0]
+            self.ok = True
+            started = time.perf_counter()
+            await getattr(self, journey)()
+            self.recorder.journey(journey, time.perf_counter() - started, self.ok)
+
+async def login(client, email: str, password: str):
+    response = await client.post("/api/v1/auth/login", json={"email": email, "password": password})
+    if response.status_code != 200:
+        return None
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+async def customer_headers(client, n: int, password: str) -> dict:
+    """Log in as seed_data.py's nth generated customer, registering a load-test account if there is none"""
+    headers = await login(client, f"shopper{n}@example.com", password)
+    if headers is None:
+        email = f"loadtest{n}@example.com"
+        await client.post("/api/v1/auth/register", json={"email": email, "username": f"loadtest{n}", "password": password})
+        headers = await login(client, email, password)
+    if headers is None:
+        raise SystemExit(f"Could not log in or register virtual user {n}")
+    return headers
+
+async def load_catalog(client) -> Catalog:
+    categories = [category["id"] for category in (await client.get("/api/v1/categories/")).json()]
+    products = []
+    for page in range(CATALOG_PAGES):
+        batch = (await client.get("/api/v1/products/", params={"skip": page * 100, "limit": 100})).json()
+        products.extend(product for product in batch if product["is_active"])
+        if len(batch) < 100:
+            break
+    if not categories or not products:
+        raise SystemExit("The catalog is empty; seed it with seed_data.py --size small first")
+    return Catalog(categories, products)
+
+async def restock(client, admin_headers: dict, catalog: Catalog, headers: list) -> None:
+    """Top up the catalog pool and every product already in a user's cart"""
+    product_ids = {product["id"] for product in catalog.products if product["stock_quantity"] < RESTOCK_QUANTITY}
+    for user_headers in headers:
+        cart = (await client.get("/api/v1/cart/", headers=user_headers)).json()
+        product_ids.update(item["product_id"] for item in cart["items"])
+    for product_id in sorted(product_ids):
+        response = await client.put(f"/api/v1/admin/products/{product_id}", headers=admin_headers,
+                                    json={"stock_quantity": RESTOCK_QUANTITY})
+        if response.status_code != 200:
+            raise SystemExit(f"Could not restock product {product_id}: {response.status_code} {response.text}")
+
+async def drive(client, args, mix: dict, target: str, database: str) -> dict:
+    admin_headers = await login(client, args.admin_email, args.admin_password)
+    if admin_headers is None:
+        raise SystemExit(f"Could not log in as admin {args.admin_email}")
+    catalog = await load_catalog(client)
+    headers = [await customer_headers(client, n, args.password) for n in range(1, args.users + 1)]
+    await restock(client, admin_headers, catalog, headers)
+
+    recorder = Recorder()
+    users = [
+        VirtualUser(client, recorder, catalog, random.Random(f"{args.seed}:{n}"), headers[n], admin_headers)
+        for n in range(args.users)
+    ]
+    deadline = time.monotonic() + args.warmup + args.duration
+    tasks = [asyncio.create_task(user.run(mix, deadline)) for user in users]
+    await asyncio.sleep(args.warmup)
+    recorder.recording = True
+    started = time.monotonic()
+    await asyncio.gather(*tasks)
+    elapsed = time.monotonic() - started
+
+    return recorder.report(elapsed, {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "target": target,
+        "database": database,
+        "users": args.users,
+        "duration_seconds": round(elapsed, 2),
+        "warmup_seconds": args.warmup,
+        "seed": args.seed,
+        "mix": mix,
+    })
+
+async def run(args, mix: dict) -> dict:
+    import httpx
+    import logging
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=60,
+                                     limits=httpx.Limits(max_connections=args.users + 1)) as client:
+            return await drive(client, args, mix, args.base_url, "unknown")
+
+    from sqlalchemy.engine import make_url
+    from app.core.config import settings
+    from app.core.migrations import upgrade_database
+    from app.main import app
+
+    upgrade_database()
+    if args.size:
+        from seed_data import PRESETS, generate_data
+        end = datetime.combine(datetime.now(timezone.utc).date() + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+        generate_data(PRESETS[args.size], args.seed, end, 5000)
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(app=app, base_url="http://localhost", timeout=60) as client:
+            return await drive(client, args, mix, "in-process", make_url(settings.DATABASE_URL).get_backend_name())
+
+def print_report(report: dict) -> None:
+    meta, summary = report["meta"], report["summary"]
+    print(f"\n{meta['target']} ({meta['database']}), {meta['users']} users, {meta['duration_seconds']}s: "
+          f"{summary['requests']} requests, {summary['throughput_rps']} req/s, "
+          f"{summary['error_rate'] * 100:.2f}% errors\n")
+    print(f"{'endpoint':<48} {'requests':>8} {'req/s':>8} {'err %':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8}")
+    for section in ("endpoints", "journeys"):
+        if section == "journeys":
+            print(f"\n{'journey':<48}")
+        for name, stats in report[section].items():
+            queries = "-" if stats["queries_mean"] is None else f"{stats['queries_mean']:g}"
+            print(f"{name:<48} {stats['requests']:>8} {stats['throughput_rps']:>8} {stats['error_rate'] * 100:>6.2f} "
+                  f"{stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['p99_ms']:>8} {queries:>8}")
+
+def compare(baseline: dict, current: dict) -> int:
+    """Print changes from `baseline` to `current`; returns the number of regressions"""
+    regressions = []
+    changes = []
+
+    def check(name, metric, before, after):
+        if before is None or after is None:
+            return
+        if metric in ("p95_ms", "p99_ms"):
+            worse = after > before * (1 + LATENCY_TOLERANCE) and after - before >= MIN_LATENCY_DELTA_MS
+            better = before > after * (1 + LATENCY_TOLERANCE) and before - after >= MIN_LATENCY_DELTA_MS
+        elif metric == "throughput_rps":
+            worse = after < before * (1 - THROUGHPUT_TOLERANCE)
+            better = after > before * (1 + THROUGHPUT_TOLERANCE)
+        elif metric == "error_rate":
+            worse = after > before + ERROR_RATE_DELTA
+            better = after < before - ERROR_RATE_DELTA
+        else:
+            worse = after > before + QUERIES_DELTA
+            better = after < before - QUERIES_DELTA
+        if worse or better:
+            changes.append((name, metric, before, after, "REGRESSION" if worse else "improved"))
+        if worse:
+            regressions.append(name)
+
+    for key in ("target", "database", "users", "mix"):
+        if baseline["meta"].get(key) != current["meta"].get(key):
+            print(f"note: {key} differs: {baseline['meta'].get(key)} -> {current['meta'].get(key)}")
+    for metric in ("throughput_rps", "error_rate", "p95_ms", "p99_ms"):
+        check("(all)", metric, baseline["summary"][metric], current["summary"][metric])
+    for name, before in baseline["endpoints"].items():
+        after = current["endpoints"].get(name)
+        if after is None:
+            changes.append((name, "requests", before["requests"], 0, "missing"))
+            continue
+        for metric in ("error_rate", "p95_ms", "p99_ms", "queries_mean"):
+            check(name, metric, before[metric], after[metric])
+
+    print(f"\n{'endpoint':<48} {'metric':<15} {'baseline':>10} {'current':>10}  verdict")
+    for name, metric, before, after, verdict in changes:
+        print(f"{name:<48} {metric:<15} {before:>10} {after:>10}  {verdict}")
+    if not changes:
+        print("no significant changes")
+    print(f"\n{len(regressions)} regression(s)")
+    return len(regressions)
+
+def parse_mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in JOURNEYS:
+            raise argparse.ArgumentTypeError(f"unknown journey {name!r}, expected one of {', '.join(JOURNEYS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Seconds run before measuring")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"Journey weights (default {DEFAULT_MIX})")
+    parser.add_argument("--seed", type=int, default=42, help="Seeds the data set and every user's choices")
+    parser.add_argument("--size", choices=["small", "medium", "large"],
+                        help="Reseed the in-process database at this seed_data.py preset first")
+    parser.add_argument("--base-url", help="Load test a running server instead of the in-process app")
+    parser.add_argument("--password", default="shopper123", help="Password of the generated customers")
+    parser.add_argument("--admin-email", default="admin@savegowholesale.com")
+    parser.add_argument("--admin-password", default="admin123")
+    parser.add_argument("--save", help="Write the report to this JSON file")
+    parser.add_argument("--compare", nargs="+", metavar="REPORT",
+                        help="Diff against a baseline report; with two reports, diff them without running")
+    args = parser.parse_args()
+
+    if args.compare and len(args.compare) == 2:
+        with open(args.compare[0]) as f, open(args.compare[1]) as g:
+            sys.exit(1 if compare(json.load(f), json.load(g)) else 0)
+
+    if not args.base_url:
+        # Settings are read at import time, so configure before importing the app
+        if "DATABASE_URL" not in os.environ:
+            os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/loadtest.db"
+            args.size = args.size or "small"
+        os.environ.setdefault("BCRYPT_ROUNDS", "4")
+        os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+        os.environ.setdefault("SERVER_TIMING_ENABLED", "true")
+        # Keep request logs from drowning the report; errors are still logged
+        os.environ.setdefault("LOG_REQUEST_SAMPLE_RATE", "0")
+        os.environ.setdefault("LOG_INGEST_DIR", os.path.join(tempfile.mkdtemp(), "frontend"))
+
+    report = asyncio.run(run(args, args.mix))
+    print_report(report)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nsaved {args.save}")
+    if args.compare:
+        with open(args.compare[0]) as f:
+            sys.exit(1 if compare(json.load(f), report) else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark login throughput and its effect on concurrent catalog latency.
+
+Fires a burst of concurrent logins while a set of clients keeps browsing the
+catalog, then reports logins/second and catalog latency percentiles. Compare
+hashing inline in the request threadpool with the dedicated process pool:
+
+    python benchmarks/login_throughput.py --hash-workers 0
+    python benchmarks/login_throughput.py --hash-workers 4
+
+By default the app runs in-process against a throwaway SQLite database; pass
+--base-url to benchmark a running server instead.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+async def run(args):
+    import httpx
+
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+    else:
+        from app.main import app
+        from app.core.password_pool import warm_password_pool
+        await warm_password_pool()
+        client = httpx.AsyncClient(app=app, base_url="http://localhost", timeout=60)
+
+    async with client:
+        users = [f"bench{i}@example.com" for i in range(args.users)]
+        for email in users:
+            await client.post("/api/v1/auth/register", json={
+                "email": email, "username": email.split("@")[0], "password": "bench-password"
+            })
+
+        logins_done = asyncio.Event()
+        catalog_latencies = []
+        login_statuses = {}
+
+        async def browse():
+            while not logins_done.is_set():
+                started = time.perf_counter()
+                await client.get("/api/v1/products/", params={"limit": 20})
+                catalog_latencies.append(time.perf_counter() - started)
+
+        async def login(email):
+            response = await client.post("/api/v1/auth/login", json={"email": email, "password": "bench-password"})
+            login_statuses[response.status_code] = login_statuses.get(response.status_code, 0) + 1
+
+        async def login_burst():
+            semaphore = asyncio.Semaphore(args.concurrency)
+
+            async def limited(email):
+                async with semaphore:
+                    await login(email)
+
+            await asyncio.gather(*(limited(users[i % len(users)]) for i in range(args.logins)))
+            logins_done.set()
+
+        browsers = [asyncio.create_task(browse()) for _ in range(args.browsers)]
+        started = time.perf_counter()
+        await login_burst()
+        elapsed = time.perf_counter() - started
+        await asyncio.gather(*browsers)
+
+    print(f"hash workers:        {os.environ.get('PASSWORD_HASH_WORKERS', 'default')}")
+    print(f"logins:              {args.logins} in {elapsed:.2f}s ({args.logins / elapsed:.1f}/s)")
+    print(f"login statuses:      {dict(sorted(login_statuses.items()))}")
+    if catalog_latencies:
+        print(f"catalog requests:    {len(catalog_latencies)}")
+        print(f"catalog p50/p95/max: "
+              f"{statistics.median(catalog_latencies) * 1000:.1f} / "
+              f"{percentile(catalog_latencies, 0.95) * 1000:.1f} / "
+              f"{max(catalog_latencies) * 1000:.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hash-workers", type=int, help="PASSWORD_HASH_WORKERS for the in-process app")
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=100, help="Logins in flight at once")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--browsers", type=int, default=10, help="Concurrent catalog clients")
+    parser.add_argument("--base-url", help="Benchmark a running server instead of the in-process app")
+    args = parser.parse_args()
+
+    if not args.base_url:
+        # Settings are read at import time, so configure before importing the app
+        os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+        os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+        os.environ["PASSWORD_HASH_MAX_QUEUE"] = str(args.concurrency)
+        if args.hash_workers is not None:
+            os.environ["PASSWORD_HASH_WORKERS"] = str(args.hash_workers)
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Compare per-request overhead of the pure ASGI request middleware with the
+two @app.middleware("http") functions it replaced.
+
+Both stacks are built around the same app and requests are sent straight to
+the ASGI callable, with no client or socket, so the difference in mean
+latency is the middleware cost. Each figure is the best mean over several
+alternating rounds. Request logs are sampled out for the run so log rendering
+does not dominate either stack:
+
+    python benchmarks/middleware_overhead.py --requests 2000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def legacy_middleware():
+    """The two BaseHTTPMiddleware functions as they were in app.main"""
+    import structlog.contextvars
+    from app.core.config import settings
+    from app.core.logging import get_logger
+    from app.core.query_stats import request_query_stats
+
+    logger = get_logger("main")
+    logged_headers = frozenset(header.lower() for header in settings.LOG_HEADER_ALLOWLIST)
+
+    async def log_requests(request, call_next):
+        started = time.perf_counter()
+        with request_query_stats() as queries:
+            response = await call_next(request)
+        if settings.SERVER_TIMING_ENABLED:
+            response.headers.append("Server-Timing", queries.server_timing())
+        if response.status_code < 400 and random.random() >= settings.LOG_REQUEST_SAMPLE_RATE:
+            return response
+        logger.info(
+            "http.response",
+            status_code=response.status_code,
+            method=request.method,
+            path=request.url.path,
+            query=request.url.query or None,
+            headers={name: value for name, value in request.headers.items() if name in logged_headers},
+            remote_addr=request.client.host if request.client else None,
+            duration_ms=round((time.perf_counter() - started) * 1000, 3),
+            db_queries=queries.count,
+            db_time_ms=queries.milliseconds,
+            db_repeated_statements=len(queries.repeated)
+        )
+        return response
+
+    async def add_request_id_to_log_context(request, call_next):
+        structlog.contextvars.bind_contextvars(request_id=str(uuid.uuid4()))
+        try:
+            response = await call_next(request)
+        finally:
+            structlog.contextvars.unbind_contextvars("request_id", "user_id")
+        return response
+
+    return [log_requests, add_request_id_to_log_context]
+
+def use_stack(app, legacy: bool) -> None:
+    from starlette.middleware import Middleware
+    from starlette.middleware.base import BaseHTTPMiddleware
+    from app.core.middleware import RequestContextMiddleware
+
+    stack = [m for m in app.user_middleware if m.cls not in (RequestContextMiddleware, BaseHTTPMiddleware)]
+    if legacy:
+        # @app.middleware("http") inserts each function at the front, outermost last
+        for dispatch in legacy_middleware():
+            stack.insert(0, Middleware(BaseHTTPMiddleware, dispatch=dispatch))
+    else:
+        stack.insert(0, Middleware(RequestContextMiddleware))
+    app.user_middleware = stack
+    app.middleware_stack = app.build_middleware_stack()
+
+def seed():
+    from app.core.database import SessionLocal
+    from app.core.migrations import upgrade_database
+    from app.models import Category, Product
+
+    upgrade_database()
+    db = SessionLocal()
+    try:
+        if db.query(Product).count():
+            return
+        category = Category(name="Benchmark", description="Benchmark products")
+        db.add(category)
+        db.flush()
+        db.add(Product(name="Benchmark product", description="benchmark", price=1.0,
+                       stock_quantity=100, category_id=category.id))
+        db.commit()
+    finally:
+        db.close()
+
+async def call(app, path: str) -> None:
+    """One GET straight through the ASGI app, without a client or socket"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"localhost"), (b"user-agent", b"benchmark")],
+        "client": ("127.0.0.1", 50000), "server": ("localhost", 80),
+    }
+
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+    response_complete = asyncio.Event()
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # Like uvicorn: further receives wait until the response has been sent
+        await response_complete.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and not message.get("more_body", False):
+            response_complete.set()
+
+    await app(scope, receive, send)
+
+async def measure(app, path: str, requests: int) -> float:
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        await call(app, path)
+        samples.append(time.perf_counter() - started)
+    return statistics.mean(samples) * 1_000_000
+
+async def run(args):
+    from app.main import app
+
+    seed()
+    paths = ["/health", "/api/v1/products/1"]
+    stacks = (("BaseHTTPMiddleware", True), ("pure ASGI", False))
+    results = {(name, path): [] for name, _ in stacks for path in paths}
+    # Alternate the stacks over several rounds so drift affects both alike
+    for _ in range(args.rounds):
+        for name, legacy in stacks:
+            use_stack(app, legacy)
+            for path in paths:
+                await measure(app, path, args.warmup)
+                results[name, path].append(await measure(app, path, args.requests // args.rounds))
+    results = {key: min(means) for key, means in results.items()}
+
+    print(f"{'path':<24} {'BaseHTTPMiddleware':>20} {'pure ASGI':>12} {'saved':>10}")
+    for path in paths:
+        before, after = results["BaseHTTPMiddleware", path], results["pure ASGI", path]
+        print(f"{path:<24} {before:>18.1f}us {after:>10.1f}us {before - after:>8.1f}us")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="Timed requests per path and stack")
+    parser.add_argument("--warmup", type=int, default=50, help="Untimed requests before each measurement")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    # Settings are read at import time, so configure before importing the app
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+    os.environ.setdefault("LOG_REQUEST_SAMPLE_RATE", "0")
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
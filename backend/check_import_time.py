@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Check that a cold import of app.main stays within the startup budget.
+
+Imports the app in a fresh interpreter under `python -X importtime` and exits
+non-zero if the cumulative import time of app.main exceeds the budget, or if
+any module that should load on first use (search scorers, JWT/crypto,
+password hashing, the server itself) was imported. The slowest imports are
+printed to show where the time went.
+
+    python check_import_time.py --budget-ms 1500
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Loaded on first use; importing any of these with the app is a regression
+LAZY_MODULES = [
+    "fuzzywuzzy", "Levenshtein", "rapidfuzz",
+    "jose", "cryptography",
+    "passlib", "bcrypt",
+    "uvicorn",
+]
+
+DEFAULT_BUDGET_MS = float(os.environ.get("IMPORT_TIME_BUDGET_MS", 1500))
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+def measure(runs: int):
+    """Import app.main in `runs` fresh interpreters; return the fastest run's timings and loaded lazy modules"""
+    probe = (
+        "import sys, app.main; "
+        f"print(','.join(name for name in {LAZY_MODULES!r} if name in sys.modules))"
+    )
+    best = None
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", probe],
+            cwd=BACKEND_DIR, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            sys.exit(f"Importing app.main failed:\n{result.stderr[-2000:]}")
+        timings = {}
+        for line in result.stderr.splitlines():
+            match = _LINE.match(line)
+            if match:
+                timings[match.group(4)] = (int(match.group(1)), int(match.group(2)), len(match.group(3)))
+        total = timings["app.main"][1]
+        if best is None or total < best[0]:
+            loaded = [name for name in result.stdout.strip().splitlines()[-1].split(",") if name] if result.stdout.strip() else []
+            best = (total, timings, loaded)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="Cumulative import time allowed for app.main (default IMPORT_TIME_BUDGET_MS or 1500)")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh imports to time; the fastest is compared")
+    parser.add_argument("--top", type=int, default=15, help="Slowest top-level packages to print")
+    args = parser.parse_args()
+
+    total_us, timings, loaded = measure(args.runs)
+
+    # Self time summed per top-level package
+    packages = {}
+    for name, (self_us, _, _) in timings.items():
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+    print(f"{'package':<30} {'self ms':>10}")
+    for package, self_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{package:<30} {self_us / 1000:>10.1f}")
+    print(f"\napp.main cold import: {total_us / 1000:.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    failed = False
+    if total_us / 1000 > args.budget_ms:
+        print("FAIL: import time is over budget")
+        failed = True
+    if loaded:
+        print(f"FAIL: imported with the app but should load lazily: {', '.join(loaded)}")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
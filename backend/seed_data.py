@@ -1,17 +1,37 @@
 #!/usr/bin/env python3
 """
 Seed script to populate the database with sample data
+
+    python seed_data.py                       # Hand-written demo catalog and accounts
+    python seed_data.py --size medium         # Generated production-scale data
+    python seed_data.py --size large --seed 7 --orders 2000000
+
+Generated data is deterministic for a given seed, size and end date.
 """
 
+import argparse
+import csv
+import io
+import math
+import random
 import sys
 import os
+import time
+from array import array
+from datetime import date, datetime, timedelta, timezone
+from enum import Enum
+from itertools import islice
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 from app.core.database import SessionLocal, engine
-from app.core.database import Base
+from app.core.migrations import upgrade_database
 from app.models import Category, Product, User, UserRole
+from app.models.order import OrderStatus
+from app.models.product import LOW_STOCK_THRESHOLD
 from app.core.security import get_password_hash
+from app.utils.analytics import rebuild_rollups
 from app.main import logger
 
 def clear_all_data(db):
@@ -20,7 +40,19 @@ def clear_all_data(db):
     from app.models.product import Product
     from app.models.category import Category
     from app.models.user import User
+    from app.models.analytics import DailySales, DailyProductSales, DailyCategorySales, DailyOrderStatus
+    if db.get_bind().dialect.name == "postgresql":
+        # One statement instead of row-by-row deletes, which matters after a large seed
+        tables = [model.__table__.name for model in (
+            DailySales, DailyProductSales, DailyCategorySales, DailyOrderStatus,
+            OrderItem, Order, CartItem, Cart, Product, Category, User,
+        )]
+        db.execute(text(f"TRUNCATE {', '.join(tables)} RESTART IDENTITY CASCADE"))
+        db.commit()
+        return
     # Delete in order of dependencies (children first)
+    for rollup in (DailySales, DailyProductSales, DailyCategorySales, DailyOrderStatus):
+        db.query(rollup).delete()
     db.query(OrderItem).delete()
     db.query(Order).delete()
     db.query(CartItem).delete()
@@ -271,6 +303,8 @@ def create_sample_data():
                 OrderItem(order_id=order2.id, product_id=product4.id, quantity=2, price_at_time=product4.price),
             ])
             db.commit()
+            rebuild_rollups(db)
+            db.commit()
             logger.info("seed.created_orders", customer=customer_user.email, orders=2)
         else:
             logger.warning("seed.orders_skipped_missing_products")
@@ -286,7 +320,407 @@ def create_sample_data():
     finally:
         db.close()
 
+
+# ---------------------------------------------------------------------------
+# Generated data (--size)
+# ---------------------------------------------------------------------------
+
+# Row counts per size preset; orders average about 4.5 lines each
+PRESETS = {
+    "small": {"categories": 24, "products": 10_000, "users": 2_000, "carts": 500, "orders": 20_000},
+    "medium": {"categories": 120, "products": 250_000, "users": 50_000, "carts": 10_000, "orders": 500_000},
+    "large": {"categories": 400, "products": 2_000_000, "users": 500_000, "carts": 100_000, "orders": 5_000_000},
+}
+
+# Popularity skew: index = n * random() ** skew, so low ids are picked most.
+# With 3.0 the first 10% of products get ~46% of order and cart lines (hot SKUs);
+# with 2.0 the first 10% of customers place ~32% of orders (heavy buyers).
+HOT_SKU_SKEW = 3.0
+HEAVY_BUYER_SKEW = 2.0
+CATEGORY_SKEW = 1.5  # Some categories hold many more products than others
+
+MAX_ORDER_LINES = 40
+MAX_CART_LINES = 50
+HISTORY_DAYS = 365  # Orders are spread over this many days before --end-date
+GENERATED_PASSWORD = "shopper123"  # Shared by every generated customer; hashed once
+PROGRESS_INTERVAL_SECONDS = 2.0
+
+DEPARTMENTS = {
+    "Fruits & Vegetables": ["Bananas", "Strawberries", "Spinach", "Bell Peppers", "Apples", "Avocados", "Carrots", "Tomatoes"],
+    "Dairy & Eggs": ["Whole Milk", "Eggs", "Cheddar Cheese", "Greek Yogurt", "Butter", "Mozzarella", "Cream Cheese", "Oat Milk"],
+    "Meat & Seafood": ["Beef Steak", "Salmon Fillet", "Chicken Breast", "Ground Turkey", "Pork Chops", "Shrimp", "Bacon", "Lamb Chops"],
+    "Bakery": ["Sourdough Bread", "Croissants", "Bagels", "Muffins", "Baguette", "Tortillas", "Dinner Rolls", "Pita"],
+    "Pantry": ["Quinoa", "Olive Oil", "Basmati Rice", "Penne Pasta", "Black Beans", "Peanut Butter", "Rolled Oats", "Honey"],
+    "Beverages": ["Orange Juice", "Sparkling Water", "Cold Brew Coffee", "Green Tea", "Lemonade", "Coconut Water", "Kombucha", "Cola"],
+    "Frozen": ["Pizza", "Ice Cream", "Peas", "Waffles", "Dumplings", "Mixed Berries", "Fish Sticks", "Burritos"],
+    "Snacks": ["Potato Chips", "Pretzels", "Trail Mix", "Granola Bars", "Popcorn", "Crackers", "Almonds", "Dark Chocolate"],
+    "Household": ["Paper Towels", "Dish Soap", "Laundry Detergent", "Trash Bags", "Sponges", "Aluminum Foil", "Toilet Paper", "Glass Cleaner"],
+    "Health & Beauty": ["Shampoo", "Toothpaste", "Hand Soap", "Sunscreen", "Body Lotion", "Vitamin C", "Cotton Swabs", "Deodorant"],
+}
+DEPARTMENT_NAMES = list(DEPARTMENTS)
+CATEGORY_STYLES = ["Everyday", "Organic", "Bulk", "Premium", "Local", "Imported", "Value", "Specialty", "Seasonal", "Family Size"]
+BRANDS = ["SaveGo", "Hillcrest", "Golden Acre", "Blue Harbor", "Maple Row", "Sunfield", "Northwind", "Green Valley", "Copper Kettle", "Riverbend"]
+ADJECTIVES = ["Fresh", "Organic", "Classic", "Natural", "Select", "Farmhouse", "Original", "Premium", "Value Pack", "Family Size"]
+SIZES = ["8 oz", "12 oz", "16 oz", "1 lb", "2 lb", "5 lb", "6 ct", "12 ct", "24 ct", "1 gal", "2 L", "Case of 12"]
+FIRST_NAMES = ["Ana", "Ben", "Chloe", "Diego", "Emma", "Farah", "Gus", "Hana", "Ivan", "Jade", "Kofi", "Lena", "Mateo", "Nora", "Omar", "Priya"]
+LAST_NAMES = ["Garcia", "Smith", "Nguyen", "Khan", "Johnson", "Kim", "Okafor", "Rossi", "Lopez", "Chen", "Brown", "Silva"]
+STREETS = ["Main St", "Oak Ave", "Market St", "Pine St", "Mission St", "Elm St", "Cedar Rd", "Lake Dr", "Hill Blvd", "Park Ln"]
+CITIES = [
+    ("San Francisco", "CA", "94105"), ("Oakland", "CA", "94607"), ("Seattle", "WA", "98101"),
+    ("Portland", "OR", "97205"), ("Austin", "TX", "78701"), ("Denver", "CO", "80202"),
+    ("Chicago", "IL", "60601"), ("Brooklyn", "NY", "11201"), ("Boston", "MA", "02108"),
+]
+ORDER_NOTES = ["Leave at the door.", "Ring the bell.", "Call on arrival.", "Deliver to the loading dock."]
+
+# Order status by age: recent orders are still in progress, older ones delivered
+STATUSES_BY_AGE = [
+    (timedelta(days=1), [OrderStatus.PENDING, OrderStatus.CONFIRMED, OrderStatus.PREPARING, OrderStatus.CANCELLED], [50, 30, 15, 5]),
+    (timedelta(days=4), [OrderStatus.PREPARING, OrderStatus.SHIPPED, OrderStatus.DELIVERED, OrderStatus.CANCELLED], [10, 40, 44, 6]),
+    (timedelta.max, [OrderStatus.DELIVERED, OrderStatus.CANCELLED], [94, 6]),
+]
+
+def skewed_index(rng: random.Random, n: int, skew: float) -> int:
+    """Index in [0, n) biased towards 0; constant memory for any n"""
+    return min(n - 1, int(n * rng.random() ** skew))
+
+def _coprime_stride(n: int) -> int:
+    """A step that visits every index in [0, n) once when taken modulo n"""
+    stride = int(n * 0.618) | 1
+    while math.gcd(stride, n) != 1:
+        stride += 2
+    return stride
+
+class Catalog:
+    """
+    Per-product price and active flag, kept so carts and orders can reference
+    products without reading them back: 9 bytes per product, the only memory
+    that grows with the data set.
+    """
+
+    def __init__(self):
+        self.prices = array("d")
+        self.active = array("b")
+
+    def __len__(self):
+        return len(self.prices)
+
+    def pick(self, rng: random.Random, active_only: bool = False) -> int:
+        """Product index drawn with the hot-SKU skew"""
+        while True:
+            index = skewed_index(rng, len(self.prices), HOT_SKU_SKEW)
+            if not active_only or self.active[index]:
+                return index
+
+    def pick_lines(self, rng: random.Random, count: int, active_only: bool = False) -> list:
+        """`count` distinct product indexes"""
+        count = min(count, len(self.prices))
+        picked = set()
+        while len(picked) < count:
+            picked.add(self.pick(rng, active_only))
+        return list(picked)
+
+class Generator:
+    """Deterministic row streams for every table; each table has its own random stream"""
+
+    def __init__(self, counts: dict, seed: int, end: datetime):
+        self.counts = counts
+        self.seed = seed
+        self.end = end
+        self.start = end - timedelta(days=HISTORY_DAYS)
+        self.catalog = Catalog()
+        # Admin and demo customer keep ids 1 and 2; the demo customer is customer index 0
+        self.customers = counts["users"] + 1
+
+    def rng(self, table: str) -> random.Random:
+        return random.Random(f"{self.seed}:{table}")
+
+    def customer_id(self, index: int) -> int:
+        return index + 2
+
+    def categories(self):
+        for i in range(self.counts["categories"]):
+            department = DEPARTMENT_NAMES[i % len(DEPARTMENT_NAMES)]
+            style = CATEGORY_STYLES[(i // len(DEPARTMENT_NAMES)) % len(CATEGORY_STYLES)]
+            repeat = i // (len(DEPARTMENT_NAMES) * len(CATEGORY_STYLES))
+            name = f"{department} - {style}" + (f" {repeat + 1}" if repeat else "")
+            yield (i + 1, name, f"{style} {department.lower()}", self.start - timedelta(days=HISTORY_DAYS))
+
+    def products(self):
+        rng = self.rng("products")
+        categories = self.counts["categories"]
+        span = HISTORY_DAYS * 86400
+        for i in range(self.counts["products"]):
+            category = skewed_index(rng, categories, CATEGORY_SKEW)
+            noun = rng.choice(DEPARTMENTS[DEPARTMENT_NAMES[category % len(DEPARTMENT_NAMES)]])
+            brand, adjective, size = rng.choice(BRANDS), rng.choice(ADJECTIVES), rng.choice(SIZES)
+            price = round(min(499.99, max(0.49, rng.lognormvariate(1.6, 0.8))), 2)
+            roll = rng.random()
+            if roll < 0.05:
+                stock = 0
+            elif roll < 0.13:
+                stock = rng.randint(1, LOW_STOCK_THRESHOLD)
+            else:
+                stock = rng.randint(LOW_STOCK_THRESHOLD + 1, 1000)
+            active = rng.random() >= 0.03
+            self.catalog.prices.append(price)
+            self.catalog.active.append(active)
+            yield (
+                i + 1,
+                f"{brand} {adjective} {noun} {size}",
+                f"{adjective} {noun.lower()} from {brand}, {size}",
+                price,
+                stock,
+                None,
+                active,
+                category + 1,
+                self.start - timedelta(seconds=rng.random() * span),
+            )
+
+    def users(self, admin_hash: str, customer_hash: str, shared_hash: str):
+        rng = self.rng("users")
+        yield (1, "admin@savegowholesale.com", "admin", admin_hash, "Admin", "User", UserRole.ADMIN, True, self.start)
+        yield (2, "customer@savegowholesale.com", "customer", customer_hash, "Sample", "Customer", UserRole.CUSTOMER, True, self.start)
+        span = (self.end - self.start).total_seconds()
+        for index in range(1, self.customers):
+            user_id = self.customer_id(index)
+            yield (
+                user_id,
+                f"shopper{index}@example.com",
+                f"shopper{index}",
+                shared_hash,
+                rng.choice(FIRST_NAMES),
+                rng.choice(LAST_NAMES),
+                UserRole.CUSTOMER,
+                rng.random() >= 0.01,
+                self.start + timedelta(seconds=rng.random() * span),
+            )
+
+    def carts(self):
+        """(cart row, cart item rows) for distinct customers spread over the whole range"""
+        rng = self.rng("carts")
+        carts = min(self.counts["carts"], self.customers)
+        stride = _coprime_stride(self.customers)
+        item_id = 0
+        for i in range(carts):
+            cart_id = i + 1
+            created_at = self.end - timedelta(seconds=rng.random() * 14 * 86400)
+            lines = min(MAX_CART_LINES, 1 + int(rng.expovariate(0.2)))
+            items = []
+            for product in self.catalog.pick_lines(rng, lines, active_only=True):
+                item_id += 1
+                items.append((
+                    item_id, cart_id, product + 1, min(24, 1 + int(rng.expovariate(0.6))),
+                    self.catalog.prices[product], created_at,
+                ))
+            yield (cart_id, self.customer_id((i * stride) % self.customers), created_at), items
+
+    def orders(self):
+        """(order row, order item rows), oldest first"""
+        rng = self.rng("orders")
+        total = self.counts["orders"]
+        span = (self.end - self.start).total_seconds()
+        item_id = 0
+        for i in range(total):
+            order_id = i + 1
+            created_at = self.start + timedelta(seconds=span * (i + rng.random()) / total)
+            age = self.end - created_at
+            for limit, statuses, weights in STATUSES_BY_AGE:
+                if age < limit:
+                    status = rng.choices(statuses, weights)[0]
+                    break
+            user_id = self.customer_id(skewed_index(rng, self.customers, HEAVY_BUYER_SKEW))
+            lines = min(MAX_ORDER_LINES, 1 + int(rng.expovariate(0.25)))
+            items = []
+            total_amount = 0.0
+            for product in self.catalog.pick_lines(rng, lines):
+                item_id += 1
+                quantity = min(24, 1 + int(rng.expovariate(0.6)))
+                price = self.catalog.prices[product]
+                total_amount += price * quantity
+                items.append((item_id, order_id, product + 1, quantity, price, created_at))
+            city, state, zip_code = CITIES[(user_id // len(STREETS)) % len(CITIES)]
+            yield (
+                order_id,
+                user_id,
+                f"ORD-G{order_id:09d}",  # "G" keeps these apart from the hex numbers the API assigns
+                status,
+                round(total_amount, 2),
+                f"{(user_id * 7919) % 9999 + 1} {STREETS[user_id % len(STREETS)]}",
+                city,
+                state,
+                zip_code,
+                "USA",
+                rng.choice(ORDER_NOTES) if rng.random() < 0.1 else None,
+                created_at,
+            ), items
+
+def _copy_value(value):
+    # SQLAlchemy stores enum names, and COPY wants them as text
+    return value.name if isinstance(value, Enum) else value
+
+class BulkWriter:
+    """Writes row batches to one table: COPY on PostgreSQL (psycopg2), executemany elsewhere"""
+
+    def __init__(self, conn, model, columns: list):
+        self.conn = conn
+        self.columns = columns
+        self.table = model.__table__
+        self.copy = conn.dialect.name == "postgresql" and conn.dialect.driver == "psycopg2"
+        self.copy_sql = f"COPY {self.table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+
+    def write(self, rows: list) -> None:
+        if not rows:
+            return
+        if self.copy:
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows([_copy_value(value) for value in row] for row in rows)
+            buffer.seek(0)
+            with self.conn.connection.dbapi_connection.cursor() as cursor:
+                cursor.copy_expert(self.copy_sql, buffer)
+        else:
+            self.conn.execute(self.table.insert(), [dict(zip(self.columns, row)) for row in rows])
+
+class Progress:
+    """Logs rows loaded into a table at most every PROGRESS_INTERVAL_SECONDS"""
+
+    def __init__(self, table: str, total: int):
+        self.table = table
+        self.total = total
+        self.rows = 0
+        self.child_rows = 0
+        self.started = self.logged = time.monotonic()
+
+    def advance(self, rows: int, child_rows: int = 0) -> None:
+        self.rows += rows
+        self.child_rows += child_rows
+        now = time.monotonic()
+        if now - self.logged >= PROGRESS_INTERVAL_SECONDS:
+            self.logged = now
+            elapsed = now - self.started
+            rate = self.rows / elapsed
+            logger.info(
+                "seed.progress", table=self.table, rows=self.rows, total=self.total,
+                percent=round(100 * self.rows / max(self.total, 1), 1),
+                rows_per_second=round(rate), eta_seconds=round((self.total - self.rows) / rate, 1) if rate else None,
+            )
+
+    def done(self, **extra) -> None:
+        elapsed = time.monotonic() - self.started
+        logger.info(
+            "seed.table_loaded", table=self.table, rows=self.rows, seconds=round(elapsed, 2),
+            rows_per_second=round(self.rows / elapsed) if elapsed else None, **extra,
+        )
+
+def _batches(rows, size: int):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+def _load(conn, model, columns: list, rows, total: int, batch_size: int) -> None:
+    writer = BulkWriter(conn, model, columns)
+    progress = Progress(model.__table__.name, total)
+    for batch in _batches(rows, batch_size):
+        writer.write(batch)
+        conn.commit()
+        progress.advance(len(batch))
+    progress.done()
+
+def _load_with_items(conn, model, columns: list, item_model, item_columns: list, rows, total: int, batch_size: int) -> None:
+    """_load for (parent row, child rows) pairs such as orders and their items"""
+    writer = BulkWriter(conn, model, columns)
+    item_writer = BulkWriter(conn, item_model, item_columns)
+    progress = Progress(model.__table__.name, total)
+    for batch in _batches(rows, batch_size):
+        items = [item for _, row_items in batch for item in row_items]
+        writer.write([row for row, _ in batch])
+        item_writer.write(items)
+        conn.commit()
+        progress.advance(len(batch), len(items))
+    progress.done(**{f"{item_model.__table__.name}_rows": progress.child_rows})
+
+def _reset_sequences(conn, models) -> None:
+    """Move PostgreSQL id sequences past the explicit ids written by the generator"""
+    if conn.dialect.name != "postgresql":
+        return
+    for model in models:
+        table = model.__table__.name
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)"
+        ))
+    conn.commit()
+
+def generate_data(counts: dict, seed: int, end: datetime, batch_size: int) -> None:
+    """Replace all data with a generated data set of the given row counts"""
+    from app.models.order import Order, OrderItem
+    from app.models.cart import Cart, CartItem
+
+    started = time.monotonic()
+    db = SessionLocal()
+    try:
+        clear_all_data(db)
+    finally:
+        db.close()
+
+    generator = Generator(counts, seed, end)
+    logger.info("seed.generating", seed=seed, end=end.isoformat(), **counts)
+    # bcrypt is slow by design, so generated customers share one hash
+    hashes = [get_password_hash(password) for password in ("admin123", "customer123", GENERATED_PASSWORD)]
+
+    with engine.connect() as conn:
+        _load(conn, Category, ["id", "name", "description", "created_at"],
+              generator.categories(), counts["categories"], batch_size)
+        _load(conn, Product, ["id", "name", "description", "price", "stock_quantity", "image_url",
+                              "is_active", "category_id", "created_at"],
+              generator.products(), counts["products"], batch_size)
+        _load(conn, User, ["id", "email", "username", "hashed_password", "first_name", "last_name",
+                           "role", "is_active", "created_at"],
+              generator.users(*hashes), generator.customers + 1, batch_size)
+        _load_with_items(conn, Cart, ["id", "user_id", "created_at"],
+                         CartItem, ["id", "cart_id", "product_id", "quantity", "price_at_time", "created_at"],
+                         generator.carts(), min(counts["carts"], generator.customers), batch_size)
+        _load_with_items(conn, Order, ["id", "user_id", "order_number", "status", "total_amount",
+                                       "shipping_address", "shipping_city", "shipping_state", "shipping_zip",
+                                       "shipping_country", "notes", "created_at"],
+                         OrderItem, ["id", "order_id", "product_id", "quantity", "price_at_time", "created_at"],
+                         generator.orders(), counts["orders"], batch_size)
+        _reset_sequences(conn, (Category, Product, User, Cart, CartItem, Order, OrderItem))
+
+    db = SessionLocal()
+    try:
+        rollups_started = time.monotonic()
+        rebuild_rollups(db)
+        db.commit()
+        logger.info("seed.rollups_rebuilt", seconds=round(time.monotonic() - rollups_started, 2))
+    finally:
+        db.close()
+
+    logger.info("seed.success", seconds=round(time.monotonic() - started, 2), seed=seed, **counts)
+    logger.info("seed.credentials", admin="admin@savegowholesale.com", customer="customer@savegowholesale.com",
+                generated=f"shopper<N>@example.com / {GENERATED_PASSWORD}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", choices=list(PRESETS), help="Generate data at this scale instead of the demo data")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per insert/COPY batch")
+    parser.add_argument("--end-date", type=date.fromisoformat, default=datetime.now(timezone.utc).date(),
+                        help=f"Last day of the {HISTORY_DAYS}-day order history (default: today, UTC)")
+    for table in PRESETS["small"]:
+        parser.add_argument(f"--{table}", type=int, help=f"Override the preset's {table} count")
+    args = parser.parse_args()
+
+    # Bring the schema up to date before seeding
+    upgrade_database()
+
+    overrides = {table: getattr(args, table) for table in PRESETS["small"] if getattr(args, table) is not None}
+    if not args.size and not overrides:
+        create_sample_data()
+        return
+
+    counts = {**PRESETS[args.size or "small"], **overrides}
+    end = datetime.combine(args.end_date + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+    generate_data(counts, args.seed, end, args.batch_size)
+
 if __name__ == "__main__":
-    # Create tables if they don't exist
-    Base.metadata.create_all(bind=engine)
-    create_sample_data() 
\ No newline at end of file
+    main()
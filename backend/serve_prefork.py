@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Run uvicorn workers that share one read-only copy of the catalog.
+
+This process builds the catalog and its search text into a memory-mapped
+segment under CATALOG_SEGMENT_DIR (a tmpfs such as /dev/shm by default), then
+starts the workers. Workers map the segment instead of each loading and
+caching their own copy, so catalog memory does not grow with the worker count.
+A publisher thread here rebuilds the segment when a worker reports an admin
+catalog write, and every CATALOG_SEGMENT_REFRESH_SECONDS for stock changes.
+
+    python serve_prefork.py --workers 4 --port 8000
+"""
+
+import argparse
+import os
+import shutil
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+def default_segment_dir() -> str:
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else os.path.join(os.path.dirname(os.path.abspath(__file__)), "var")
+    return os.path.join(base, f"savego-catalog-{os.getpid()}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--segment-dir", default=os.environ.get("CATALOG_SEGMENT_DIR"),
+                        help="Where segments are published (default: a new directory under /dev/shm)")
+    args = parser.parse_args()
+
+    segment_dir = args.segment_dir or default_segment_dir()
+    # Settings are read at import time and workers inherit the environment
+    os.environ["CATALOG_SEGMENT_DIR"] = segment_dir
+
+    import uvicorn
+    from app.core.catalog_segment import SegmentPublisher
+
+    publisher = SegmentPublisher(segment_dir)
+    publisher.publish("startup")
+    publisher.start()
+    try:
+        uvicorn.run("app.main:app", host=args.host, port=args.port, workers=args.workers)
+    finally:
+        publisher.stop()
+        if not args.segment_dir:
+            shutil.rmtree(segment_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
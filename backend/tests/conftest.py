@@ -0,0 +1,92 @@
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings are read at import time, so configure before importing the app
+_scratch = tempfile.mkdtemp(prefix="grocery-tests-")
+# TEST_DATABASE_URL points the suite at a disposable PostgreSQL database instead;
+# its data is replaced
+os.environ["DATABASE_URL"] = os.environ.get("TEST_DATABASE_URL") or f"sqlite:///{_scratch}/test.db"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ.pop("DATABASE_READ_URL", None)
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["LOG_INGEST_DIR"] = os.path.join(_scratch, "frontend")
+os.environ["PROFILE_DIR"] = os.path.join(_scratch, "profiles")
+
+from fastapi.testclient import TestClient
+
+import app.core.middleware
+from app.core.query_stats import request_query_stats
+
+@pytest.fixture(scope="session")
+def database():
+    """The test database migrated to head and loaded with the demo data from seed_data.py"""
+    from app.core.migrations import upgrade_database
+    from seed_data import create_sample_data
+
+    upgrade_database()
+    create_sample_data()
+
+@pytest.fixture(scope="session")
+def client(database):
+    """The app with its lifespan running"""
+    from app.main import app
+
+    with TestClient(app, base_url="http://localhost") as client:
+        yield client
+
+def login(client: TestClient, email: str, password: str) -> dict:
+    response = client.post("/api/v1/auth/login", json={"email": email, "password": password})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    return login(client, "admin@savegowholesale.com", "admin123")
+
+@pytest.fixture(scope="session")
+def customer_headers(client):
+    return login(client, "customer@savegowholesale.com", "customer123")
+
+@pytest.fixture
+def query_budget(monkeypatch):
+    """
+    Fail if any request made inside the block executes more than `limit`
+    statements. Each request is checked against the QueryStats the request
+    middleware scopes to it, so other requests and background tasks in the
+    process do not count:
+
+        with query_budget(3):
+            client.get("/api/v1/orders/", headers=headers)
+    """
+    requests = []
+
+    @contextmanager
+    def recording_query_stats():
+        with request_query_stats() as stats:
+            requests.append(stats)
+            yield stats
+
+    monkeypatch.setattr(app.core.middleware, "request_query_stats", recording_query_stats)
+
+    @contextmanager
+    def budget(limit: int):
+        start = len(requests)
+        yield requests
+        checked = requests[start:]
+        assert checked, "No request was made inside the query budget"
+        for stats in checked:
+            if stats.count > limit:
+                repeated = [f"{count}x {statement}" for statement, count in stats.statements.most_common(3)]
+                raise AssertionError(
+                    f"Expected at most {limit} queries, executed {stats.count}; most repeated: {repeated}"
+                )
+
+    return budget
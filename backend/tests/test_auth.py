@@ -0,0 +1,73 @@
+from app.core.auth import principal_cache
+from app.core.database import SessionLocal
+from app.models.user import User
+
+def register(client, email):
+    response = client.post("/api/v1/auth/register", json={
+        "email": email, "username": email.split("@")[0], "password": "secret123",
+        "first_name": "Test", "last_name": "User",
+    })
+    assert response.status_code == 200, response.text
+    response = client.post("/api/v1/auth/login", json={"email": email, "password": "secret123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def test_principal_evicted_on_commit_not_flush(client):
+    email = "evict-on-commit@example.com"
+    headers = register(client, email)
+    assert client.get("/api/v1/orders/", headers=headers).status_code == 200
+    assert principal_cache.get(email) is not None
+
+    db = SessionLocal()
+    try:
+        db.query(User).filter(User.email == email).one().is_active = False
+        db.flush()
+        # Another request can still read the committed row, so the entry stays
+        assert principal_cache.get(email) is not None
+        db.commit()
+        assert principal_cache.get(email) is None
+    finally:
+        db.close()
+    assert client.get("/api/v1/orders/", headers=headers).status_code == 401
+
+def test_rolled_back_change_keeps_principal(client):
+    email = "rollback@example.com"
+    headers = register(client, email)
+    assert client.get("/api/v1/orders/", headers=headers).status_code == 200
+
+    db = SessionLocal()
+    try:
+        db.query(User).filter(User.email == email).one().is_active = False
+        db.flush()
+        db.rollback()
+    finally:
+        db.close()
+    assert principal_cache.get(email) is not None
+
+def test_admin_deactivation_takes_effect_immediately(client, admin_headers):
+    headers = register(client, "deactivated@example.com")
+    db = SessionLocal()
+    try:
+        user_id = db.query(User.id).filter(User.email == "deactivated@example.com").scalar()
+    finally:
+        db.close()
+    assert client.get("/api/v1/orders/", headers=headers).status_code == 200
+    response = client.put(f"/api/v1/admin/users/{user_id}", json={"is_active": False}, headers=admin_headers)
+    assert response.status_code == 200, response.text
+    assert client.get("/api/v1/orders/", headers=headers).status_code == 401
+
+def test_token_with_outdated_role_is_rejected(client, admin_headers):
+    email = "promoted@example.com"
+    headers = register(client, email)
+    db = SessionLocal()
+    try:
+        user_id = db.query(User.id).filter(User.email == email).scalar()
+    finally:
+        db.close()
+    response = client.put(f"/api/v1/admin/users/{user_id}", json={"role": "admin"}, headers=admin_headers)
+    assert response.status_code == 200, response.text
+
+    # The customer token predates the promotion
+    assert client.get("/api/v1/orders/", headers=headers).status_code == 401
+    response = client.post("/api/v1/auth/login", json={"email": email, "password": "secret123"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    assert client.get("/api/v1/admin/orders", headers=headers).status_code == 200
@@ -0,0 +1,52 @@
+import json
+
+from app.core.database import SessionLocal
+from app.models.product import Product
+
+def import_ndjson(client, headers, rows):
+    body = "\n".join(json.dumps(row) for row in rows)
+    response = client.post(
+        "/api/v1/admin/products/import",
+        content=body,
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def test_partial_upsert_keeps_omitted_columns(client, admin_headers):
+    db = SessionLocal()
+    try:
+        products = db.query(Product).filter(Product.category_id.isnot(None), Product.description.isnot(None)).order_by(Product.id).limit(2).all()
+        for product in products:
+            product.is_active = False
+        db.commit()
+        before = {product.id: (product.description, product.image_url, product.category_id) for product in products}
+    finally:
+        db.close()
+
+    report = import_ndjson(client, admin_headers, [
+        {"id": product_id, "name": f"Reimported {product_id}", "price": 9.99, "stock_quantity": 42}
+        for product_id in before
+    ])
+    assert report["upserted"] == 2 and report["failed"] == 0
+
+    db = SessionLocal()
+    try:
+        for product in db.query(Product).filter(Product.id.in_(before)):
+            assert (product.description, product.image_url, product.category_id) == before[product.id]
+            assert product.is_active is False
+            assert (product.name, product.price, product.stock_quantity) == (f"Reimported {product.id}", 9.99, 42)
+    finally:
+        db.close()
+
+def test_upsert_of_new_id_applies_defaults(client, admin_headers):
+    report = import_ndjson(client, admin_headers, [{"id": 9001, "name": "Imported", "price": 1.5, "stock_quantity": 3}])
+    assert report["upserted"] == 1
+
+    db = SessionLocal()
+    try:
+        product = db.get(Product, 9001)
+        assert product.is_active is True
+        assert product.description is None
+    finally:
+        db.close()
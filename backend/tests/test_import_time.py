@@ -0,0 +1,13 @@
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_cold_import_stays_within_budget():
+    """check_import_time.py against IMPORT_TIME_BUDGET_MS (default 1500 ms) in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "check_import_time.py"],
+        cwd=BACKEND_DIR, capture_output=True, text=True,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
@@ -0,0 +1,30 @@
+from app.core.catalog import invalidate_catalog
+from app.utils import stock_alerts
+
+SHIPPING = {
+    "shipping_address": "1 Market St",
+    "shipping_city": "San Francisco",
+    "shipping_state": "CA",
+    "shipping_zip": "94105",
+    "shipping_country": "USA",
+}
+
+def catalog_stock(client, product_id):
+    return next(p for p in client.get("/api/v1/products/").json() if p["id"] == product_id)["stock_quantity"]
+
+def test_cancel_restocks_and_refreshes_catalog(client, admin_headers, customer_headers):
+    invalidate_catalog("test")
+    product = next(p for p in client.get("/api/v1/products/").json() if p["stock_quantity"] >= 3)
+    client.post("/api/v1/cart/items", json={"product_id": product["id"], "quantity": 3}, headers=customer_headers)
+    order = client.post("/api/v1/orders/checkout", json=SHIPPING, headers=customer_headers).json()
+    # Checkouts leave cached pages alone; cache one showing the post-checkout stock
+    invalidate_catalog("test")
+    stock = catalog_stock(client, product["id"])
+    assert stock == product["stock_quantity"] - 3
+    stock_alerts.scan_pending_stock()
+
+    response = client.put(f"/api/v1/admin/orders/{order['id']}/status", json={"status": "cancelled"}, headers=admin_headers)
+    assert response.status_code == 200, response.text
+
+    assert catalog_stock(client, product["id"]) == stock + 3
+    assert stock_alerts._pending[product["id"]] == stock
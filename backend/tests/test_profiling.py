@@ -0,0 +1,29 @@
+import pytest
+
+@pytest.mark.parametrize("caller", ["anonymous", "customer", "invalid token"])
+def test_profile_flag_is_ignored_for_non_admins(client, customer_headers, caller):
+    headers = {
+        "anonymous": {},
+        "customer": customer_headers,
+        "invalid token": {"Authorization": "Bearer not-a-token"},
+    }[caller]
+    response = client.get("/api/v1/products/", params={"profile": "1"}, headers=headers)
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+
+    response = client.get("/api/v1/products/", headers={**headers, "X-Profile": "1"})
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+
+def test_admin_request_is_profiled(client, admin_headers, customer_headers):
+    response = client.get("/api/v1/products/", params={"profile": "1"}, headers=admin_headers)
+    assert response.status_code == 200
+    profile_id = response.headers["X-Profile-Id"]
+
+    response = client.get(f"/api/v1/admin/profiles/{profile_id}/json", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()["path"] == "/api/v1/products/"
+
+    # The stored profiles stay admin-only
+    response = client.get(f"/api/v1/admin/profiles/{profile_id}/json", headers=customer_headers)
+    assert response.status_code == 403
@@ -0,0 +1,31 @@
+SHIPPING = {
+    "shipping_address": "1 Market St",
+    "shipping_city": "San Francisco",
+    "shipping_state": "CA",
+    "shipping_zip": "94105",
+    "shipping_country": "USA",
+}
+
+def test_product_list_query_budget(client, query_budget):
+    with query_budget(1):
+        response = client.get("/api/v1/products/", params={"limit": 50})
+    assert response.status_code == 200
+    assert len(response.json()) > 1
+
+def test_order_history_query_budget(client, customer_headers, query_budget):
+    with query_budget(3):
+        response = client.get("/api/v1/orders/", headers=customer_headers)
+    assert response.status_code == 200
+    assert response.json()
+
+def test_checkout_query_budget(client, customer_headers, query_budget):
+    products = [product for product in client.get("/api/v1/products/").json() if product["stock_quantity"] > 0][:5]
+    for product in products:
+        response = client.post("/api/v1/cart/items", json={"product_id": product["id"], "quantity": 1}, headers=customer_headers)
+        assert response.status_code == 200, response.text
+
+    # The same number of statements however many lines the cart holds
+    with query_budget(12):
+        response = client.post("/api/v1/orders/checkout", json=SHIPPING, headers=customer_headers)
+    assert response.status_code == 200, response.text
+    assert len(response.json()["order_items"]) == len(products)
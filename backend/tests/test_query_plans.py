@@ -0,0 +1,128 @@
+"""
+The hot queries must be planned as a range search on the index migrations added
+for them, not a table scan or a read of the whole index. Statements come from the
+endpoints' own query builders where there is one and are executed with EXPLAIN
+prefixed at the cursor, so they are compiled and bound exactly as at runtime. On
+PostgreSQL sequential scans are disabled for the check, so the small test tables
+still show whether an index is usable for the query shape.
+"""
+
+import json
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.api.v1.endpoints.admin import admin_orders_page, admin_orders_query, low_stock_query
+from app.api.v1.endpoints.orders import order_history_query
+from app.api.v1.endpoints.products import product_page_query
+from app.core.database import engine
+from app.models.cart import Cart, CartItem
+from app.models.order import OrderItem, OrderStatus
+
+# (description, statement builder, table, expected index or None for any index on the table)
+HOT_QUERIES = [
+    ("storefront product listing", lambda db: product_page_query(1, 0, 100), "products", "ix_products_active_category"),
+    ("order history", lambda db: order_history_query(1), "orders", "ix_orders_user_created_at"),
+    (
+        "admin orders keyset page",
+        lambda db: admin_orders_page(admin_orders_query(db)[0], 2, 50).statement,
+        "orders",
+        "ix_orders_created_at",
+    ),
+    (
+        "admin orders by status keyset page",
+        lambda db: admin_orders_page(admin_orders_query(db, status_filter=OrderStatus.PENDING)[0], 2, 50).statement,
+        "orders",
+        "ix_orders_status_created_at",
+    ),
+    (
+        "admin low-stock report",
+        lambda db: low_stock_query(db).statement,
+        "products",
+        "ix_products_low_stock",
+    ),
+    (
+        # What selectinload(Order.items) issues for a page of order history
+        "order items for orders",
+        lambda db: select(OrderItem).where(OrderItem.order_id.in_([1, 2])),
+        "order_items",
+        "ix_order_items_order_id",
+    ),
+    (
+        "cart line lookup",
+        lambda db: select(CartItem).where(CartItem.cart_id == 1, CartItem.product_id == 1),
+        "cart_items",
+        "ix_cart_items_cart_product",
+    ),
+    (
+        # Served by the unique constraint on carts.user_id, whose name is dialect-generated
+        "cart for user",
+        lambda db: select(Cart).where(Cart.user_id == 1),
+        "carts",
+        None,
+    ),
+]
+
+@contextmanager
+def explain_at_cursor(connection, prefix: str):
+    """Run statements executed in the block as `prefix` + statement and collect the plan rows"""
+    plans = []
+
+    def explain(conn, cursor, statement, parameters, context, executemany):
+        return prefix + statement, parameters
+
+    def collect(conn, cursor, statement, parameters, context, executemany):
+        plans.append(cursor.fetchall())
+
+    event.listen(connection, "before_cursor_execute", explain, retval=True)
+    event.listen(connection, "after_cursor_execute", collect)
+    try:
+        yield plans
+    finally:
+        event.remove(connection, "before_cursor_execute", explain)
+        event.remove(connection, "after_cursor_execute", collect)
+
+def _postgresql_plan(connection, statement):
+    connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    with explain_at_cursor(connection, "EXPLAIN (FORMAT JSON) ") as plans:
+        connection.execute(statement).close()
+    plan = plans[0][0][0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    nodes, stack = [], [plan[0]["Plan"]]
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        stack.extend(node.get("Plans", []))
+    # Only index scans with a condition search a range; without one they read the whole index
+    searched = {node["Index Name"] for node in nodes if "Index Name" in node and "Index Cond" in node}
+    searched_tables = {node["Relation Name"] for node in nodes if "Index Cond" in node}
+    return searched, searched_tables, json.dumps(plan)
+
+def _sqlite_plan(connection, statement):
+    with explain_at_cursor(connection, "EXPLAIN QUERY PLAN ") as plans:
+        connection.execute(statement).close()
+    details = [row[-1] for row in plans[0]]
+    searched, searched_tables = set(), set()
+    for detail in details:
+        words = detail.split()
+        # SEARCH seeks a range of an index; SCAN reads the whole table or index
+        if words[:1] == ["SEARCH"]:
+            searched_tables.add(words[1])
+            if "INDEX" in words:
+                searched.add(words[words.index("INDEX") + 1])
+    return searched, searched_tables, "; ".join(details)
+
+@pytest.mark.parametrize("description, build, table, expected", HOT_QUERIES, ids=[query[0] for query in HOT_QUERIES])
+def test_hot_query_searches_its_index(database, description, build, table, expected):
+    explain = _postgresql_plan if engine.dialect.name == "postgresql" else _sqlite_plan
+    with engine.connect() as connection, Session(bind=connection) as db:
+        statement = build(db)
+        with connection.begin():
+            searched, searched_tables, plan = explain(connection, statement)
+    if expected is not None:
+        assert expected in searched, f"{description}: expected a search on {expected}, plan: {plan}"
+    else:
+        assert table in searched_tables, f"{description}: expected an index search on {table}, plan: {plan}"
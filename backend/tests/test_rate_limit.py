@@ -0,0 +1,45 @@
+from types import SimpleNamespace
+
+import anyio
+import pytest
+
+from app.core import rate_limit
+from app.core.config import settings
+from app.core.rate_limit import SUGGESTIONS_POLICY, MemoryBucketStore
+
+@pytest.fixture
+def limited(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(rate_limit, "_store", MemoryBucketStore(settings.RATE_LIMIT_MAX_KEYS))
+    # No refill between requests
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(monotonic=lambda: 0.0))
+
+def test_headers_reach_the_response(client, limited):
+    response = client.get("/api/v1/products/search/suggestions", params={"query": "mil"})
+    assert response.status_code == 200
+    assert response.headers["RateLimit-Limit"] == str(SUGGESTIONS_POLICY.burst)
+    assert response.headers["RateLimit-Remaining"] == str(SUGGESTIONS_POLICY.burst - 1)
+
+def test_rotating_tokens_share_the_ip_bucket(client, limited, admin_headers, customer_headers):
+    for i in range(SUGGESTIONS_POLICY.burst):
+        headers = admin_headers if i % 2 else customer_headers
+        response = client.get("/api/v1/products/search/suggestions", params={"query": "mil"}, headers=headers)
+        assert response.status_code == 200
+
+    # Each user has spent only half their bucket, but the client IP is out of tokens
+    response = client.get("/api/v1/products/search/suggestions", params={"query": "mil"}, headers=admin_headers)
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+
+def test_refused_request_does_not_spend_the_ip_bucket(client, limited, customer_headers):
+    user_bucket = f"{SUGGESTIONS_POLICY.name}:user:customer@savegowholesale.com"
+    for _ in range(SUGGESTIONS_POLICY.burst):
+        anyio.run(rate_limit._store.take, [user_bucket], SUGGESTIONS_POLICY)
+
+    response = client.get("/api/v1/products/search/suggestions", params={"query": "mil"}, headers=customer_headers)
+    assert response.status_code == 429
+
+    # The user bucket refused the request, so the client IP still has its whole burst
+    response = client.get("/api/v1/products/search/suggestions", params={"query": "mil"})
+    assert response.status_code == 200
+    assert response.headers["RateLimit-Remaining"] == str(SUGGESTIONS_POLICY.burst - 1)